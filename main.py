@@ -1,33 +1,578 @@
+import argparse
 import asyncio
+import logging
 import os
-import aiofiles
+import time
+from typing import TYPE_CHECKING
 import dotenv
-import logging
-import inquirer
-from rich.console import Console
-from podcaster.prompt_renderer import JinjaPromptRenderer
-from podcaster.source_repository import (
-    TextFileSourceRepository,
-)
-from podcaster.speech_to_audio_converter import DefaultSpeechToAudioConverter
-from podcaster.transcript_generator import LLMTranscriptGenerator
-from podcaster.llm_client import OpenAILLMClient
-from podcaster.transcript_repository import LocalTranscriptRepository
-from podcaster.transcript_to_audio_converter import DefaultTranscriptToAudioConverter
-from podcaster.tts_client import OpenAITTSClient
-from pydub import AudioSegment
-from podcaster.audio_stitcher import LibrosaAudioClipStitcher, PydubAudioClipStitcher, WaveAudioClipStitcher
+
+# Backends such as openai, librosa, pydub, inquirer and rich take from a fraction of a
+# second to several seconds to import, so each command imports only the modules it uses
+if TYPE_CHECKING:
+    from rich.console import Console
+    from podcaster.audio_stitcher import AudioClipStitcher
+    from podcaster.episode_pipeline import PipelineReport
+    from podcaster.instrumentation import Recorder
+    from podcaster.llm_client import OpenAILLMClient
+    from podcaster.transcript_generator import TranscriptGenerator
+    from podcaster.transcript_repository import TranscriptRepository
+    from podcaster.transcript_to_audio_converter import DefaultTranscriptToAudioConverter
 
 dotenv.load_dotenv()
 
+STITCHERS = ['parallel', 'timeline', 'streaming', 'wave', 'pydub', 'librosa']
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Turn your content into podcasts.')
+    parser.add_argument(
+        '--trace',
+        help='Record spans and counters of the command and write them here as a Chrome trace.'
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    transcripts_parser = argparse.ArgumentParser(add_help=False)
+    transcripts_parser.add_argument(
+        '--transcript-db',
+        help='Store transcripts in this SQLite database instead of as files in output/transcripts.'
+    )
+
+    episode_parser = argparse.ArgumentParser(add_help=False)
+    episode_parser.add_argument('--sources', nargs='+', required=True, help='Source text files, directories or globs.')
+    episode_parser.add_argument('--outlines', nargs='+', required=True, help='Outline files, one podcast each.')
+    episode_parser.add_argument('--hosts', nargs='+', default=['Jane Doe', 'John Smith'], help='Host names.')
+
+    generation_options_parser = argparse.ArgumentParser(add_help=False)
+    generation_options_parser.add_argument('--lazy-sources', action='store_true', help='Memory-map sources and decode them on use.')
+    generation_options_parser.add_argument(
+        '--source-token-budget',
+        type=int,
+        help='Only include the most relevant source chunks, up to this many tokens, in each prompt.'
+    )
+    generation_options_parser.add_argument(
+        '--sectioned',
+        action='store_true',
+        help='Generate each section of the outline in a separate, parallel LLM call.'
+    )
+    generation_options_parser.add_argument('--llm-rpm', type=float, default=500, help='LLM requests per minute, shared by all episodes.')
+    generation_options_parser.add_argument('--llm-tpm', type=float, default=30000, help='LLM tokens per minute, shared by all episodes.')
+
+    generation_parser = argparse.ArgumentParser(add_help=False, parents=[episode_parser, generation_options_parser])
+    generation_parser.add_argument('--max-generations', type=int, default=2, help='Transcripts generated at once.')
+
+    synthesis_parser = argparse.ArgumentParser(add_help=False)
+    synthesis_parser.add_argument(
+        '--themes',
+        default='themes',
+        help='Directory of music theme assets, named after their themes. Music items are skipped if it does not exist.'
+    )
+    synthesis_parser.add_argument('--max-tts-requests', type=int, default=8, help='TTS requests in flight across all episodes.')
+    synthesis_parser.add_argument('--tts-rpm', type=float, default=50, help='TTS requests per minute, shared by all episodes.')
+
+    export_parser = argparse.ArgumentParser(add_help=False)
+    export_parser.add_argument(
+        '--format',
+        choices=['wav', 'flac', 'ogg', 'opus', 'mp3'],
+        default='wav',
+        help='The format of the podcasts. Other formats than WAV are encoded while stitching.'
+    )
+    export_parser.add_argument('--bitrate', type=int, help='The bitrate of lossy formats in kbit/s.')
+    export_parser.add_argument(
+        '--encoder',
+        choices=['auto', 'soundfile', 'ffmpeg'],
+        default='auto',
+        help='The encoder of the podcasts. By default lossy formats are encoded by ffmpeg if it is installed.'
+    )
+
+    build_parser = subparsers.add_parser(
+        'build',
+        parents=[transcripts_parser, generation_parser, synthesis_parser, export_parser],
+        help='Generate, synthesize and stitch podcasts for outlines.'
+    )
+    build_parser.add_argument(
+        '--stream-items',
+        action='store_true',
+        help='Start synthesizing transcript items while the rest of the transcript is still being generated.'
+    )
+    build_parser.add_argument(
+        '--in-memory-clips',
+        action='store_true',
+        help='Hand synthesized clips to the stitcher in memory instead of writing them to output/clips.'
+    )
+    build_parser.add_argument('--max-stitches', type=int, default=1, help='Podcasts stitched at once.')
+
+    subparsers.add_parser(
+        'generate',
+        parents=[transcripts_parser, generation_parser],
+        help='Generate a transcript for each outline.'
+    )
+
+    synthesize_parser = subparsers.add_parser(
+        'synthesize',
+        parents=[transcripts_parser, synthesis_parser],
+        help='Convert transcripts to audio clips in output/clips.'
+    )
+    synthesize_parser.add_argument(
+        'transcripts',
+        nargs='*',
+        help='Names of the transcripts to convert, as shown by the list command. Defaults to every transcript.'
+    )
+
+    stitch_parser = subparsers.add_parser(
+        'stitch',
+        parents=[export_parser],
+        help='Stitch clip directories into podcasts.'
+    )
+    stitch_parser.add_argument(
+        'clip_dirs',
+        nargs='*',
+        help='Clip directories to stitch. Defaults to every directory in output/clips.'
+    )
+    stitch_parser.add_argument(
+        '--stitcher',
+        choices=STITCHERS,
+        default='timeline',
+        help='The stitcher to use. The timeline stitcher honours item offsets; the parallel stitcher mixes on every core.'
+    )
+    stitch_parser.add_argument('--workers', type=int, help='Worker processes of the parallel stitcher. Defaults to the number of cores.')
+    stitch_parser.add_argument('--max-concurrent', type=int, default=4, help='Clip directories stitched at once.')
+    stitch_parser.add_argument('--output-dir', default='output/podcasts', help='Directory the podcasts are written to.')
+
+    subparsers.add_parser(
+        'list',
+        parents=[transcripts_parser],
+        help='List the stored transcripts.'
+    )
+
+    jobs_parser = argparse.ArgumentParser(add_help=False)
+    jobs_parser.add_argument('--jobs-db', default='output/jobs.sqlite3', help='The SQLite database episodes are queued in.')
+
+    queue_parser = subparsers.add_parser(
+        'queue',
+        parents=[jobs_parser],
+        help='Queue episodes to be built by the work command.'
+    )
+    queue_parser.add_argument('--outlines', nargs='+', default=[], help='Outline files, one episode each.')
+    queue_parser.add_argument('--sources', nargs='+', default=[], help='Source text files, directories or globs of the outlines.')
+    queue_parser.add_argument('--hosts', nargs='+', default=['Jane Doe', 'John Smith'], help='Host names of the outlines.')
+    queue_parser.add_argument(
+        '--transcripts',
+        nargs='+',
+        default=[],
+        help='Names of already generated transcripts, as shown by the list command, to synthesize and stitch.'
+    )
+
+    work_parser = subparsers.add_parser(
+        'work',
+        parents=[jobs_parser, transcripts_parser, generation_options_parser, synthesis_parser, export_parser],
+        help='Build the queued episodes, resuming any that were interrupted, until the queue is empty.'
+    )
+    work_parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes, each building one episode at a time. The rate limits are split between them.'
+    )
+    work_parser.add_argument(
+        '--stitcher',
+        choices=[stitcher for stitcher in STITCHERS if stitcher != 'parallel'],
+        default='timeline',
+        help='The stitcher to use.'
+    )
+    work_parser.add_argument('--output-dir', default='output/podcasts', help='Directory the podcasts are written to.')
+
+    jobs_command_parser = subparsers.add_parser(
+        'jobs',
+        parents=[jobs_parser],
+        help='Show the queued episodes and their progress.'
+    )
+    jobs_command_parser.add_argument('--retry', action='store_true', help='Queue the failed episodes again first.')
+
+    return parser.parse_args()
+
+def create_transcript_repository(transcript_db: str | None) -> 'TranscriptRepository':
+    from podcaster.transcript_repository import LocalTranscriptRepository, SQLiteTranscriptRepository
+
+    return SQLiteTranscriptRepository(transcript_db) if transcript_db else LocalTranscriptRepository()
+
+def create_llm_client(args: argparse.Namespace | None = None) -> 'OpenAILLMClient':
+    from podcaster.llm_client import OpenAILLMClient
+    from podcaster.rate_limiter import RateLimiter
+
+    # OpenAI quotas are per model, so the LLM and TTS models each get one limiter for every episode
+    return OpenAILLMClient(
+        api_key=os.getenv('OPENAI_API_KEY') or '',
+        rate_limiter=RateLimiter(requests_per_period=args.llm_rpm, units_per_period=args.llm_tpm) if args else None
+    )
+
+def create_transcript_generator(args: argparse.Namespace | None = None) -> 'TranscriptGenerator':
+    from podcaster.llm_cache import CachingLLMClient
+    from podcaster.prompt_renderer import JinjaPromptRenderer
+    from podcaster.transcript_generator import LLMTranscriptGenerator, SectionedLLMTranscriptGenerator
+
+    source_retriever = None
+    if args and args.source_token_budget:
+        from podcaster.source_retriever import BM25SourceIndex, SourceRetriever
+
+        source_retriever = SourceRetriever(BM25SourceIndex(), token_budget=args.source_token_budget)
+
+    llm_client = create_llm_client(args)
+    generator_type = SectionedLLMTranscriptGenerator if args and args.sectioned else LLMTranscriptGenerator
+    return generator_type(
+        CachingLLMClient(llm_client, model=llm_client.model),
+        JinjaPromptRenderer(template_folder='prompts'),
+        source_retriever=source_retriever
+    )
+
+def create_transcript_to_audio_converter(args: argparse.Namespace | None = None) -> 'DefaultTranscriptToAudioConverter':
+    from podcaster.music_library import MusicThemeLibrary
+    from podcaster.rate_limiter import RateLimiter
+    from podcaster.speech_to_audio_converter import DefaultSpeechToAudioConverter
+    from podcaster.transcript_to_audio_converter import DefaultTranscriptToAudioConverter
+    from podcaster.tts_cache import CachingTTSClient
+    from podcaster.tts_client import OpenAITTSClient
+
+    themes = args.themes if args else 'themes'
+    max_tts_requests = args.max_tts_requests if args else 8
+    tts_client = OpenAITTSClient(
+        api_key=os.getenv('OPENAI_API_KEY') or '',
+        rate_limiter=RateLimiter(requests_per_period=args.tts_rpm, max_concurrency=max_tts_requests) if args else None
+    )
+    return DefaultTranscriptToAudioConverter(
+        speech_to_audio_converter=DefaultSpeechToAudioConverter(
+            tts_client=CachingTTSClient(tts_client, model=tts_client.model, response_format=tts_client.response_format),
+            max_chunk_chars=1000
+        ),
+        max_concurrency=max_tts_requests,
+        request_timeout=120,
+        max_retries=5,
+        incremental=True,
+        music_library=MusicThemeLibrary(themes) if os.path.isdir(themes) else None
+    )
+
+def create_audio_stitcher(
+    name: str = 'streaming',
+    workers: int | None = None,
+    args: argparse.Namespace | None = None
+) -> 'AudioClipStitcher':
+    """Create a stitcher, importing only the backend it is built on."""
+    from podcaster.audio_encoder import AudioExport
+
+    export = AudioExport(format=args.format, bitrate=args.bitrate, encoder=args.encoder) if args else AudioExport()
+    if name in ('pydub', 'librosa') and export.format != 'wav':
+        raise ValueError(f"The {name} stitcher only writes WAV files.")
+
+    if name == 'pydub':
+        from podcaster.pydub_audio_stitcher import PydubAudioClipStitcher
+
+        return PydubAudioClipStitcher()
+    if name == 'librosa':
+        from podcaster.librosa_audio_stitcher import LibrosaAudioClipStitcher
+
+        return LibrosaAudioClipStitcher()
+
+    from podcaster.audio_normalizer import AudioNormalizer
+    from podcaster.audio_stitcher import (
+        ParallelAudioClipStitcher,
+        StreamingAudioClipStitcher,
+        TimelineAudioClipStitcher,
+        WaveAudioClipStitcher,
+    )
+
+    if name == 'parallel':
+        return ParallelAudioClipStitcher(max_workers=workers, normalizer=AudioNormalizer(), export=export)
+    if name == 'timeline':
+        return TimelineAudioClipStitcher(normalizer=AudioNormalizer(), export=export)
+    if name == 'streaming':
+        return StreamingAudioClipStitcher(normalizer=AudioNormalizer(), export=export)
+    if name == 'wave':
+        return WaveAudioClipStitcher(normalizer=AudioNormalizer(), export=export)
+    raise ValueError(f"Unknown stitcher: {name}")
+
+def list_clip_dirs() -> list[str]:
+    if not os.path.isdir('output/clips/'):
+        return []
+    return [
+        d for d in sorted(os.listdir('output/clips/'))
+        if os.path.isdir(os.path.join('output/clips/', d))
+    ]
+
+def print_pipeline_report(console: 'Console', report: 'PipelineReport'):
+    from rich.table import Table
+
+    table = Table(title=f'Pipeline timings ({report.total_seconds:.1f}s total)')
+    for column in ('Stage', 'Episodes', 'Failures', 'Busy (s)', 'Queue wait (s)', 'Wall (s)'):
+        table.add_column(column)
+    for stage in report.stages:
+        table.add_row(
+            stage.name,
+            str(stage.count),
+            str(stage.failures),
+            f'{stage.busy_seconds:.1f}',
+            f'{stage.queue_wait_seconds:.1f}',
+            f'{stage.wall_seconds:.1f}'
+        )
+    console.print(table)
+    for podcast in report.podcasts:
+        console.print(f'[bold green]{podcast}[/bold green]')
+
+def print_instrumentation_summary(console: 'Console', recorder: 'Recorder'):
+    from rich.table import Table
+
+    table = Table(title='Spans')
+    for column in ('Span', 'Count', 'Total (s)', 'Mean (s)', 'Max (s)'):
+        table.add_column(column)
+    for summary in recorder.summarize():
+        table.add_row(
+            summary.name,
+            str(summary.count),
+            f'{summary.total_seconds:.2f}',
+            f'{summary.mean_seconds:.3f}',
+            f'{summary.max_seconds:.3f}'
+        )
+    console.print(table)
+
+    table = Table(title='Counters')
+    table.add_column('Counter')
+    table.add_column('Total')
+    for name, value in sorted(recorder.counters.items()):
+        table.add_row(name, f'{value:,.2f}' if isinstance(value, float) and not value.is_integer() else f'{int(value):,}')
+    console.print(table)
+
+async def build_async(args: argparse.Namespace, console: 'Console'):
+    from podcaster.episode_pipeline import EpisodePipeline
+    from podcaster.source_repository import TextFileSourceRepository
+
+    sources = await TextFileSourceRepository(args.sources, lazy=args.lazy_sources).load_sources_async()
+    outlines = await TextFileSourceRepository(args.outlines).load_sources_async()
+
+    pipeline = EpisodePipeline(
+        transcript_generator=create_transcript_generator(args),
+        transcript_repository=create_transcript_repository(args.transcript_db),
+        transcript_to_audio_converter=create_transcript_to_audio_converter(args),
+        # In-memory clips have no manifest to read offsets from, and are stitched as order groups
+        audio_stitcher=create_audio_stitcher('streaming' if args.in_memory_clips else 'timeline', args=args),
+        max_concurrent_generations=args.max_generations,
+        max_concurrent_stitches=args.max_stitches,
+        stream_items=args.stream_items,
+        in_memory_clips=args.in_memory_clips
+    )
+    report = await pipeline.run_async(args.hosts, sources, outlines)
+    print_pipeline_report(console, report)
+
+async def generate_async(args: argparse.Namespace, console: 'Console'):
+    from podcaster.source_repository import TextFileSourceRepository
+
+    sources = await TextFileSourceRepository(args.sources, lazy=args.lazy_sources).load_sources_async()
+    outlines = await TextFileSourceRepository(args.outlines).load_sources_async()
+    transcript_generator = create_transcript_generator(args)
+    transcript_repository = create_transcript_repository(args.transcript_db)
+    semaphore = asyncio.Semaphore(args.max_generations)
+
+    async def generate_one_async(outline) -> str:
+        async with semaphore:
+            transcript = await transcript_generator.generate_transcript_async(args.hosts, sources, outline)
+        await transcript_repository.write_transcript_async(transcript)
+        return transcript.title
+
+    titles = await asyncio.gather(*(generate_one_async(outline) for outline in outlines))
+    for title in titles:
+        console.print(f'[bold green]{title}[/bold green]')
+    console.print(f'[bold green]Generated {len(titles)} transcripts.[/bold green]')
+
+async def synthesize_async(args: argparse.Namespace, console: 'Console'):
+    transcript_repository = create_transcript_repository(args.transcript_db)
+    names = args.transcripts or await transcript_repository.list_transcripts_async()
+    if not names:
+        console.print('[bold red]No transcripts found. Please generate a transcript first.[/bold red]')
+        return
+
+    transcript_to_audio_converter = create_transcript_to_audio_converter(args)
+
+    async def synthesize_one_async(name: str):
+        transcript = await transcript_repository.read_transcript_async(name)
+        return await transcript_to_audio_converter.convert_transcript_to_audio_async(transcript)
+
+    # The converter's concurrency limit is shared, so transcripts are converted together
+    clip_dirs = await asyncio.gather(*(synthesize_one_async(name) for name in names))
+    for clip_dir in clip_dirs:
+        console.print(f'[bold green]{clip_dir}[/bold green]')
+
+async def stitch_async(args: argparse.Namespace, console: 'Console'):
+    clip_dirs = args.clip_dirs or [os.path.join('output/clips/', d) for d in list_clip_dirs()]
+    if not clip_dirs:
+        console.print('[bold red]No clip directories found. Please convert a transcript to audio first.[/bold red]')
+        return
+
+    from podcaster.audio_stitcher import stitch_clip_directories_async
+
+    audio_stitcher = create_audio_stitcher(args.stitcher, args.workers, args)
+    started = time.perf_counter()
+    try:
+        podcasts = await stitch_clip_directories_async(
+            audio_stitcher, clip_dirs, args.output_dir, max_concurrency=args.max_concurrent
+        )
+    finally:
+        if hasattr(audio_stitcher, 'shutdown'):
+            audio_stitcher.shutdown()
+    elapsed = time.perf_counter() - started
+
+    for podcast in podcasts:
+        console.print(f'[bold green]{podcast}[/bold green]')
+    console.print(f'[bold green]Stitched {len(podcasts)} podcasts in {elapsed:.1f}s.[/bold green]')
+
+async def list_async(args: argparse.Namespace, console: 'Console'):
+    from rich.table import Table
+
+    summaries = await create_transcript_repository(args.transcript_db).list_transcript_summaries_async()
+    table = Table(title='Transcripts')
+    for column in ('Name', 'Title', 'Hosts', 'Items'):
+        table.add_column(column)
+    for summary in summaries:
+        table.add_row(summary.name, summary.title, ', '.join(host.name for host in summary.hosts), str(summary.item_count))
+    console.print(table)
+
+async def queue_async(args: argparse.Namespace, console: 'Console'):
+    from podcaster.job_store import JobStore
+    from podcaster.source_repository import TextFileSourceRepository
+
+    if args.outlines and not args.sources:
+        raise ValueError("Outlines need --sources to generate transcripts from.")
+    # Lazy sources only list the files, so every outline is checked without being read
+    outlines = await TextFileSourceRepository(args.outlines, lazy=True).load_sources_async() if args.outlines else []
+    sources = [os.path.abspath(source) for source in args.sources]
+
+    job_store = JobStore(args.jobs_db)
+    jobs = [job_store.add_outline_job(os.path.abspath(outline.filepath), sources, args.hosts) for outline in outlines]
+    jobs += [job_store.add_transcript_job(transcript) for transcript in args.transcripts]
+    job_store.close()
+    console.print(f'[bold green]Queued {len(jobs)} episodes in {args.jobs_db}.[/bold green]')
+
+def run_job_worker(args: argparse.Namespace) -> int:
+    """Drain the job queue in a worker process and return the number of jobs it finished."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='(%(asctime)s) %(name)s [%(levelname)s]: %(message)s'
+    )
+    return asyncio.run(work_jobs_async(args))
+
+async def work_jobs_async(args: argparse.Namespace) -> int:
+    from podcaster.job_store import JobStore
+    from podcaster.job_worker import JobWorker
+
+    job_store = JobStore(args.jobs_db)
+    worker = JobWorker(
+        job_store=job_store,
+        transcript_generator=create_transcript_generator(args),
+        transcript_repository=create_transcript_repository(args.transcript_db),
+        transcript_to_audio_converter=create_transcript_to_audio_converter(args),
+        audio_stitcher=create_audio_stitcher(args.stitcher, args=args),
+        output_directory=args.output_dir,
+        lazy_sources=args.lazy_sources
+    )
+    try:
+        jobs = await worker.run_async()
+    finally:
+        job_store.close()
+    return sum(job.status == 'done' for job in jobs)
+
+async def work_async(args: argparse.Namespace, console: 'Console'):
+    started = time.perf_counter()
+    if args.workers <= 1:
+        finished = await work_jobs_async(args)
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Every worker has its own clients, so each gets an equal share of the rate limits
+        worker_args = argparse.Namespace(**{
+            **vars(args),
+            'llm_rpm': args.llm_rpm / args.workers,
+            'llm_tpm': args.llm_tpm / args.workers,
+            'tts_rpm': args.tts_rpm / args.workers,
+            'max_tts_requests': max(1, args.max_tts_requests // args.workers),
+        })
+        loop = asyncio.get_running_loop()
+        # Spawned rather than forked, so no worker inherits this process's event loop
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            finished = sum(await asyncio.gather(*(
+                loop.run_in_executor(executor, run_job_worker, worker_args) for _ in range(args.workers)
+            )))
+    elapsed = time.perf_counter() - started
+    console.print(f'[bold green]Finished {finished} episodes in {elapsed:.1f}s.[/bold green]')
+    await jobs_async(argparse.Namespace(jobs_db=args.jobs_db, retry=False), console)
+
+async def jobs_async(args: argparse.Namespace, console: 'Console'):
+    from rich.table import Table
+    from podcaster.job_store import JobStore
+
+    job_store = JobStore(args.jobs_db)
+    if args.retry:
+        console.print(f'[bold green]Queued {job_store.retry_failed_jobs()} failed episodes again.[/bold green]')
+    jobs = job_store.list_jobs()
+    job_store.close()
+
+    table = Table(title='Jobs')
+    for column in ('Id', 'Episode', 'Stage', 'Status', 'Clips', 'Attempts', 'Result'):
+        table.add_column(column)
+    for job in jobs:
+        table.add_row(
+            str(job.id),
+            job.transcript or os.path.basename(job.outline or ''),
+            job.stage,
+            job.status,
+            f'{job.items_done}/{job.item_count}',
+            str(job.attempts),
+            job.podcast or job.error or ''
+        )
+    console.print(table)
+
+COMMANDS = {
+    'build': build_async,
+    'generate': generate_async,
+    'synthesize': synthesize_async,
+    'stitch': stitch_async,
+    'list': list_async,
+    'queue': queue_async,
+    'work': work_async,
+    'jobs': jobs_async,
+}
+
+async def run_command_async(args: argparse.Namespace, console: 'Console'):
+    if not args.trace:
+        await COMMANDS[args.command](args, console)
+        return
+
+    from podcaster.instrumentation import disable_instrumentation, enable_instrumentation
+
+    enable_instrumentation(trace_memory=True)
+    try:
+        await COMMANDS[args.command](args, console)
+    finally:
+        recorder = disable_instrumentation()
+        if recorder is not None:
+            recorder.write_chrome_trace(args.trace)
+            print_instrumentation_summary(console, recorder)
+            console.print(f'[bold green]Trace written to {args.trace}[/bold green]')
+
 async def main_async():
+    args = parse_args()
+
     # Configure logging
     logging.basicConfig(
         level=logging.INFO,
         format='(%(asctime)s) %(name)s [%(levelname)s]: %(message)s'
     )
 
+    from rich.console import Console
     console = Console()
+
+    if args.command:
+        await run_command_async(args, console)
+        return
+
+    import inquirer
+    from podcaster.source_repository import TextFileSourceRepository
+
     # Clear the terminal
     console.clear()
 
@@ -61,15 +606,7 @@ async def main_async():
     hosts = ['Jane Doe', 'John Smith']
 
     # Initialize TranscriptRepository
-    transcript_repository = LocalTranscriptRepository()
-
-    # Initialize LLM client and transcript generator
-    llm_client = OpenAILLMClient(api_key=os.getenv('OPENAI_API_KEY') or '')
-    prompt_renderer = JinjaPromptRenderer(template_folder='prompts')
-    transcript_generator = LLMTranscriptGenerator(
-        llm_client,
-        prompt_renderer
-    )
+    transcript_repository = create_transcript_repository(None)
 
     # Present CLI options to the user
     questions = [
@@ -90,6 +627,9 @@ async def main_async():
         return
 
     if answers['action'] == 'Generate a transcript':
+        # Initialize LLM client and transcript generator
+        transcript_generator = create_transcript_generator()
+
         # Generate transcripts
         for outline in outlines:
             logging.info(f'Processing outline: {outline}')
@@ -132,20 +672,13 @@ async def main_async():
 
         # Convert the selected transcript to audio
         console.print(f"[bold green]Converting transcript '{selected_transcript_file}' to audio...[/bold green]")
-        transcript_to_audio_converter = DefaultTranscriptToAudioConverter(
-            speech_to_audio_converter=DefaultSpeechToAudioConverter(
-                tts_client=OpenAITTSClient(api_key=os.getenv('OPENAI_API_KEY') or '')
-            )
-        )
+        transcript_to_audio_converter = create_transcript_to_audio_converter()
         await transcript_to_audio_converter.convert_transcript_to_audio_async(transcript)
         console.print('[bold green]Audio conversion completed.[/bold green]')
 
     elif answers['action'] == 'Stitch audio clips into podcast':
         console.print('[bold green]Fetching available clip directories...[/bold green]')
-        clip_dirs = [
-            d for d in os.listdir('output/clips/')
-            if os.path.isdir(os.path.join('output/clips/', d))
-        ]
+        clip_dirs = list_clip_dirs()
 
         if not clip_dirs:
             console.print('[bold red]No clip directories found. Please convert a transcript to audio first.[/bold red]')
@@ -170,11 +703,11 @@ async def main_async():
 
         # Stitch the audio clips into a podcast
         console.print(f"[bold green]Stitching audio clips from '{selected_clip_dir}'...[/bold green]")
-        audio_stitcher = LibrosaAudioClipStitcher()
+        audio_stitcher = create_audio_stitcher('timeline')
         await audio_stitcher.stitch_audio_clips_async(
             clip_dir_path,
             'output/podcasts',
-            f'{selected_clip_dir}_podcast.wav'
+            audio_stitcher.get_output_file_name(f'{selected_clip_dir}_podcast')
         )
         console.print('[bold green]Audio stitching completed.[/bold green]')
 
@@ -0,0 +1,177 @@
+import logging
+import os
+import shutil
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Literal
+
+import numpy as np
+import soundfile as sf
+from pydantic import BaseModel, Field
+
+LOSSLESS_FORMATS = ('wav', 'flac')
+
+_SOUNDFILE_BLOCK_FRAMES = 65536
+
+# The libsndfile major format and subtype of each lossy export format
+_SOUNDFILE_FORMATS = {
+    'ogg': ('OGG', 'VORBIS'),
+    'opus': ('OGG', 'OPUS'),
+    'mp3': ('MP3', 'MPEG_LAYER_III'),
+}
+
+# The ffmpeg muxer and encoder of each export format
+_FFMPEG_FORMATS = {
+    'wav': ('wav', 'pcm_s16le'),
+    'flac': ('flac', 'flac'),
+    'ogg': ('ogg', 'libvorbis'),
+    'opus': ('opus', 'libopus'),
+    'mp3': ('mp3', 'libmp3lame'),
+}
+
+class AudioExport(BaseModel):
+    format: Literal['wav', 'flac', 'ogg', 'opus', 'mp3'] = Field(default='wav', description="The container and codec of the podcast.")
+    bitrate: int | None = Field(default=None, description="The target bitrate of lossy formats in kbit/s. Defaults to the encoder's.")
+    encoder: Literal['auto', 'soundfile', 'ffmpeg'] = Field(
+        default='auto',
+        description="The encoder to use. Lossy formats are encoded by ffmpeg if it is installed and by libsndfile otherwise."
+    )
+
+    def get_file_name(self, stem: str) -> str:
+        return f"{stem}.{self.format}"
+
+class AudioEncoder(ABC):
+    """Encodes audio as it is written, so the whole podcast is never held in memory.
+
+    Frames are (frames, channels) arrays of float samples in [-1.0, 1.0) or of raw
+    integer PCM samples.
+    """
+
+    @abstractmethod
+    def write(self, frames: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """Flush the encoder and finish the file."""
+        pass
+
+    def abort(self) -> None:
+        """Stop encoding after an error; the file is left incomplete."""
+        self.close()
+
+    def __enter__(self) -> 'AudioEncoder':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class SoundFileAudioEncoder(AudioEncoder):
+    """Encodes through libsndfile, in process.
+
+    WAV keeps the sample format of the clips and FLAC keeps up to 24 bits of it. libsndfile
+    has no bitrate setting, so lossy formats are encoded at its default quality.
+    """
+
+    def __init__(self, path: str | os.PathLike, sample_rate: int, channels: int, export: AudioExport, subtype: str = 'PCM_16'):
+        if export.format in LOSSLESS_FORMATS:
+            major_format = export.format.upper()
+            if export.format == 'flac' and subtype not in ('PCM_S8', 'PCM_16', 'PCM_24'):
+                subtype = 'PCM_24' if subtype != 'PCM_U8' else 'PCM_16'
+        else:
+            major_format, subtype = _SOUNDFILE_FORMATS[export.format]
+            if major_format not in sf.available_formats():
+                raise ValueError(f"This build of libsndfile cannot write {export.format}; install ffmpeg to export it.")
+            if export.bitrate is not None:
+                logging.warning(f"libsndfile has no bitrate setting; encoding {export.format} at its default quality")
+        self._file = sf.SoundFile(path, 'w', samplerate=sample_rate, channels=channels, format=major_format, subtype=subtype)
+
+    def write(self, frames: np.ndarray) -> None:
+        # libsndfile's lossy encoders crash on very large writes, so frames are written in blocks
+        for start in range(0, len(frames), _SOUNDFILE_BLOCK_FRAMES):
+            block = frames[start:start + _SOUNDFILE_BLOCK_FRAMES]
+            # libsndfile converts 16 and 32-bit integers itself
+            self._file.write(block if block.dtype in (np.int16, np.int32) else to_float32(block))
+
+    def close(self) -> None:
+        self._file.close()
+
+class FFmpegAudioEncoder(AudioEncoder):
+    """Encodes by piping 32-bit float PCM into an ffmpeg subprocess.
+
+    ffmpeg encodes on its own core while the stitcher keeps mixing, and resamples to a
+    rate the codec supports if it has to (Opus only takes 8 to 48 kHz in a few steps).
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        sample_rate: int,
+        channels: int,
+        export: AudioExport,
+        executable: str = 'ffmpeg'
+    ):
+        muxer, codec = _FFMPEG_FORMATS[export.format]
+        self._command = [
+            executable, '-hide_banner', '-nostdin', '-loglevel', 'error', '-y',
+            '-f', 'f32le', '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0',
+            '-c:a', codec,
+        ]
+        if export.bitrate is not None and export.format not in LOSSLESS_FORMATS:
+            self._command += ['-b:a', f"{export.bitrate}k"]
+        self._command += ['-f', muxer, os.fspath(path)]
+        try:
+            self._process = subprocess.Popen(self._command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"{executable} not found. Install ffmpeg or export with the soundfile encoder.")
+
+    def write(self, frames: np.ndarray) -> None:
+        try:
+            self._process.stdin.write(to_float32(frames).astype('<f4', copy=False).tobytes())
+        except BrokenPipeError:
+            # ffmpeg exited early; close() raises with its error output
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._process.stdin.closed:
+            self._process.wait()
+            return
+        self._process.stdin.close()
+        stderr = self._process.stderr.read()
+        self._process.stderr.close()
+        if self._process.wait() != 0:
+            raise subprocess.CalledProcessError(self._process.returncode, self._command, stderr=stderr)
+
+    def abort(self) -> None:
+        self._process.kill()
+        self._process.wait()
+        for stream in (self._process.stdin, self._process.stderr):
+            stream.close()
+
+def open_audio_encoder(
+    path: str | os.PathLike,
+    sample_rate: int,
+    channels: int,
+    export: AudioExport,
+    subtype: str = 'PCM_16'
+) -> AudioEncoder:
+    """Open the encoder `export` asks for; `subtype` is the libsndfile subtype of the clips."""
+    encoder = export.encoder
+    if encoder == 'auto':
+        lossy = export.format not in LOSSLESS_FORMATS
+        encoder = 'ffmpeg' if lossy and shutil.which('ffmpeg') else 'soundfile'
+    if encoder == 'ffmpeg':
+        return FFmpegAudioEncoder(path, sample_rate, channels, export)
+    return SoundFileAudioEncoder(path, sample_rate, channels, export, subtype)
+
+def to_float32(frames: np.ndarray) -> np.ndarray:
+    """Convert raw PCM samples to float32 in [-1.0, 1.0); float samples are only cast."""
+    if frames.dtype.kind == 'f':
+        return frames.astype(np.float32, copy=False)
+    if frames.dtype == np.uint8:
+        return (frames.astype(np.float32) - 128) / 128
+    return frames.astype(np.float32) / -np.iinfo(frames.dtype).min
@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import os
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .wav_reader import WAVE_FORMAT_PCM, WavInfo, encode_samples, open_wav_frames, read_wav_info, write_wav_header
+
+class AudioFormat(BaseModel):
+    sample_rate: int = Field(description="The number of frames per second.")
+    channels: int = Field(description="The number of interleaved channels.")
+    bits_per_sample: int = Field(default=16, description="The size of a single PCM sample in bits.")
+
+    def matches(self, info: WavInfo) -> bool:
+        return (
+            info.format_tag == WAVE_FORMAT_PCM
+            and info.sample_rate == self.sample_rate
+            and info.channels == self.channels
+            and info.bits_per_sample == self.bits_per_sample
+        )
+
+def resample(frames: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Resample float (frames, channels) audio by linear interpolation.
+
+    When downsampling, a moving average over one source period of the target rate is
+    applied first (computed with cumulative sums) to suppress aliasing.
+    """
+    if source_rate == target_rate or len(frames) == 0:
+        return frames
+    if target_rate < source_rate:
+        width = int(np.ceil(source_rate / target_rate))
+        padded = np.concatenate((np.zeros((1, frames.shape[1]), dtype=np.float64), frames), axis=0)
+        cumulative = np.cumsum(padded, axis=0)
+        smoothed = np.empty_like(frames)
+        smoothed[width - 1:] = (cumulative[width:] - cumulative[:-width]) / width
+        # The first frames average over the samples available so far
+        head = min(width - 1, len(frames))
+        smoothed[:head] = cumulative[1:head + 1] / np.arange(1, head + 1)[:, None]
+        frames = smoothed
+
+    target_length = int(round(len(frames) * target_rate / source_rate))
+    positions = np.arange(target_length) * (source_rate / target_rate)
+    source_positions = np.arange(len(frames))
+    resampled = np.empty((target_length, frames.shape[1]), dtype=np.float32)
+    for channel in range(frames.shape[1]):
+        resampled[:, channel] = np.interp(positions, source_positions, frames[:, channel])
+    return resampled
+
+def remix(frames: np.ndarray, channels: int) -> np.ndarray:
+    """Convert float (frames, channels) audio to another channel count."""
+    if frames.shape[1] == channels:
+        return frames
+    if frames.shape[1] == 1:
+        return np.repeat(frames, channels, axis=1)
+    mono = frames.mean(axis=1, keepdims=True)
+    return mono if channels == 1 else np.repeat(mono, channels, axis=1)
+
+class AudioNormalizer:
+    """Brings a set of WAV clips to one shared format before they are stitched.
+
+    Clip headers are scanned once to pick the target format: the sample rate that covers
+    the most audio, the largest channel count and 16-bit PCM, unless a target is given.
+    Only clips that differ from it are remixed and resampled, and the results are cached
+    on disk keyed by a hash of the clip's content and the target format, so a clip that
+    is synthesized again with the same audio reuses its entry. Once the cache grows
+    beyond `max_size_bytes` the least recently used entries are removed.
+    """
+
+    def __init__(
+        self,
+        cache_directory: str = 'output/cache/normalized',
+        target_format: AudioFormat | None = None,
+        max_size_bytes: int = 1024 ** 3
+    ):
+        self._cache_directory = Path(cache_directory)
+        self._target_format = target_format
+        self._max_size_bytes = max_size_bytes
+
+    def choose_target_format(self, infos: list[WavInfo]) -> AudioFormat:
+        if self._target_format is not None:
+            return self._target_format
+        frames_per_rate: Counter[int] = Counter()
+        for info in infos:
+            frames_per_rate[info.sample_rate] += info.frame_count
+        return AudioFormat(
+            sample_rate=frames_per_rate.most_common(1)[0][0],
+            channels=max(info.channels for info in infos)
+        )
+
+    def normalize(self, clip_paths: list[str]) -> dict[str, str]:
+        """Return the path of a clip in the target format for each of clip_paths."""
+        infos = {clip_path: read_wav_info(clip_path) for clip_path in clip_paths}
+        target = self.choose_target_format(list(infos.values()))
+
+        normalized: dict[str, str] = {}
+        converted = 0
+        for clip_path, info in infos.items():
+            if target.matches(info):
+                normalized[clip_path] = clip_path
+                continue
+            cached_path = self._get_cached_path(clip_path, target)
+            if cached_path.exists():
+                # Mark the entry as recently used
+                os.utime(cached_path)
+            else:
+                self._convert(clip_path, info, target, cached_path)
+                converted += 1
+            normalized[clip_path] = str(cached_path)
+
+        if converted:
+            logging.info(
+                f"Normalized {converted} clips to {target.sample_rate} Hz, "
+                f"{target.channels} channels, {target.bits_per_sample}-bit PCM"
+            )
+            self.prune(keep=set(normalized.values()))
+        return normalized
+
+    def prune(self, keep: set[str] = frozenset()) -> int:
+        """Remove the least recently used entries other than keep until the cache fits its size limit."""
+        if not self._cache_directory.exists():
+            return 0
+        entries = []
+        for path in self._cache_directory.glob('*/*.wav'):
+            stat = path.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self._max_size_bytes:
+                break
+            if str(path) in keep:
+                continue
+            path.unlink(missing_ok=True)
+            total_size -= size
+            removed += 1
+        if removed:
+            logging.info(f"Removed {removed} normalized clips from the cache")
+        return removed
+
+    def _get_cached_path(self, clip_path: str, target: AudioFormat) -> Path:
+        digest = hashlib.sha256()
+        with open(clip_path, 'rb') as file:
+            while chunk := file.read(1024 ** 2):
+                digest.update(chunk)
+        digest.update(target.model_dump_json().encode('utf-8'))
+        key = digest.hexdigest()
+        return self._cache_directory / key[:2] / f"{key}.wav"
+
+    @staticmethod
+    def _convert(clip_path: str, info: WavInfo, target: AudioFormat, output_path: Path) -> None:
+        frames = np.asarray(open_wav_frames(clip_path, info), dtype=np.float32) * info.scale
+        if info.zero:
+            frames -= info.zero * info.scale
+        frames = resample(remix(frames, target.channels), info.sample_rate, target.sample_rate)
+
+        output_info = WavInfo(
+            format_tag=WAVE_FORMAT_PCM,
+            channels=target.channels,
+            sample_rate=target.sample_rate,
+            bits_per_sample=target.bits_per_sample,
+            data_offset=0,
+            frame_count=len(frames)
+        )
+        samples = encode_samples(frames, output_info)
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = output_path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as outfile:
+            write_wav_header(outfile, output_info)
+            outfile.write(samples.tobytes())
+        os.replace(temp_path, output_path)
@@ -1,13 +1,46 @@
 from abc import ABC, abstractmethod
+import asyncio
+import importlib
 import os
-from pydub import AudioSegment
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import wave
 import logging
-import librosa
+from typing import Iterator
 import numpy as np
-import soundfile as sf
+
+from .clip_manifest import read_clip_manifest
+from .audio_encoder import AudioExport, open_audio_encoder
+from .audio_normalizer import AudioNormalizer
+from .instrumentation import count, span
+from .music_library import GainEnvelope, MusicMix, apply_gain_envelope, get_group_envelopes
+from .timeline import Timeline, TimelineClip, build_timeline, get_timeline_envelopes, iter_timeline_samples
+from .wav_reader import WAVE_FORMAT_IEEE_FLOAT, WavInfo, encode_samples, open_wav_frames, read_wav_bytes, read_wav_info, write_wav_header
+
+# An order group's frame offset in the output, its length, its clips and their gain envelopes
+_ClipGroup = tuple[int, int, list[str], list[GainEnvelope | None]]
+
+# Stitchers whose backends are slow to import live in their own modules and are only
+# imported when they are used
+_LAZY_STITCHERS = {
+    'PydubAudioClipStitcher': 'pydub_audio_stitcher',
+    'LibrosaAudioClipStitcher': 'librosa_audio_stitcher',
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_STITCHERS:
+        module = importlib.import_module(f'.{_LAZY_STITCHERS[name]}', __package__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class AudioClipStitcher(ABC):
+    # Stitchers that can encode while they stitch take an export in their constructor
+    _export = AudioExport()
+
+    def get_output_file_name(self, stem: str) -> str:
+        """Return the name of the podcast file for a name without extension."""
+        return self._export.get_file_name(stem)
+
     @abstractmethod
     async def stitch_audio_clips_async(
         self,
@@ -18,173 +51,538 @@ class AudioClipStitcher(ABC):
         """Stitches audio clips from the input directory into a single audio file."""
         pass
 
-class PydubAudioClipStitcher(AudioClipStitcher):
+class WaveAudioClipStitcher(AudioClipStitcher):
+    def __init__(self, normalizer: AudioNormalizer | None = None, export: AudioExport | None = None):
+        self._normalizer = normalizer
+        self._export = export or AudioExport()
+
     async def stitch_audio_clips_async(
         self,
         input_directory: str,
         output_directory: str,
         output_file_name: str
     ) -> None:
-        # Collect all .wav files in the input directory and group by the order prefix
+        # Collect the clips in the input directory, grouped by their order prefix
+        grouped_files = group_wav_files_by_order(input_directory)
+        clip_paths = get_normalized_clip_paths(input_directory, grouped_files, self._normalizer)
+
+        # Ensure the output directory exists
+        os.makedirs(output_directory, exist_ok=True)
+
+        # Initialize the output file
+        output_path = os.path.join(output_directory, output_file_name)
+
+        # All clips must have the same format as the first one
+        clip_infos = {clip_path: read_wav_info(clip_path) for clip_path in clip_paths.values()}
+        first_info = clip_infos[clip_paths[grouped_files[min(grouped_files.keys())][0]]]
+        for clip_path, info in clip_infos.items():
+            if (info.format_tag, info.channels, info.sample_rate, info.bits_per_sample) != (
+                first_info.format_tag, first_info.channels, first_info.sample_rate, first_info.bits_per_sample
+            ):
+                raise ValueError(f"Format mismatch in file {clip_path}")
+
+        # Write straight from the memory-mapped payloads, without decoded copies
+        clip_frames = (
+            open_wav_frames(clip_paths[wav_file], clip_infos[clip_paths[wav_file]])
+            for order in sorted(grouped_files.keys())
+            for wav_file in grouped_files[order]
+        )
+        with span('stitch.mix', memory=True, stitcher='wave', format=self._export.format):
+            if self._export.format == 'wav':
+                with wave.open(output_path, 'wb') as outfile:
+                    # Set parameters for the output file
+                    outfile.setnchannels(first_info.channels)
+                    outfile.setsampwidth(first_info.bits_per_sample // 8)
+                    outfile.setframerate(first_info.sample_rate)
+                    for frames in clip_frames:
+                        outfile.writeframes(frames)
+            else:
+                with open_audio_encoder(
+                    output_path, first_info.sample_rate, first_info.channels, self._export, _get_soundfile_subtype(first_info)
+                ) as encoder:
+                    for frames in clip_frames:
+                        encoder.write(frames)
+
+        count('stitch.bytes_written', os.path.getsize(output_path))
+        logging.info(f"Stitched audio saved to {output_path}")
+
+def group_wav_files_by_order(input_directory: str) -> dict[int, list[str]]:
+    """Collect the clips in a directory, grouped by their order prefix.
+
+    If the directory has a clip manifest only the clips it lists are used, so stale
+    clips left behind by earlier versions of the transcript are never stitched.
+    """
+    manifest = read_clip_manifest(input_directory)
+    if manifest is not None:
+        wav_files = [entry.filename for entry in manifest.entries]
+    else:
         wav_files = [
             f for f in os.listdir(input_directory)
             if f.endswith('.wav')
         ]
-        if not wav_files:
-            raise FileNotFoundError('No .wav files found in the specified directory.')
+    if not wav_files:
+        raise FileNotFoundError('No .wav files found in the specified directory.')
 
-        # Group files by their order prefix
-        grouped_files = {}
-        for wav_file in wav_files:
-            order = int(wav_file.split('-')[0])
-            if order not in grouped_files:
-                grouped_files[order] = []
-            grouped_files[order].append(wav_file)
+    grouped_files: dict[int, list[str]] = {}
+    for wav_file in sorted(wav_files):
+        order = int(wav_file.split('-')[0])
+        grouped_files.setdefault(order, []).append(wav_file)
+    return grouped_files
 
-        # Initialize the final audio segment
-        final_audio = AudioSegment.empty()
+def get_normalized_clip_paths(
+    input_directory: str,
+    grouped_files: dict[int, list[str]],
+    normalizer: AudioNormalizer | None
+) -> dict[str, str]:
+    """Map each clip file name to the path of the clip to stitch, normalized if a normalizer is given."""
+    clip_paths = {
+        wav_file: os.path.join(input_directory, wav_file)
+        for wav_files in grouped_files.values()
+        for wav_file in wav_files
+    }
+    if normalizer is None:
+        return clip_paths
+    normalized = normalizer.normalize(list(clip_paths.values()))
+    return {wav_file: normalized[clip_path] for wav_file, clip_path in clip_paths.items()}
 
-        # Process each group in order
-        for order in sorted(grouped_files.keys()):
-            combined_segment = AudioSegment.empty()
-            for wav_file in grouped_files[order]:
-                audio_path = os.path.join(input_directory, wav_file)
-                audio_segment = AudioSegment.from_wav(audio_path)
-                combined_segment = combined_segment.overlay(audio_segment)
-            final_audio += combined_segment
+class StreamingAudioClipStitcher(AudioClipStitcher):
+    """Stitches clips without holding the episode in memory.
 
-        # Ensure the output directory exists
-        os.makedirs(output_directory, exist_ok=True)
+    A header-only pass computes the length of every order group and its offset in the
+    output. Each group is then mixed `block_frames` frames at a time and streamed straight
+    into the output file, so peak memory is bounded by one block per clip of the largest
+    overlapping group rather than by the length of the episode. Clip payloads are read
+    through memory maps, and groups with a single clip are written without being decoded.
+    Clip files in mixed formats are brought to one format by the optional normalizer;
+    in-memory clips are expected to share a format already. Music theme clips are faded
+    and ducked under the speech of their order group as configured by `music_mix`.
+    Blocks are encoded into the format of `export` as they are mixed, so compressed
+    podcasts are written in a single pass.
+    """
 
-        # Export the final stitched audio file
-        output_path = os.path.join(output_directory, output_file_name)
-        final_audio.export(output_path, format='wav')
+    def __init__(
+        self,
+        block_frames: int = 65536,
+        normalizer: AudioNormalizer | None = None,
+        music_mix: MusicMix | None = None,
+        export: AudioExport | None = None
+    ):
+        self._block_frames = block_frames
+        self._normalizer = normalizer
+        self._music_mix = music_mix or MusicMix()
+        self._export = export or AudioExport()
 
-class WaveAudioClipStitcher(AudioClipStitcher):
     async def stitch_audio_clips_async(
         self,
         input_directory: str,
         output_directory: str,
         output_file_name: str
     ) -> None:
-        # Collect all .wav files in the input directory and group by the order prefix
-        wav_files = [
-            f for f in os.listdir(input_directory)
-            if f.endswith('.wav')
-        ]
-        if not wav_files:
-            raise FileNotFoundError('No .wav files found in the specified directory.')
+        grouped_files = group_wav_files_by_order(input_directory)
+        clip_paths = await asyncio.to_thread(get_normalized_clip_paths, input_directory, grouped_files, self._normalizer)
 
-        # Group files by their order prefix
-        grouped_files = {}
-        for wav_file in wav_files:
-            order = int(wav_file.split('-')[0])
-            if order not in grouped_files:
-                grouped_files[order] = []
-            grouped_files[order].append(wav_file)
+        # Header-only pass: formats and memory maps of every clip
+        grouped_clips: dict[int, list[tuple[str, WavInfo, np.ndarray]]] = {}
+        for order, wav_files in grouped_files.items():
+            grouped_clips[order] = []
+            for wav_file in wav_files:
+                clip_path = clip_paths[wav_file]
+                info = read_wav_info(clip_path)
+                grouped_clips[order].append((wav_file, info, open_wav_frames(clip_path, info)))
 
-        # Ensure the output directory exists
-        os.makedirs(output_directory, exist_ok=True)
+        await asyncio.to_thread(self._stitch, grouped_clips, output_directory, output_file_name)
 
-        # Initialize the output file
-        output_path = os.path.join(output_directory, output_file_name)
+    async def stitch_audio_buffers_async(
+        self,
+        clips: dict[str, bytes],
+        output_directory: str,
+        output_file_name: str
+    ) -> None:
+        """Stitches in-memory WAV clips, keyed by their {order}-{speaker}.wav names."""
+        if not clips:
+            raise ValueError('No clips to stitch.')
+
+        grouped_clips: dict[int, list[tuple[str, WavInfo, np.ndarray]]] = {}
+        for clip_name in sorted(clips.keys()):
+            order = int(clip_name.split('-')[0])
+            grouped_clips.setdefault(order, []).append((clip_name, *read_wav_bytes(clips[clip_name])))
+
+        await asyncio.to_thread(self._stitch, grouped_clips, output_directory, output_file_name)
+
+    def _stitch(
+        self,
+        grouped_clips: dict[int, list[tuple[str, WavInfo, np.ndarray]]],
+        output_directory: str,
+        output_file_name: str
+    ) -> None:
+        output_info = None
+        channels = 0
+        group_frames: dict[int, int] = {}
+        for order in sorted(grouped_clips.keys()):
+            group_frames[order] = 0
+            for _, info, _ in grouped_clips[order]:
+                if output_info is None:
+                    output_info = info
+                elif info.sample_rate != output_info.sample_rate:
+                    raise ValueError(f"Sample rate mismatch in a clip of order {order}")
+                channels = max(channels, info.channels)
+                group_frames[order] = max(group_frames[order], info.frame_count)
+
+        total_frames = sum(group_frames.values())
+        sample_rate = output_info.sample_rate
+        logging.info(
+            f"Stitching {len(group_frames)} groups, {total_frames} frames "
+            f"({total_frames / sample_rate:.1f}s) at {sample_rate} Hz"
+        )
 
-        # Assume all clips have the same format as the first one
-        sorted_clips = [os.path.join(input_directory, wav_files[0])]
-        with wave.open(sorted_clips[0], 'rb') as first_clip:
-            params = first_clip.getparams()
+        os.makedirs(output_directory, exist_ok=True)
+        output_path = os.path.join(output_directory, output_file_name)
+        mix_info = output_info.model_copy(update={'channels': channels, 'frame_count': total_frames})
 
-        with wave.open(output_path, 'wb') as outfile:
-            # Set parameters for the output file
-            outfile.setparams(params)
+        with span('stitch.mix', memory=True, stitcher='streaming', frames=total_frames, format=self._export.format), open_audio_encoder(
+            output_path, sample_rate, channels, self._export, _get_soundfile_subtype(output_info)
+        ) as outfile:
+            block = np.empty((self._block_frames, channels), dtype=np.float32)
+            scratch = np.empty((self._block_frames, channels), dtype=np.float32)
+            for order in sorted(grouped_clips.keys()):
+                clips = grouped_clips[order]
+                envelopes = get_group_envelopes(
+                    [name for name, _, _ in clips], [info for _, info, _ in clips], self._music_mix
+                )
+                if len(clips) == 1 and envelopes[0] is None and _can_write_directly(clips[0][1], output_info, channels):
+                    outfile.write(clips[0][2])
+                    continue
 
-            for order in sorted(grouped_files.keys()):
-                for wav_file in grouped_files[order]:
-                    clip_path = os.path.join(input_directory, wav_file)
-                    with wave.open(clip_path, 'rb') as clip:
-                        outfile.writeframes(clip.readframes(clip.getnframes()))
+                for start in range(0, group_frames[order], self._block_frames):
+                    frames = min(self._block_frames, group_frames[order] - start)
+                    mixed = block[:frames]
+                    mixed.fill(0)
+                    for (_, info, clip_frames), envelope in zip(clips, envelopes):
+                        view = clip_frames[start:start + frames]
+                        if len(view) == 0:
+                            continue
+                        decoded = scratch[:len(view), :info.channels]
+                        np.multiply(view, info.scale, out=decoded, casting='unsafe')
+                        if info.zero:
+                            decoded -= info.zero * info.scale
+                        if envelope is not None:
+                            apply_gain_envelope(decoded, start, envelope)
+                        # Mono clips are broadcast across all output channels
+                        mixed[:len(view)] += decoded
+                    # Encode like the other stitchers, clipping overlapping clips that add up past full scale
+                    outfile.write(encode_samples(mixed, mix_info))
 
+        count('stitch.bytes_written', os.path.getsize(output_path))
         logging.info(f"Stitched audio saved to {output_path}")
 
-class LibrosaAudioClipStitcher(AudioClipStitcher):
+class TimelineAudioClipStitcher(AudioClipStitcher):
+    """Stitches clips at their places on a timeline, honouring the offsets of their items.
+
+    The offsets come from the clip manifest of a directory; clips without one start with
+    their order group. Only the spans where clips overlap are mixed, so the work grows
+    with the length of the episode rather than with the number of groups times their
+    longest clip, and the samples are encoded into the format of `export` as they are
+    mixed. Clip files in mixed formats are brought to one format by the optional
+    normalizer, and music theme clips are faded and ducked as configured by `music_mix`.
+    """
+
+    def __init__(
+        self,
+        block_frames: int = 65536,
+        normalizer: AudioNormalizer | None = None,
+        music_mix: MusicMix | None = None,
+        export: AudioExport | None = None
+    ):
+        self._block_frames = block_frames
+        self._normalizer = normalizer
+        self._music_mix = music_mix or MusicMix()
+        self._export = export or AudioExport()
+
     async def stitch_audio_clips_async(
         self,
         input_directory: str,
         output_directory: str,
         output_file_name: str
     ) -> None:
-        # Collect all .wav files in the input directory and group by the order prefix
-        wav_files = [
-            f for f in os.listdir(input_directory)
-            if f.endswith('.wav')
+        grouped_files = group_wav_files_by_order(input_directory)
+        clip_paths = await asyncio.to_thread(get_normalized_clip_paths, input_directory, grouped_files, self._normalizer)
+        manifest = read_clip_manifest(input_directory)
+        offsets = {entry.filename: entry.offset for entry in manifest.entries} if manifest is not None else {}
+        clips: list[TimelineClip] = [
+            (order, offsets.get(wav_file, 0.0), wav_file, clip_paths[wav_file])
+            for order, wav_files in grouped_files.items()
+            for wav_file in wav_files
         ]
-        if not wav_files:
-            raise FileNotFoundError('No .wav files found in the specified directory.')
+        timeline = await asyncio.to_thread(build_timeline, clips)
+        await self.stitch_timeline_async(timeline, output_directory, output_file_name)
 
-        # Group files by their order prefix
-        grouped_files = {}
-        for wav_file in wav_files:
-            order = int(wav_file.split('-')[0])
-            if order not in grouped_files:
-                grouped_files[order] = []
-            grouped_files[order].append(wav_file)
+    async def stitch_timeline_async(self, timeline: Timeline, output_directory: str, output_file_name: str) -> None:
+        """Stitches the clips of a timeline, e.g. one built from a transcript with build_transcript_timeline."""
+        await asyncio.to_thread(self._stitch, timeline, output_directory, output_file_name)
+
+    def _stitch(self, timeline: Timeline, output_directory: str, output_file_name: str) -> None:
+        output_info = timeline.placements[0].info.model_copy(
+            update={'channels': timeline.channels, 'frame_count': timeline.frame_count}
+        )
+        envelopes = get_timeline_envelopes(timeline, self._music_mix)
+        logging.info(
+            f"Stitching {len(timeline.placements)} clips, {timeline.frame_count} frames "
+            f"({timeline.frame_count / timeline.sample_rate:.1f}s) at {timeline.sample_rate} Hz"
+        )
 
-        # Ensure the output directory exists
         os.makedirs(output_directory, exist_ok=True)
+        output_path = os.path.join(output_directory, output_file_name)
+        with span(
+            'stitch.mix', memory=True, stitcher='timeline', frames=timeline.frame_count, format=self._export.format
+        ), open_audio_encoder(
+            output_path, timeline.sample_rate, timeline.channels, self._export, _get_soundfile_subtype(output_info)
+        ) as encoder:
+            for samples in iter_timeline_samples(timeline, output_info, envelopes, self._block_frames):
+                encoder.write(samples)
+
+        count('stitch.bytes_written', os.path.getsize(output_path))
+        logging.info(f"Stitched audio saved to {output_path}")
+
+class ParallelAudioClipStitcher(AudioClipStitcher):
+    """Stitches clips by mixing batches of order groups in parallel worker processes.
+
+    A header-only pass computes every group's offset in the output, which is then
+    pre-sized. Consecutive groups are split into batches of similar length, and each
+    worker mixes its batch from memory-mapped clips and writes it straight to its offset
+    in the output file, so the groups end up in order without being sent back to the
+    event loop process. One pool is shared by every stitch, so several episodes can be
+    stitched concurrently on all cores. Clips in mixed formats are brought to one format
+    by the optional normalizer first, and music theme clips are faded and ducked as
+    configured by `music_mix`. When `export` is a format other than WAV, the workers send
+    their mixed batches back instead, and each is encoded as soon as the batches before
+    it have been; only about `max_workers` batches are mixed ahead of the encoder.
+    """
 
-        # Initialize variables for final audio and sample rate
-        final_audio = None
-        sample_rate = None
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        block_frames: int = 65536,
+        batches_per_worker: int = 4,
+        normalizer: AudioNormalizer | None = None,
+        music_mix: MusicMix | None = None,
+        export: AudioExport | None = None
+    ):
+        self._normalizer = normalizer
+        self._music_mix = music_mix or MusicMix()
+        self._export = export or AudioExport()
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._block_frames = block_frames
+        self._batches_per_worker = batches_per_worker
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def stitch_audio_clips_async(
+        self,
+        input_directory: str,
+        output_directory: str,
+        output_file_name: str
+    ) -> None:
+        grouped_files = group_wav_files_by_order(input_directory)
+        normalized_paths = await asyncio.to_thread(
+            get_normalized_clip_paths, input_directory, grouped_files, self._normalizer
+        )
 
-        # Process each group in order
+        # Header-only pass: output format, group lengths and offsets
+        groups: list[_ClipGroup] = []
+        output_info = None
+        channels = 0
+        offset = 0
         for order in sorted(grouped_files.keys()):
-            combined_audio = None
-            for wav_file in grouped_files[order]:
-                audio_path = os.path.join(input_directory, wav_file)
-                audio_data, sr = librosa.load(audio_path, sr=None, mono=False)
-                if sample_rate is None:
-                    sample_rate = sr
-                elif sr != sample_rate:
-                    raise ValueError(f"Sample rate mismatch in file {wav_file}")
-
-                if combined_audio is None:
-                    combined_audio = audio_data
-                else:
-                    # Pad the shorter array with zeros
-                    max_length = max(combined_audio.shape[-1], audio_data.shape[-1])
-                    if audio_data.ndim == 1:
-                        # Mono audio
-                        padded_combined = np.pad(
-                            combined_audio,
-                            (0, max_length - combined_audio.shape[0]),
-                            mode='constant'
-                        )
-                        padded_audio_data = np.pad(
-                            audio_data,
-                            (0, max_length - audio_data.shape[0]),
-                            mode='constant'
-                        )
-                    else:
-                        # Stereo audio
-                        padded_combined = np.pad(
-                            combined_audio,
-                            ((0, 0), (0, max_length - combined_audio.shape[1])),
-                            mode='constant'
-                        )
-                        padded_audio_data = np.pad(
-                            audio_data,
-                            ((0, 0), (0, max_length - audio_data.shape[1])),
-                            mode='constant'
-                        )
-                    # Mix the audio clips together (overlay)
-                    combined_audio = padded_combined + padded_audio_data
-
-            if final_audio is None:
-                final_audio = combined_audio
-            else:
-                # Concatenate the combined segment
-                final_audio = np.concatenate((final_audio, combined_audio), axis=-1)
+            clip_paths = [normalized_paths[wav_file] for wav_file in grouped_files[order]]
+            clip_infos = [read_wav_info(clip_path) for clip_path in clip_paths]
+            group_frames = 0
+            for clip_path, info in zip(clip_paths, clip_infos):
+                if output_info is None:
+                    output_info = info
+                elif info.sample_rate != output_info.sample_rate:
+                    raise ValueError(f"Sample rate mismatch in file {clip_path}")
+                channels = max(channels, info.channels)
+                group_frames = max(group_frames, info.frame_count)
+            envelopes = get_group_envelopes(grouped_files[order], clip_infos, self._music_mix)
+            groups.append((offset, group_frames, clip_paths, envelopes))
+            offset += group_frames
 
-        # Export the final stitched audio file
+        output_info = output_info.model_copy(update={'channels': channels, 'frame_count': offset})
+        os.makedirs(output_directory, exist_ok=True)
         output_path = os.path.join(output_directory, output_file_name)
-        sf.write(output_path, final_audio, sample_rate)
+        batches = self._batch_groups(groups)
+        # The mixing happens in the workers, so no memory is traced here
+        with span('stitch.mix', stitcher='parallel', frames=output_info.frame_count, batches=len(batches), format=self._export.format):
+            if self._export.format == 'wav':
+                await self._mix_into_file_async(output_path, output_info, batches)
+            else:
+                await self._mix_into_encoder_async(output_path, output_info, batches)
+
+        count('stitch.bytes_written', os.path.getsize(output_path))
+        logging.info(f"Stitched audio saved to {output_path}")
+
+    async def _mix_into_file_async(self, output_path: str, output_info: WavInfo, batches: list[list[_ClipGroup]]) -> None:
+        with open(output_path, 'wb') as outfile:
+            data_offset = write_wav_header(outfile, output_info)
+            outfile.truncate(data_offset + output_info.frame_count * output_info.block_align)
+        output_info = output_info.model_copy(update={'data_offset': data_offset})
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(
+            loop.run_in_executor(
+                executor,
+                _mix_groups_into_file,
+                output_path,
+                output_info.model_dump(),
+                batch,
+                self._block_frames
+            )
+            for batch in batches
+        ))
+
+    async def _mix_into_encoder_async(self, output_path: str, output_info: WavInfo, batches: list[list[_ClipGroup]]) -> None:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        pending = iter(batches)
+        # At most one mixed batch per worker waits to be encoded, so memory stays bounded
+        mixes: deque[asyncio.Future] = deque()
+
+        def submit_next() -> None:
+            batch = next(pending, None)
+            if batch is not None:
+                mixes.append(loop.run_in_executor(executor, _mix_groups, output_info.model_dump(), batch, self._block_frames))
+
+        try:
+            for _ in range(self._max_workers):
+                submit_next()
+            with open_audio_encoder(
+                output_path, output_info.sample_rate, output_info.channels, self._export, _get_soundfile_subtype(output_info)
+            ) as encoder:
+                while mixes:
+                    frames = await mixes.popleft()
+                    submit_next()
+                    await asyncio.to_thread(encoder.write, frames)
+        finally:
+            for mix in mixes:
+                mix.cancel()
+
+    def shutdown(self) -> None:
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+    def _batch_groups(self, groups: list[_ClipGroup]) -> list[list[_ClipGroup]]:
+        """Split consecutive groups into batches of roughly equal length."""
+        total_frames = sum(group[1] for group in groups)
+        target_frames = max(1, total_frames // (self._max_workers * self._batches_per_worker))
+        batches: list[list[_ClipGroup]] = [[]]
+        batch_frames = 0
+        for group in groups:
+            if batches[-1] and batch_frames >= target_frames:
+                batches.append([])
+                batch_frames = 0
+            batches[-1].append(group)
+            batch_frames += group[1]
+        return batches
+
+async def stitch_clip_directories_async(
+    audio_stitcher: AudioClipStitcher,
+    clip_directories: list[str],
+    output_directory: str,
+    max_concurrency: int = 4
+) -> list[str]:
+    """Stitch many clip directories concurrently into {directory name}_podcast files."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def stitch_async(clip_directory: str) -> str:
+        output_file_name = audio_stitcher.get_output_file_name(f"{os.path.basename(os.path.normpath(clip_directory))}_podcast")
+        async with semaphore:
+            await audio_stitcher.stitch_audio_clips_async(clip_directory, output_directory, output_file_name)
+        return os.path.join(output_directory, output_file_name)
+
+    return list(await asyncio.gather(*(stitch_async(clip_directory) for clip_directory in clip_directories)))
+
+def _mix_groups_into_file(
+    output_path: str,
+    output_info_data: dict,
+    groups: list[_ClipGroup],
+    block_frames: int
+) -> None:
+    """Mix groups of clips and write each at its frame offset in a pre-sized WAV file."""
+    output_info = WavInfo(**output_info_data)
+    with open(output_path, 'r+b') as outfile:
+        for offset, samples in _iter_mixed_groups(output_info, groups, block_frames):
+            if offset is not None:
+                outfile.seek(output_info.data_offset + offset * output_info.block_align)
+            outfile.write(samples)
+
+def _mix_groups(output_info_data: dict, groups: list[_ClipGroup], block_frames: int) -> np.ndarray:
+    """Mix consecutive groups of clips into one (frames, channels) array of raw samples."""
+    output_info = WavInfo(**output_info_data)
+    return np.concatenate([samples for _, samples in _iter_mixed_groups(output_info, groups, block_frames)])
+
+def _iter_mixed_groups(
+    output_info: WavInfo,
+    groups: list[_ClipGroup],
+    block_frames: int
+) -> Iterator[tuple[int | None, np.ndarray]]:
+    """Mix groups of clips block by block into raw samples of the output format.
+
+    Yields each block with the frame offset of its group if it is the group's first
+    block, or None if it directly follows the previous block.
+    """
+    output_dtype = output_info.dtype
+    block = np.empty((block_frames, output_info.channels), dtype=np.float32)
+    scratch = np.empty((block_frames, output_info.channels), dtype=np.float32)
+
+    for offset, group_frames, clip_paths, envelopes in groups:
+        clips = []
+        for clip_path in clip_paths:
+            info = read_wav_info(clip_path)
+            clips.append((info, open_wav_frames(clip_path, info)))
+
+        if (
+            len(clips) == 1
+            and envelopes[0] is None
+            and clips[0][0].channels == output_info.channels
+            and clips[0][0].dtype == output_dtype
+        ):
+            yield offset, clips[0][1]
+            continue
+
+        for start in range(0, group_frames, block_frames):
+            frames = min(block_frames, group_frames - start)
+            mixed = block[:frames]
+            mixed.fill(0)
+            for (info, clip_frames), envelope in zip(clips, envelopes):
+                view = clip_frames[start:start + frames]
+                if len(view) == 0:
+                    continue
+                decoded = scratch[:len(view), :info.channels]
+                np.multiply(view, info.scale, out=decoded, casting='unsafe')
+                if info.zero:
+                    decoded -= info.zero * info.scale
+                if envelope is not None:
+                    apply_gain_envelope(decoded, start, envelope)
+                mixed[:len(view)] += decoded
+            yield (offset if start == 0 else None), encode_samples(mixed, output_info)
+
+def _get_soundfile_subtype(info: WavInfo) -> str:
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        return 'FLOAT' if info.bits_per_sample == 32 else 'DOUBLE'
+    return {8: 'PCM_U8', 16: 'PCM_16', 32: 'PCM_32'}[info.bits_per_sample]
+
+def _can_write_directly(info: WavInfo, output_info: WavInfo, channels: int) -> bool:
+    """Whether soundfile can write a clip's raw samples to the output without conversion."""
+    return (
+        info.channels == channels
+        and info.format_tag == output_info.format_tag
+        and info.bits_per_sample == output_info.bits_per_sample
+        and info.bits_per_sample != 8
+    )
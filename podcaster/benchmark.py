@@ -0,0 +1,380 @@
+"""Offline benchmarks for the audio and generation pipeline.
+
+Run with `python -m podcaster.benchmark --output benchmark.json`. Stitchers are run
+against synthetic clip directories; synthesis and generation are run against fake
+clients that simulate API latency, so no API key or network access is needed. The
+startup benchmarks time each command of main.py in a fresh interpreter on trivial inputs,
+which is dominated by the modules the command imports.
+"""
+import argparse
+import asyncio
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from podcaster.models import Source, Transcript
+from .audio_encoder import AudioExport
+from .audio_stitcher import (
+    AudioClipStitcher,
+    ParallelAudioClipStitcher,
+    StreamingAudioClipStitcher,
+    TimelineAudioClipStitcher,
+    WaveAudioClipStitcher,
+)
+from .fakes import FakeLLMClient, FakeTTSClient
+from .prompt_renderer import JinjaPromptRenderer
+from .source_repository import TextFileSourceRepository
+from .speech_to_audio_converter import DefaultSpeechToAudioConverter
+from .transcript_generator import LLMTranscriptGenerator
+from .transcript_to_audio_converter import DefaultTranscriptToAudioConverter
+
+class BenchmarkResult(BaseModel):
+    name: str = Field(description="The name of the benchmark.")
+    seconds: list[float] = Field(description="The wall time of each repetition.")
+    peak_memory_bytes: int = Field(description="The largest peak of traced Python and NumPy allocations of any repetition.")
+    metrics: dict[str, float] = Field(default_factory=dict, description="Benchmark-specific measurements.")
+
+    @property
+    def best_seconds(self) -> float:
+        return min(self.seconds)
+
+class BenchmarkReport(BaseModel):
+    created: str = Field(description="When the benchmarks were run, in ISO 8601.")
+    python: str = Field(description="The Python version the benchmarks were run with.")
+    platform: str = Field(description="The platform the benchmarks were run on.")
+    cpu_count: int = Field(description="The number of cores.")
+    parameters: dict[str, Any] = Field(description="The parameters the benchmarks were run with.")
+    results: list[BenchmarkResult] = Field(description="The results, one per benchmark.")
+
+def generate_clip_directory(
+    directory: str,
+    clip_count: int = 200,
+    clip_seconds: float = 6.0,
+    sample_rate: int = 24000,
+    channels: int = 1,
+    overlap: float = 0.1,
+    seed: int = 0
+) -> float:
+    """Write synthetic {order}-{speaker}.wav clips and return the length of the stitched episode in seconds.
+
+    Clip lengths vary by up to half of `clip_seconds` either way, and each clip shares the
+    order of the previous one with probability `overlap`.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    order = -1
+    group_seconds: dict[int, float] = {}
+    for index in range(clip_count):
+        if order < 0 or rng.random() >= overlap:
+            order += 1
+        seconds = clip_seconds * rng.uniform(0.5, 1.5)
+        frame_count = int(seconds * sample_rate)
+        samples = 0.2 * np.sin(2 * np.pi * rng.uniform(100, 400) * np.arange(frame_count) / sample_rate)
+        frames = np.repeat(samples[:, None], channels, axis=1)
+        with wave.open(os.path.join(directory, f"{order}-speaker{index}.wav"), 'wb') as outfile:
+            outfile.setnchannels(channels)
+            outfile.setsampwidth(2)
+            outfile.setframerate(sample_rate)
+            outfile.writeframes((frames * 32767).astype('<i2').tobytes())
+        group_seconds[order] = max(group_seconds.get(order, 0.0), frame_count / sample_rate)
+    return sum(group_seconds.values())
+
+async def measure_async(
+    name: str,
+    run: Callable[[], Awaitable[dict[str, float] | None]],
+    repeats: int = 3
+) -> BenchmarkResult:
+    """Run a benchmark `repeats` times, timing it and tracing its peak memory.
+
+    Memory of worker processes and of memory-mapped files is not traced.
+    """
+    seconds = []
+    peak_memory = 0
+    metrics: dict[str, float] = {}
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        metrics = await run() or {}
+        seconds.append(time.perf_counter() - start)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return BenchmarkResult(name=name, seconds=seconds, peak_memory_bytes=peak_memory, metrics=metrics)
+
+async def benchmark_stitchers_async(
+    stitchers: dict[str, AudioClipStitcher],
+    clip_directory: str,
+    output_directory: str,
+    audio_seconds: float,
+    repeats: int = 3
+) -> list[BenchmarkResult]:
+    results = []
+    for name, stitcher in stitchers.items():
+        output_file_name = stitcher.get_output_file_name(name)
+
+        async def run() -> None:
+            await stitcher.stitch_audio_clips_async(clip_directory, output_directory, output_file_name)
+
+        result = await measure_async(f"stitch/{name}", run, repeats)
+        result.metrics['audio_seconds'] = audio_seconds
+        result.metrics['realtime_factor'] = audio_seconds / result.best_seconds
+        result.metrics['output_bytes'] = os.path.getsize(os.path.join(output_directory, output_file_name))
+        results.append(result)
+        if isinstance(stitcher, ParallelAudioClipStitcher):
+            stitcher.shutdown()
+    return results
+
+async def benchmark_synthesis_async(
+    transcript: Transcript,
+    output_directory: str,
+    tts_latency: float,
+    max_concurrency: int,
+    max_chunk_chars: int,
+    repeats: int = 3
+) -> BenchmarkResult:
+    async def run() -> dict[str, float]:
+        tts_client = FakeTTSClient(latency=tts_latency, jitter=tts_latency / 2)
+        converter = DefaultTranscriptToAudioConverter(
+            DefaultSpeechToAudioConverter(tts_client, max_chunk_chars=max_chunk_chars),
+            max_concurrency=max_concurrency,
+            output_directory=output_directory
+        )
+        await converter.convert_transcript_to_audio_async(transcript)
+        return {'items': len(transcript.items), 'tts_requests': tts_client.requests}
+
+    return await measure_async('synthesize/default', run, repeats)
+
+async def benchmark_generation_async(
+    llm_latency: float,
+    item_count: int,
+    repeats: int = 3
+) -> list[BenchmarkResult]:
+    sources = [Source(text='A synthetic source for the benchmark.')]
+    outline = Source(text='Benchmark episode\n\nIntroduction\n\nDiscussion\n\nWrap up')
+    prompt_renderer = JinjaPromptRenderer(template_folder='prompts', cache_directory=None)
+
+    async def generate() -> dict[str, float]:
+        generator = LLMTranscriptGenerator(FakeLLMClient(latency=llm_latency, item_count=item_count), prompt_renderer)
+        transcript = await generator.generate_transcript_async(['Jane Doe', 'John Smith'], sources, outline)
+        return {'items': len(transcript.items)}
+
+    async def stream() -> dict[str, float]:
+        generator = LLMTranscriptGenerator(
+            FakeLLMClient(latency=llm_latency, item_count=item_count, chunk_latency=0.001),
+            prompt_renderer
+        )
+        start = time.perf_counter()
+        first_item_seconds = None
+        items = 0
+        async for _ in generator.stream_transcript_items_async(['Jane Doe', 'John Smith'], sources, outline):
+            if first_item_seconds is None:
+                first_item_seconds = time.perf_counter() - start
+            items += 1
+        return {'items': items, 'first_item_seconds': first_item_seconds or 0.0}
+
+    return [
+        await measure_async('generate/default', generate, repeats),
+        await measure_async('generate/streamed', stream, repeats),
+    ]
+
+async def benchmark_prompt_rendering_async(
+    work_directory: str,
+    outline_count: int = 20,
+    source_count: int = 40,
+    repeats: int = 3
+) -> BenchmarkResult:
+    """Render the transcript prompts of many outlines that share one memory-mapped corpus."""
+    source_directory = os.path.join(work_directory, 'sources')
+    os.makedirs(source_directory, exist_ok=True)
+    rng = random.Random(0)
+    words = FakeLLMClient().get_sentence().lower().rstrip('.').split()
+    for index in range(source_count):
+        with open(os.path.join(source_directory, f'{index}.txt'), 'w', encoding='utf-8') as file:
+            file.write(' '.join(rng.choice(words) for _ in range(20_000)))
+    sources = await TextFileSourceRepository([source_directory], lazy=True).load_sources_async()
+    outlines = [Source(text=f'Episode {index}\n\nIntroduction\n\nDiscussion') for index in range(outline_count)]
+
+    async def render() -> dict[str, float]:
+        prompt_renderer = JinjaPromptRenderer(template_folder='prompts', cache_directory=os.path.join(work_directory, 'jinja'))
+        prompts = [
+            prompt_renderer.render_prompt(
+                'generate_transcript.jinja', {'hosts': ['Jane Doe', 'John Smith'], 'sources': sources, 'outline': outline.text}
+            )
+            for outline in outlines
+        ]
+        encoded = [prompt.encode('utf-8') for prompt in prompts]
+        return {
+            'prompts': len(prompts),
+            'prompt_bytes': len(encoded[0]),
+            'shared_prefix_bytes': min(_get_common_prefix_bytes(encoded[0], prompt) for prompt in encoded[1:]),
+        }
+
+    return await measure_async('generate/render', render, repeats)
+
+def _get_common_prefix_bytes(first: bytes, second: bytes) -> int:
+    length = min(len(first), len(second))
+    mismatches = np.flatnonzero(np.frombuffer(first, np.uint8, length) != np.frombuffer(second, np.uint8, length))
+    return int(mismatches[0]) if len(mismatches) else length
+
+def measure_command(name: str, command: list[str], cwd: str, repeats: int = 3) -> BenchmarkResult:
+    """Run a command `repeats` times and time it. Its memory is not traced."""
+    env = {**os.environ, 'OPENAI_API_KEY': os.environ.get('OPENAI_API_KEY') or 'benchmark'}
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=env, check=True, capture_output=True)
+        seconds.append(time.perf_counter() - start)
+    return BenchmarkResult(name=name, seconds=seconds, peak_memory_bytes=0)
+
+def benchmark_startup(work_directory: str, stitcher_names: list[str], repeats: int = 3) -> list[BenchmarkResult]:
+    """Time each CLI command on inputs that leave it nothing to do but start up.
+
+    Each result's `import_seconds` is its time beyond starting a bare interpreter.
+    """
+    main_path = str(Path(__file__).resolve().parent.parent / 'main.py')
+    # Commands run in their own directory, so their output/ stays inside it
+    command_directory = os.path.join(work_directory, 'startup')
+    for directory in ('sources', 'outlines', 'output/transcripts'):
+        os.makedirs(os.path.join(command_directory, directory), exist_ok=True)
+    Path(command_directory, 'sources', 'source.txt').write_text('A synthetic source.', encoding='utf-8')
+    generate_clip_directory(os.path.join(command_directory, 'output', 'clips', 'episode'), clip_count=1, clip_seconds=0.1)
+
+    commands = {
+        'list': ['list'],
+        'generate': ['generate', '--sources', 'sources', '--outlines', 'outlines'],
+        'synthesize': ['synthesize'],
+    }
+    commands.update({f"stitch-{name}": ['stitch', '--stitcher', name] for name in stitcher_names})
+
+    baseline = measure_command('startup/python', [sys.executable, '-c', 'pass'], command_directory, repeats)
+    results = [baseline]
+    for name, arguments in commands.items():
+        result = measure_command(f"startup/{name}", [sys.executable, main_path, *arguments], command_directory, repeats)
+        result.metrics['import_seconds'] = result.best_seconds - baseline.best_seconds
+        results.append(result)
+    return results
+
+def get_stitchers(names: list[str], export: AudioExport | None = None) -> dict[str, AudioClipStitcher]:
+    """Create the named stitchers. Only the wave, streaming, parallel and timeline stitchers encode to `export`."""
+    factories: dict[str, Callable[[], AudioClipStitcher]] = {
+        'wave': lambda: WaveAudioClipStitcher(export=export),
+        'streaming': lambda: StreamingAudioClipStitcher(export=export),
+        'parallel': lambda: ParallelAudioClipStitcher(export=export),
+        'timeline': lambda: TimelineAudioClipStitcher(export=export),
+    }
+    # Only import the slow backends when they are benchmarked
+    if 'pydub' in names:
+        from .pydub_audio_stitcher import PydubAudioClipStitcher
+        factories['pydub'] = PydubAudioClipStitcher
+    if 'librosa' in names:
+        from .librosa_audio_stitcher import LibrosaAudioClipStitcher
+        factories['librosa'] = LibrosaAudioClipStitcher
+    unknown = set(names) - set(factories)
+    if unknown:
+        raise ValueError(f"Unknown stitchers: {', '.join(sorted(unknown))}")
+    return {name: factories[name]() for name in names}
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark the podcaster pipeline with synthetic data and fake clients.')
+    parser.add_argument('--output', help='Write the JSON report here instead of to stdout.')
+    parser.add_argument('--work-dir', help='Directory for synthetic clips and outputs. Defaults to a temporary directory.')
+    parser.add_argument('--repeats', type=int, default=3, help='Repetitions of each benchmark.')
+    parser.add_argument(
+        '--stitchers',
+        nargs='+',
+        default=['pydub', 'wave', 'librosa', 'streaming', 'parallel', 'timeline'],
+        help='Stitchers to benchmark.'
+    )
+    parser.add_argument('--clips', type=int, default=200, help='Synthetic clips to stitch.')
+    parser.add_argument('--clip-seconds', type=float, default=6.0, help='Average clip length.')
+    parser.add_argument('--sample-rate', type=int, default=24000, help='Sample rate of the synthetic clips.')
+    parser.add_argument('--channels', type=int, default=1, help='Channels of the synthetic clips.')
+    parser.add_argument('--format', default='wav', choices=['wav', 'flac', 'ogg', 'opus', 'mp3'], help='Format the stitchers export.')
+    parser.add_argument('--bitrate', type=int, help='Bitrate of lossy exports in kbit/s.')
+    parser.add_argument('--overlap', type=float, default=0.1, help='Probability that a clip overlaps the previous one.')
+    parser.add_argument('--items', type=int, default=40, help='Items in each fake transcript.')
+    parser.add_argument('--tts-latency', type=float, default=0.2, help='Simulated latency of a TTS request.')
+    parser.add_argument('--llm-latency', type=float, default=1.0, help='Simulated latency of an LLM request.')
+    parser.add_argument('--max-tts-requests', type=int, default=8, help='TTS requests in flight.')
+    parser.add_argument('--max-chunk-chars', type=int, default=1000, help='Longest text sent in one TTS request.')
+    parser.add_argument('--skip', nargs='*', default=[], choices=['stitch', 'synthesize', 'generate', 'startup'], help='Benchmarks to skip.')
+    return parser.parse_args()
+
+async def run_benchmarks_async(args: argparse.Namespace, work_directory: str) -> BenchmarkReport:
+    results: list[BenchmarkResult] = []
+
+    if 'stitch' not in args.skip:
+        clip_directory = os.path.join(work_directory, 'clips')
+        audio_seconds = generate_clip_directory(
+            clip_directory,
+            clip_count=args.clips,
+            clip_seconds=args.clip_seconds,
+            sample_rate=args.sample_rate,
+            channels=args.channels,
+            overlap=args.overlap
+        )
+        results.extend(await benchmark_stitchers_async(
+            get_stitchers(args.stitchers, AudioExport(format=args.format, bitrate=args.bitrate)),
+            clip_directory,
+            os.path.join(work_directory, 'podcasts'),
+            audio_seconds,
+            args.repeats
+        ))
+
+    if 'synthesize' not in args.skip:
+        transcript = await FakeLLMClient(latency=0, item_count=args.items).generate_model_async('', Transcript)
+        results.append(await benchmark_synthesis_async(
+            transcript,
+            os.path.join(work_directory, 'synthesized'),
+            args.tts_latency,
+            args.max_tts_requests,
+            args.max_chunk_chars,
+            args.repeats
+        ))
+
+    if 'generate' not in args.skip:
+        results.extend(await benchmark_generation_async(args.llm_latency, args.items, args.repeats))
+        results.append(await benchmark_prompt_rendering_async(work_directory, repeats=args.repeats))
+
+    if 'startup' not in args.skip:
+        results.extend(benchmark_startup(work_directory, args.stitchers, args.repeats))
+
+    parameters = {key: value for key, value in vars(args).items() if key not in ('output', 'work_dir')}
+    return BenchmarkReport(
+        created=datetime.now(timezone.utc).isoformat(),
+        python=sys.version.split()[0],
+        platform=platform.platform(),
+        cpu_count=os.cpu_count() or 1,
+        parameters=parameters,
+        results=results
+    )
+
+def main() -> None:
+    args = parse_args()
+    work_directory = args.work_dir or tempfile.mkdtemp(prefix='podcaster-benchmark-')
+    try:
+        report = asyncio.run(run_benchmarks_async(args, work_directory))
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_directory, ignore_errors=True)
+
+    report_json = report.model_dump_json(indent=4)
+    if args.output:
+        Path(args.output).write_text(report_json, encoding='utf-8')
+    else:
+        print(report_json)
+
+if __name__ == '__main__':
+    main()
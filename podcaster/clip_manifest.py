@@ -0,0 +1,97 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Collection
+
+from pydantic import BaseModel, Field
+
+from podcaster.models import MusicThemeTranscriptItem, Transcript, Voice
+from .music_library import get_music_clip_name
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+class ClipManifestEntry(BaseModel):
+    order: int = Field(description="The order of the item the clip was synthesized from.")
+    speaker_id: str | None = Field(default=None, description="The id of the speaker of a speech item.")
+    voice: Voice | None = Field(default=None, description="The voice a speech clip was synthesized with.")
+    theme: str | None = Field(default=None, description="The theme of a music theme item.")
+    offset: float = Field(default=0.0, description="The offset of the item in seconds, used when the clip is placed on the timeline.")
+    content_hash: str = Field(description="The SHA-256 of the item's content.")
+    filename: str = Field(description="The name of the clip file in the clip directory.")
+
+class ClipManifest(BaseModel):
+    entries: list[ClipManifestEntry] = Field(description="The clips that make up the transcript, in transcript order.")
+
+class ClipManifestDiff(BaseModel):
+    changed: list[ClipManifestEntry] = Field(description="The entries that are new or differ from the previous manifest.")
+    unchanged: list[ClipManifestEntry] = Field(description="The entries whose existing clip can be reused.")
+    orphans: list[str] = Field(description="The clip files that are no longer part of the transcript.")
+
+def build_clip_manifest(transcript: Transcript, music_themes: Collection[str] = ()) -> ClipManifest:
+    """Describe the clips a transcript's speech items, and its items of `music_themes`, are placed as."""
+    voices = {host.id: host.voice for host in transcript.hosts}
+    entries = []
+    for item in transcript.items:
+        if isinstance(item, MusicThemeTranscriptItem):
+            if item.theme in music_themes:
+                entries.append(ClipManifestEntry(
+                    order=item.order,
+                    theme=item.theme,
+                    offset=item.offset,
+                    content_hash=hashlib.sha256(item.theme.encode('utf-8')).hexdigest(),
+                    filename=get_music_clip_name(item)
+                ))
+            continue
+        if item.speaker_id not in voices:
+            raise ValueError(f"Host with id {item.speaker_id} not found in transcript.")
+        entries.append(ClipManifestEntry(
+            order=item.order,
+            offset=item.offset,
+            speaker_id=item.speaker_id,
+            voice=voices[item.speaker_id],
+            content_hash=hashlib.sha256(item.content.encode('utf-8')).hexdigest(),
+            filename=f"{item.order}-{item.speaker_id}.wav"
+        ))
+    return ClipManifest(entries=entries)
+
+def read_clip_manifest(clip_dir: str | os.PathLike) -> ClipManifest | None:
+    """Read the manifest of a clip directory, if it has one."""
+    manifest_path = Path(clip_dir) / MANIFEST_FILE_NAME
+    if not manifest_path.exists():
+        return None
+    return ClipManifest.model_validate_json(manifest_path.read_text(encoding='utf-8'))
+
+def write_clip_manifest(clip_dir: str | os.PathLike, manifest: ClipManifest) -> None:
+    """Atomically replace the manifest of a clip directory."""
+    manifest_path = Path(clip_dir) / MANIFEST_FILE_NAME
+    temp_path = manifest_path.with_suffix('.tmp')
+    temp_path.write_text(manifest.model_dump_json(indent=4), encoding='utf-8')
+    os.replace(temp_path, manifest_path)
+
+def diff_clip_manifest(clip_dir: str | os.PathLike, manifest: ClipManifest) -> ClipManifestDiff:
+    """Compare a manifest against the one already in clip_dir and the clips on disk."""
+    clip_dir = Path(clip_dir)
+    previous = read_clip_manifest(clip_dir)
+    previous_entries = {entry.filename: entry for entry in previous.entries} if previous else {}
+
+    changed, unchanged = [], []
+    for entry in manifest.entries:
+        # Offsets only move a clip on the timeline, so changing them never needs a new clip
+        previous_entry = previous_entries.get(entry.filename)
+        if (
+            previous_entry is not None
+            and previous_entry.model_dump(exclude={'offset'}) == entry.model_dump(exclude={'offset'})
+            and (clip_dir / entry.filename).exists()
+        ):
+            unchanged.append(entry)
+        else:
+            changed.append(entry)
+
+    filenames = {entry.filename for entry in manifest.entries}
+    orphans = []
+    if clip_dir.exists():
+        orphans = sorted(
+            filename for filename in os.listdir(clip_dir)
+            if filename.endswith('.wav') and filename not in filenames
+        )
+    return ClipManifestDiff(changed=changed, unchanged=unchanged, orphans=orphans)
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel, Field
+
+from podcaster.models import Source, Transcript
+from .audio_stitcher import AudioClipStitcher, StreamingAudioClipStitcher
+from .instrumentation import count, span
+from .transcript_generator import LLMTranscriptGenerator, TranscriptGenerator
+from .transcript_repository import TranscriptRepository
+from .transcript_to_audio_converter import DefaultTranscriptToAudioConverter, TranscriptToAudioConverter
+
+class StageTiming(BaseModel):
+    name: str = Field(description="The name of the pipeline stage.")
+    count: int = Field(default=0, description="The number of episodes that completed the stage.")
+    failures: int = Field(default=0, description="The number of episodes that failed in the stage.")
+    busy_seconds: float = Field(default=0.0, description="The summed duration of all runs of the stage.")
+    queue_wait_seconds: float = Field(default=0.0, description="The summed time episodes waited for the stage.")
+    wall_seconds: float = Field(default=0.0, description="The time from the first start to the last end of the stage.")
+
+class PipelineReport(BaseModel):
+    stages: list[StageTiming] = Field(description="The timings of each stage, in pipeline order.")
+    total_seconds: float = Field(description="The wall-clock duration of the whole run.")
+    podcasts: list[str] = Field(description="The paths of the podcasts that were produced.")
+
+class EpisodePipeline:
+    """Builds finished podcasts from outlines without intermediate user interaction.
+
+    Generation, synthesis and stitching run as concurrent stages connected by queues, so
+    an episode moves on as soon as its previous stage is done while other episodes are
+    still being generated or synthesized. Each stage has its own cap on concurrently
+    processed episodes; the number of concurrent TTS requests across all episodes is
+    capped by the shared transcript-to-audio converter.
+
+    With `stream_items` enabled, items are synthesized as soon as the LLM has generated
+    them, while the rest of the transcript is still being generated; the synthesize
+    stage then only waits for the outstanding items before writing the clip manifest
+    and removing orphaned clips. With `in_memory_clips` enabled,
+    clips are handed to the stitcher in memory instead of being written to and re-read
+    from the clip directory.
+    """
+
+    def __init__(
+        self,
+        transcript_generator: TranscriptGenerator,
+        transcript_repository: TranscriptRepository,
+        transcript_to_audio_converter: TranscriptToAudioConverter,
+        audio_stitcher: AudioClipStitcher,
+        output_directory: str = 'output/podcasts',
+        max_concurrent_generations: int = 2,
+        max_concurrent_syntheses: int = 4,
+        max_concurrent_stitches: int = 1,
+        stream_items: bool = False,
+        in_memory_clips: bool = False
+    ):
+        if stream_items and not (
+            isinstance(transcript_generator, LLMTranscriptGenerator)
+            and isinstance(transcript_to_audio_converter, DefaultTranscriptToAudioConverter)
+        ):
+            raise ValueError(
+                "Streaming items requires an LLMTranscriptGenerator and a DefaultTranscriptToAudioConverter."
+            )
+        if in_memory_clips and (
+            stream_items
+            or not isinstance(transcript_to_audio_converter, DefaultTranscriptToAudioConverter)
+            or not isinstance(audio_stitcher, StreamingAudioClipStitcher)
+        ):
+            raise ValueError(
+                "In-memory clips require a DefaultTranscriptToAudioConverter and a StreamingAudioClipStitcher "
+                "and cannot be combined with streaming items."
+            )
+        self._transcript_generator = transcript_generator
+        self._transcript_repository = transcript_repository
+        self._transcript_to_audio_converter = transcript_to_audio_converter
+        self._audio_stitcher = audio_stitcher
+        self._output_directory = output_directory
+        self._max_concurrent_generations = max_concurrent_generations
+        self._max_concurrent_syntheses = max_concurrent_syntheses
+        self._max_concurrent_stitches = max_concurrent_stitches
+        self._stream_items = stream_items
+        self._in_memory_clips = in_memory_clips
+
+    async def run_async(self, hosts: list[str], sources: list[Source], outlines: list[Source]) -> PipelineReport:
+        """Generate, synthesize and stitch one podcast per outline."""
+        started = time.perf_counter()
+        podcasts: list[str] = []
+
+        async def generate(outline: Source) -> Transcript | _StreamedTranscript:
+            if self._stream_items:
+                return await self._generate_streamed_async(hosts, sources, outline)
+            transcript = await self._transcript_generator.generate_transcript_async(hosts, sources, outline)
+            await self._transcript_repository.write_transcript_async(transcript)
+            logging.info(f"Transcript '{transcript.title}' generated and saved.")
+            return transcript
+
+        async def synthesize(value: Transcript | _StreamedTranscript) -> str | tuple[str, dict[str, bytes]]:
+            if self._in_memory_clips:
+                clip_dir = self._transcript_to_audio_converter.get_output_dir(value)
+                clips = await self._transcript_to_audio_converter.convert_transcript_to_audio_buffers_async(value)
+                logging.info(f"Transcript '{value.title}' converted to {len(clips)} in-memory clips.")
+                return str(clip_dir), clips
+            if isinstance(value, _StreamedTranscript):
+                transcript = value.transcript
+                await value.wait_async()
+                # Like an incremental conversion, leave only the transcript's clips and their manifest behind
+                self._transcript_to_audio_converter.finish_output_dir(transcript)
+                clip_dir = value.clip_dir
+            else:
+                transcript = value
+                clip_dir = await self._transcript_to_audio_converter.convert_transcript_to_audio_async(transcript)
+            logging.info(f"Transcript '{transcript.title}' converted to audio in {clip_dir}.")
+            return str(clip_dir)
+
+        async def stitch(value: str | tuple[str, dict[str, bytes]]) -> str:
+            if isinstance(value, tuple):
+                clip_dir, clips = value
+                output_file_name = self._audio_stitcher.get_output_file_name(f"{os.path.basename(clip_dir)}_podcast")
+                await self._audio_stitcher.stitch_audio_buffers_async(clips, self._output_directory, output_file_name)
+            else:
+                clip_dir = value
+                output_file_name = self._audio_stitcher.get_output_file_name(f"{os.path.basename(clip_dir)}_podcast")
+                await self._audio_stitcher.stitch_audio_clips_async(clip_dir, self._output_directory, output_file_name)
+            output_path = os.path.join(self._output_directory, output_file_name)
+            podcasts.append(output_path)
+            logging.info(f"Podcast saved to {output_path}.")
+            return output_path
+
+        outline_queue: asyncio.Queue = asyncio.Queue()
+        transcript_queue: asyncio.Queue = asyncio.Queue()
+        clip_dir_queue: asyncio.Queue = asyncio.Queue()
+        done_queue: asyncio.Queue = asyncio.Queue()
+        for outline in outlines:
+            outline_queue.put_nowait((time.perf_counter(), outline))
+        outline_queue.put_nowait(None)
+
+        stages = [
+            StageTiming(name='generate'),
+            StageTiming(name='synthesize'),
+            StageTiming(name='stitch'),
+        ]
+        async with asyncio.TaskGroup() as task_group:
+            task_group.create_task(self._run_stage_async(
+                stages[0], generate, outline_queue, transcript_queue, self._max_concurrent_generations
+            ))
+            task_group.create_task(self._run_stage_async(
+                stages[1], synthesize, transcript_queue, clip_dir_queue, self._max_concurrent_syntheses
+            ))
+            task_group.create_task(self._run_stage_async(
+                stages[2], stitch, clip_dir_queue, done_queue, self._max_concurrent_stitches
+            ))
+
+        return PipelineReport(
+            stages=stages,
+            total_seconds=time.perf_counter() - started,
+            podcasts=sorted(podcasts)
+        )
+
+    async def _generate_streamed_async(
+        self, hosts: list[str], sources: list[Source], outline: Source
+    ) -> '_StreamedTranscript':
+        """Generate a transcript, starting synthesis of each item as soon as it is generated."""
+        generator: LLMTranscriptGenerator = self._transcript_generator
+        converter: DefaultTranscriptToAudioConverter = self._transcript_to_audio_converter
+        header: Transcript | None = None
+        items = []
+        tasks: list[asyncio.Task] = []
+        try:
+            async for header, item in generator.stream_transcript_items_async(hosts, sources, outline):
+                items.append(item)
+                tasks.append(asyncio.create_task(converter.convert_transcript_item_to_audio_async(
+                    header, item, converter.get_output_dir(header)
+                )))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        if header is None:
+            raise ValueError("The generated transcript has no items.")
+
+        transcript = header.model_copy(update={'items': items})
+        await self._transcript_repository.write_transcript_async(transcript)
+        logging.info(f"Transcript '{transcript.title}' generated and saved, {len(tasks)} items already queued for synthesis.")
+        return _StreamedTranscript(transcript, converter.get_output_dir(transcript), tasks)
+
+    @staticmethod
+    async def _run_stage_async(
+        timing: StageTiming,
+        process: Callable[[Any], Awaitable[Any]],
+        input_queue: asyncio.Queue,
+        output_queue: asyncio.Queue,
+        workers: int
+    ) -> None:
+        """Run workers over a stage's queue; a None entry marks the end of the input."""
+        first_start: float | None = None
+        last_end: float | None = None
+
+        async def worker() -> None:
+            nonlocal first_start, last_end
+            while True:
+                entry = await input_queue.get()
+                if entry is None:
+                    # Let the sibling workers see the end marker too
+                    input_queue.put_nowait(None)
+                    return
+                enqueued, value = entry
+                start = time.perf_counter()
+                timing.queue_wait_seconds += start - enqueued
+                count(f'pipeline.{timing.name}.queue_wait_seconds', start - enqueued)
+                if first_start is None:
+                    first_start = start
+                try:
+                    with span(f'pipeline.{timing.name}', value=_describe(value)):
+                        result = await process(value)
+                except Exception:
+                    timing.failures += 1
+                    logging.exception(f"Pipeline stage '{timing.name}' failed for {_describe(value)}")
+                    continue
+                finally:
+                    end = time.perf_counter()
+                    timing.busy_seconds += end - start
+                    last_end = end
+                timing.count += 1
+                output_queue.put_nowait((end, result))
+
+        async with asyncio.TaskGroup() as task_group:
+            for _ in range(workers):
+                task_group.create_task(worker())
+
+        if first_start is not None and last_end is not None:
+            timing.wall_seconds = last_end - first_start
+        output_queue.put_nowait(None)
+
+class _StreamedTranscript:
+    """A generated transcript whose items are already being synthesized."""
+
+    def __init__(self, transcript: Transcript, clip_dir: Path, tasks: list[asyncio.Task]):
+        self.transcript = transcript
+        self.clip_dir = clip_dir
+        self.tasks = tasks
+
+    async def wait_async(self) -> None:
+        try:
+            await asyncio.gather(*self.tasks)
+        except BaseException:
+            for task in self.tasks:
+                task.cancel()
+            raise
+
+def _describe(value: Any) -> str:
+    if isinstance(value, tuple):
+        value = value[0]
+    if isinstance(value, _StreamedTranscript):
+        value = value.transcript
+    if isinstance(value, Transcript):
+        return f"transcript '{value.title}'"
+    if isinstance(value, Source):
+        return f"source '{getattr(value, 'filepath', value.text[:40])}'"
+    return repr(value)
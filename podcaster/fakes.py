@@ -0,0 +1,234 @@
+import asyncio
+import io
+import json
+import random
+import time
+import wave
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Type
+
+import aiofiles
+import httpx
+import numpy as np
+
+from podcaster.models import Host, SpeechTranscriptItem, Transcript, TranscriptSection, Voice
+from .llm_client import LLMClient, T
+from .tts_client import TTSClient
+
+_WORDS = (
+    "the podcast host said that this source shows how models and data shape what we know "
+    "about systems people build every day and why it matters for listeners"
+).split()
+
+class FakeTTSClient(TTSClient):
+    """TTSClient that simulates request latency and returns synthetic speech.
+
+    Each request sleeps for `latency` seconds (plus up to `jitter`) and produces a tone of
+    `seconds_per_char` seconds per character in the TTS API's 24 kHz mono 16-bit format.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.0,
+        seconds_per_char: float = 0.06,
+        sample_rate: int = 24000,
+        seed: int = 0
+    ):
+        self.model = 'fake-tts'
+        self.response_format = 'wav'
+        self._latency = latency
+        self._jitter = jitter
+        self._seconds_per_char = seconds_per_char
+        self._sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self.requests = 0
+
+    async def synthesize_speech_async(self, text: str, voice: Voice, output_file: Path) -> None:
+        audio = await self.synthesize_speech_bytes_async(text, voice)
+        async with aiofiles.open(output_file, 'wb') as file:
+            await file.write(audio)
+
+    async def synthesize_speech_bytes_async(self, text: str, voice: Voice) -> bytes:
+        self.requests += 1
+        await asyncio.sleep(self._latency + self._random.uniform(0, self._jitter))
+        return _synthesize_tone(text, voice, self._seconds_per_char, self._sample_rate)
+
+class FakeLLMClient(LLMClient):
+    """LLMClient that simulates latency and returns synthetic transcripts.
+
+    Transcripts and transcript sections have `item_count` speech items of
+    `words_per_item` words, alternating between two hosts. Streaming yields the JSON in
+    `chunk_size` character chunks, `chunk_latency` seconds apart, after the initial
+    `latency`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 1.0,
+        item_count: int = 40,
+        words_per_item: int = 40,
+        chunk_size: int = 64,
+        chunk_latency: float = 0.0,
+        seed: int = 0
+    ):
+        self.model = 'fake-llm'
+        self._latency = latency
+        self._item_count = item_count
+        self._words_per_item = words_per_item
+        self._chunk_size = chunk_size
+        self._chunk_latency = chunk_latency
+        self._random = random.Random(seed)
+        self.requests = 0
+
+    async def generate_text_async(self, prompt: str) -> str:
+        self.requests += 1
+        await asyncio.sleep(self._latency)
+        return self.get_sentence()
+
+    async def generate_model_async(self, prompt: str, model_type: Type[T]) -> T:
+        self.requests += 1
+        await asyncio.sleep(self._latency)
+        return self.get_model(model_type)
+
+    async def stream_model_json_async(self, prompt: str, model_type: Type[T]) -> AsyncIterator[str]:
+        self.requests += 1
+        await asyncio.sleep(self._latency)
+        content = self.get_model(model_type).model_dump_json()
+        for start in range(0, len(content), self._chunk_size):
+            if self._chunk_latency:
+                await asyncio.sleep(self._chunk_latency)
+            yield content[start:start + self._chunk_size]
+
+    def get_model(self, model_type: Type[T]) -> T:
+        """Return a synthetic instance of model_type without simulating latency."""
+        hosts = [Host(name='Jane Doe', voice=Voice.ALLOY, id='Jane'), Host(name='John Smith', voice=Voice.ECHO, id='John')]
+        items = [
+            SpeechTranscriptItem(type='speech', order=order, speaker_id=hosts[order % 2].id, content=self.get_sentence())
+            for order in range(self._item_count)
+        ]
+        if model_type is Transcript:
+            return Transcript(title=f'Fake Episode {self._random.randrange(10 ** 6)}', hosts=hosts, items=items)
+        if model_type is TranscriptSection:
+            return TranscriptSection(items=items)
+        raise ValueError(f"FakeLLMClient cannot generate {model_type.__name__}.")
+
+    def get_sentence(self) -> str:
+        return ' '.join(self._random.choice(_WORDS) for _ in range(self._words_per_item)).capitalize() + '.'
+
+class FakeOpenAIServer:
+    """An in-process stand-in for the OpenAI API that enforces rate limits.
+
+    Mount it into the OpenAI SDK with `http_client=server.create_http_client()`. It serves
+    chat completions (text, function calls and streams, generated by a FakeLLMClient)
+    and speech (generated like FakeTTSClient's), counts at most `requests_per_period`
+    requests and `tokens_per_period` tokens (or characters, for speech) in a sliding
+    window of `period_seconds`, and answers anything beyond that with a 429 carrying
+    retry-after-ms. Every response carries x-ratelimit-* headers like the real API.
+    """
+
+    def __init__(
+        self,
+        requests_per_period: int = 60,
+        tokens_per_period: int = 100_000,
+        period_seconds: float = 60.0,
+        latency: float = 0.0,
+        llm_client: FakeLLMClient | None = None
+    ):
+        self._requests_per_period = requests_per_period
+        self._tokens_per_period = tokens_per_period
+        self._period_seconds = period_seconds
+        self._latency = latency
+        self._llm_client = llm_client or FakeLLMClient(latency=0, item_count=4, words_per_item=8)
+        self._window: deque[tuple[float, int]] = deque()
+        self.accepted = 0
+        self.rejected = 0
+
+    def create_http_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle_async))
+
+    async def handle_async(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content or b'{}')
+        if request.url.path.endswith('/audio/speech'):
+            units = len(body.get('input', ''))
+        else:
+            units = sum(len(str(message.get('content', ''))) for message in body.get('messages', [])) // 4
+
+        now = time.monotonic()
+        while self._window and self._window[0][0] <= now - self._period_seconds:
+            self._window.popleft()
+        used_tokens = sum(tokens for _, tokens in self._window)
+        if len(self._window) + 1 > self._requests_per_period or used_tokens + units > self._tokens_per_period:
+            self.rejected += 1
+            retry_after = self._window[0][0] + self._period_seconds - now if self._window else self._period_seconds
+            headers = self._get_headers(now, used_tokens)
+            headers['retry-after-ms'] = str(int(retry_after * 1000) + 1)
+            return httpx.Response(429, headers=headers, json={'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': 'rate_limit_exceeded'}})
+
+        self._window.append((now, units))
+        self.accepted += 1
+        await asyncio.sleep(self._latency)
+        headers = self._get_headers(now, used_tokens + units)
+
+        if request.url.path.endswith('/audio/speech'):
+            audio = _synthesize_tone(body['input'], Voice(body['voice']), 0.01, 24000)
+            return httpx.Response(200, headers=headers, content=audio)
+        return self._complete(body, units, headers)
+
+    def _complete(self, body: dict, prompt_tokens: int, headers: dict[str, str]) -> httpx.Response:
+        functions = body.get('functions')
+        if functions:
+            title = functions[0]['parameters'].get('title')
+            model_type = {'Transcript': Transcript, 'TranscriptSection': TranscriptSection}[title]
+            content = None
+            arguments = self._llm_client.get_model(model_type).model_dump_json()
+        else:
+            content = self._llm_client.get_sentence()
+            arguments = None
+        output = content or arguments
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(output) // 4, 'total_tokens': prompt_tokens + len(output) // 4}
+        completion = {'id': 'fake', 'created': int(time.time()), 'model': body.get('model', 'fake'), 'object': 'chat.completion'}
+
+        if not body.get('stream'):
+            message = {'role': 'assistant', 'content': content}
+            if arguments is not None:
+                message['function_call'] = {'name': functions[0]['name'], 'arguments': arguments}
+            completion['choices'] = [{'index': 0, 'message': message, 'finish_reason': 'stop'}]
+            completion['usage'] = usage
+            return httpx.Response(200, headers=headers, json=completion)
+
+        completion['object'] = 'chat.completion.chunk'
+        events = []
+        for start in range(0, len(output), 32):
+            piece = output[start:start + 32]
+            delta = {'function_call': {'arguments': piece}} if arguments is not None else {'content': piece}
+            events.append({**completion, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})
+        if body.get('stream_options', {}).get('include_usage'):
+            events.append({**completion, 'choices': [], 'usage': usage})
+        stream = ''.join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, headers={**headers, 'content-type': 'text/event-stream'}, content=stream.encode('utf-8'))
+
+    def _get_headers(self, now: float, used_tokens: int) -> dict[str, str]:
+        reset = self._window[0][0] + self._period_seconds - now if self._window else 0.0
+        return {
+            'x-ratelimit-limit-requests': str(self._requests_per_period),
+            'x-ratelimit-remaining-requests': str(max(0, self._requests_per_period - len(self._window))),
+            'x-ratelimit-reset-requests': f"{reset:.3f}s",
+            'x-ratelimit-limit-tokens': str(self._tokens_per_period),
+            'x-ratelimit-remaining-tokens': str(max(0, self._tokens_per_period - used_tokens)),
+            'x-ratelimit-reset-tokens': f"{reset:.3f}s",
+        }
+
+def _synthesize_tone(text: str, voice: Voice, seconds_per_char: float, sample_rate: int) -> bytes:
+    """Return a 16-bit mono WAV tone whose length follows the text and pitch follows the voice."""
+    frame_count = max(1, int(len(text) * seconds_per_char * sample_rate))
+    frequency = 110 + 55 * list(Voice).index(voice)
+    samples = 0.2 * np.sin(2 * np.pi * frequency * np.arange(frame_count) / sample_rate)
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as outfile:
+        outfile.setnchannels(1)
+        outfile.setsampwidth(2)
+        outfile.setframerate(sample_rate)
+        outfile.writeframes((samples * 32767).astype('<i2').tobytes())
+    return output.getvalue()
@@ -0,0 +1,126 @@
+import json
+from typing import Any
+
+_WHITESPACE = ' \t\r\n'
+
+class IncrementalArrayParser:
+    """Parses a JSON object as it arrives and extracts the elements of one top-level array.
+
+    Text is fed in arbitrary chunks. Every element of the `array_key` array is decoded
+    and returned from `feed` as soon as its closing bracket (or delimiter, for scalars)
+    has been seen. The other top-level members are decoded into `fields` as they
+    complete. Every character is scanned once and text is dropped as soon as no pending
+    key, field or element needs it, so parsing the whole document is linear in its size
+    regardless of how it is chunked.
+    """
+
+    def __init__(self, array_key: str):
+        self._array_key = array_key
+        self._buffer = ''
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._expect_value = False
+        self._key: str | None = None
+        self._value_start: int | None = None
+        self._in_array = False
+        self._element_start: int | None = None
+        self.fields: dict[str, Any] = {}
+        self.complete = False
+
+    def feed(self, chunk: str) -> list[Any]:
+        """Consume the next chunk of text and return the array elements it completed."""
+        self._buffer += chunk
+        buffer = self._buffer
+        elements: list[Any] = []
+
+        for position in range(self._position, len(buffer)):
+            char = buffer[position]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._key = json.loads(buffer[self._string_start:position + 1])
+                        self._expect_key = False
+                continue
+            if char in _WHITESPACE or self.complete:
+                continue
+
+            if self._depth == 1 and self._expect_value:
+                self._value_start = position
+                self._expect_value = False
+                self._in_array = char == '[' and self._key == self._array_key
+            elif self._depth == 2 and self._in_array and self._element_start is None and char not in ',]':
+                self._element_start = position
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    if char != '{':
+                        raise ValueError("Expected a JSON object.")
+                    self._expect_key = True
+            elif char in '}]':
+                if self._depth == 3 and self._in_array:
+                    elements.append(json.loads(buffer[self._element_start:position + 1]))
+                    self._element_start = None
+                elif self._depth == 2:
+                    if self._in_array:
+                        if self._element_start is not None:
+                            elements.append(json.loads(buffer[self._element_start:position]))
+                            self._element_start = None
+                        self._in_array = False
+                    else:
+                        self._complete_field(position + 1)
+                    self._value_start = None
+                elif self._depth == 1:
+                    if self._value_start is not None:
+                        self._complete_field(position)
+                    self.complete = True
+                self._depth -= 1
+            elif char == ',':
+                if self._depth == 2 and self._in_array and self._element_start is not None:
+                    elements.append(json.loads(buffer[self._element_start:position]))
+                    self._element_start = None
+                elif self._depth == 1:
+                    if self._value_start is not None:
+                        self._complete_field(position)
+                    self._expect_key = True
+            elif char == ':' and self._depth == 1:
+                self._expect_value = True
+
+        self._drop_consumed(len(buffer))
+        return elements
+
+    def _drop_consumed(self, end: int) -> None:
+        # Keep the text from the start of the key, field or element that is still incomplete
+        starts = [end]
+        if self._in_string and self._depth == 1 and self._expect_key:
+            starts.append(self._string_start)
+        if self._value_start is not None and not self._in_array:
+            starts.append(self._value_start)
+        if self._element_start is not None:
+            starts.append(self._element_start)
+        keep = min(starts)
+
+        self._buffer = self._buffer[keep:]
+        self._position = end - keep
+        self._string_start -= keep
+        if self._value_start is not None:
+            self._value_start -= keep
+        if self._element_start is not None:
+            self._element_start -= keep
+
+    def _complete_field(self, end: int) -> None:
+        if self._value_start is not None and self._key is not None:
+            self.fields[self._key] = json.loads(self._buffer[self._value_start:end])
+        self._value_start = None
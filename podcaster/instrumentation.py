@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Iterator
+
+from pydantic import BaseModel, Field
+
+class SpanRecord(BaseModel):
+    name: str = Field(description="The name of the span, e.g. tts.request.")
+    start_ns: int = Field(description="When the span started, in perf_counter nanoseconds.")
+    duration_ns: int = Field(description="How long the span lasted, in nanoseconds.")
+    track: int = Field(description="The asyncio task or thread the span ran on.")
+    args: dict[str, Any] = Field(default_factory=dict, description="Attributes of the span.")
+
+class CounterSample(BaseModel):
+    name: str = Field(description="The name of the counter, e.g. tts.characters.")
+    time_ns: int = Field(description="When the counter changed, in perf_counter nanoseconds.")
+    value: float = Field(description="The total of the counter after the change.")
+
+class SpanSummary(BaseModel):
+    name: str = Field(description="The name of the spans.")
+    count: int = Field(description="The number of spans.")
+    total_seconds: float = Field(description="The summed duration of the spans.")
+    mean_seconds: float = Field(description="The mean duration of the spans.")
+    max_seconds: float = Field(description="The longest duration of any of the spans.")
+
+class Recorder:
+    """Collects the spans and counters reported while instrumentation is enabled.
+
+    With `trace_memory`, tracemalloc runs for as long as the recorder is enabled and spans
+    opened with `memory=True` record the peak of traced allocations while they ran.
+    Concurrent memory spans share the process-wide peak.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.spans: list[SpanRecord] = []
+        self.counters: dict[str, float] = {}
+        self.counter_samples: list[CounterSample] = []
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+
+    def add_span(self, span: SpanRecord) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def add(self, name: str, value: float) -> None:
+        with self._lock:
+            total = self.counters.get(name, 0) + value
+            self.counters[name] = total
+            self.counter_samples.append(CounterSample(name=name, time_ns=time.perf_counter_ns(), value=total))
+
+    def summarize(self) -> list[SpanSummary]:
+        """Aggregate the spans by name, longest total first."""
+        durations: dict[str, list[int]] = {}
+        for span in self.spans:
+            durations.setdefault(span.name, []).append(span.duration_ns)
+        summaries = [
+            SpanSummary(
+                name=name,
+                count=len(values),
+                total_seconds=sum(values) / 1e9,
+                mean_seconds=sum(values) / len(values) / 1e9,
+                max_seconds=max(values) / 1e9
+            )
+            for name, values in durations.items()
+        ]
+        return sorted(summaries, key=lambda summary: summary.total_seconds, reverse=True)
+
+    def to_chrome_trace(self) -> dict:
+        """Return the spans and counters in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events: list[dict] = [
+            {
+                'name': span.name,
+                'cat': span.name.split('.')[0],
+                'ph': 'X',
+                'ts': (span.start_ns - self._origin_ns) / 1000,
+                'dur': span.duration_ns / 1000,
+                'pid': pid,
+                'tid': span.track,
+                'args': span.args,
+            }
+            for span in self.spans
+        ]
+        events.extend(
+            {
+                'name': sample.name,
+                'ph': 'C',
+                'ts': (sample.time_ns - self._origin_ns) / 1000,
+                'pid': pid,
+                'args': {'value': sample.value},
+            }
+            for sample in self.counter_samples
+        )
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str | os.PathLike) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(self.to_chrome_trace()), encoding='utf-8')
+
+class _DiscardingDict(dict):
+    """The attributes of disabled spans, which ignore anything added to them."""
+
+    def __setitem__(self, key, value) -> None:
+        pass
+
+# None while instrumentation is disabled, which keeps span() and count() to a single check
+_recorder: Recorder | None = None
+_NULL_SPAN = nullcontext(_DiscardingDict())
+
+def enable_instrumentation(trace_memory: bool = False) -> Recorder:
+    """Start recording spans and counters, and return the recorder they are collected in."""
+    global _recorder
+    _recorder = Recorder(trace_memory=trace_memory)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return _recorder
+
+def disable_instrumentation() -> Recorder | None:
+    """Stop recording and return the recorder, if instrumentation was enabled."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None and recorder.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return recorder
+
+def get_recorder() -> Recorder | None:
+    return _recorder
+
+def span(name: str, memory: bool = False, **args: Any) -> ContextManager[dict[str, Any]]:
+    """Time a block of code as a span.
+
+    The context manager yields the span's attribute dictionary, so attributes that are
+    only known at the end of the block (bytes written, tokens used) can be added to it.
+    While instrumentation is disabled a shared no-op context manager is returned.
+    """
+    if _recorder is None:
+        return _NULL_SPAN
+    return _record_span(_recorder, name, memory, args)
+
+def count(name: str, value: float = 1) -> None:
+    """Add value to a counter; does nothing while instrumentation is disabled."""
+    if _recorder is not None:
+        _recorder.add(name, value)
+
+@contextmanager
+def _record_span(recorder: Recorder, name: str, memory: bool, args: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    trace_memory = memory and recorder.trace_memory and tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    start = time.perf_counter_ns()
+    try:
+        yield args
+    finally:
+        duration = time.perf_counter_ns() - start
+        if trace_memory:
+            args['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        recorder.add_span(SpanRecord(name=name, start_ns=start, duration_ns=duration, track=_get_track(), args=args))
+
+def _get_track() -> int:
+    """Identify the asyncio task, or else the thread, a span ran on."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator, Literal
+
+from pydantic import BaseModel, Field
+
+JobStage = Literal['generate', 'synthesize', 'stitch', 'done']
+JobStatus = Literal['pending', 'running', 'done', 'failed']
+
+_JOB_COLUMNS = 'id, outline, sources, hosts, transcript, clip_dir, podcast, stage, status, attempts, error'
+
+class EpisodeJob(BaseModel):
+    id: int = Field(description="The id of the job.")
+    outline: str | None = Field(default=None, description="The outline file to generate a transcript from, if the job starts by generating.")
+    sources: list[str] = Field(default_factory=list, description="The source files, directories or globs to generate the transcript from.")
+    hosts: list[str] = Field(default_factory=list, description="The names of the hosts of the episode.")
+    transcript: str | None = Field(default=None, description="The name of the transcript, once it has been generated.")
+    clip_dir: str | None = Field(default=None, description="The directory the clips were synthesized into.")
+    podcast: str | None = Field(default=None, description="The path of the finished podcast.")
+    stage: JobStage = Field(description="The next stage the episode has to go through.")
+    status: JobStatus = Field(description="Whether the job is waiting, being worked on, finished or has failed too often.")
+    attempts: int = Field(default=0, description="The number of times the job failed.")
+    error: str | None = Field(default=None, description="The error of the last failed attempt.")
+    item_count: int = Field(default=0, description="The number of clips the transcript is synthesized into.")
+    items_done: int = Field(default=0, description="The number of clips that have been synthesized.")
+
+class LeaseLostError(ValueError):
+    """Raised when a worker updates a job whose lease it no longer holds."""
+
+class JobStore:
+    """Keeps a queue of episodes to build, and their progress, in a local SQLite database.
+
+    Every episode goes through the generate, synthesize and stitch stages, and the
+    database records the stage it has reached and which of its clips have been
+    synthesized, so a job picks up where it left off after a crash. Any number of worker
+    processes can share the database: claiming a job leases it to one worker for
+    `lease_seconds`, which the worker renews while it works, and the job is handed to
+    another worker if the lease runs out. A job that fails `max_attempts` times is
+    marked as failed until it is retried.
+    """
+
+    def __init__(
+        self,
+        database_path: str = 'output/jobs.sqlite3',
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3
+    ):
+        self.lease_seconds = lease_seconds
+        self._max_attempts = max_attempts
+        os.makedirs(os.path.dirname(database_path) or '.', exist_ok=True)
+        # Transactions are managed explicitly, so claims can take the write lock up front
+        self._connection = sqlite3.connect(database_path, timeout=30.0, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                outline TEXT,
+                sources TEXT NOT NULL,
+                hosts TEXT NOT NULL,
+                transcript TEXT,
+                clip_dir TEXT,
+                podcast TEXT,
+                stage TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+                clip TEXT NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_id, clip)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def add_outline_job(self, outline: str, sources: list[str], hosts: list[str]) -> EpisodeJob:
+        """Queue an episode that is generated from an outline."""
+        return self._add_job(outline, sources, hosts, None, 'generate')
+
+    def add_transcript_job(self, transcript: str) -> EpisodeJob:
+        """Queue an episode for a transcript that has already been generated."""
+        return self._add_job(None, [], [], transcript, 'synthesize')
+
+    def claim_job(self, worker: str) -> EpisodeJob | None:
+        """Lease the oldest pending job, or one whose worker stopped renewing its lease, to a worker."""
+        now = time.time()
+        with self._transaction():
+            row = self._connection.execute(
+                "SELECT id FROM jobs WHERE status = 'pending' OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, updated = ? WHERE id = ?",
+                (worker, now + self.lease_seconds, now, row[0])
+            )
+        return self.get_job(row[0])
+
+    def renew_lease(self, job_id: int, worker: str) -> None:
+        now = time.time()
+        self._update_held_job(job_id, worker, "lease_expires = ?, updated = ?", (now + self.lease_seconds, now))
+
+    def advance_job(self, job_id: int, worker: str, stage: JobStage, **fields: str) -> None:
+        """Record that a job finished a stage, along with what the stage produced.
+
+        `fields` may set the transcript, clip_dir and podcast of the job. Advancing to
+        the done stage finishes the job and releases it.
+        """
+        unknown = set(fields) - {'transcript', 'clip_dir', 'podcast'}
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        assignments = ''.join(f"{name} = ?, " for name in fields)
+        if stage == 'done':
+            assignments += "status = 'done', worker = NULL, lease_expires = NULL, "
+        self._update_held_job(
+            job_id, worker, f"{assignments}stage = ?, error = NULL, updated = ?", (*fields.values(), stage, time.time())
+        )
+
+    def fail_job(self, job_id: int, worker: str, error: str) -> EpisodeJob:
+        """Release a job after a failed attempt, marking it as failed once it has used up its attempts."""
+        self._update_held_job(
+            job_id,
+            worker,
+            "attempts = attempts + 1, status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, error = ?, updated = ?",
+            (self._max_attempts, error, time.time())
+        )
+        return self.get_job(job_id)
+
+    def release_job(self, job_id: int, worker: str) -> None:
+        """Hand an interrupted job back to the queue without counting an attempt."""
+        self._connection.execute(
+            "UPDATE jobs SET status = 'pending', worker = NULL, lease_expires = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time(), job_id, worker)
+        )
+
+    def retry_failed_jobs(self) -> int:
+        """Queue every failed job again, from the stage it failed in, and return their number."""
+        return self._connection.execute(
+            "UPDATE jobs SET status = 'pending', attempts = 0, updated = ? WHERE status = 'failed'",
+            (time.time(),)
+        ).rowcount
+
+    def set_items(self, job_id: int, clips: list[str]) -> None:
+        """Register the clips of a job's transcript; clips that are already registered keep their state."""
+        with self._transaction():
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO job_items (job_id, clip) VALUES (?, ?)",
+                ((job_id, clip) for clip in clips)
+            )
+
+    def complete_item(self, job_id: int, clip: str) -> None:
+        self._connection.execute("UPDATE job_items SET done = 1 WHERE job_id = ? AND clip = ?", (job_id, clip))
+
+    def get_completed_items(self, job_id: int) -> set[str]:
+        return {row[0] for row in self._connection.execute(
+            "SELECT clip FROM job_items WHERE job_id = ? AND done = 1", (job_id,)
+        )}
+
+    def get_job(self, job_id: int) -> EpisodeJob:
+        jobs = self._select_jobs("WHERE id = ?", (job_id,))
+        if not jobs:
+            raise ValueError(f"Job {job_id} not found.")
+        return jobs[0]
+
+    def list_jobs(self) -> list[EpisodeJob]:
+        return self._select_jobs("ORDER BY id", ())
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _add_job(
+        self,
+        outline: str | None,
+        sources: list[str],
+        hosts: list[str],
+        transcript: str | None,
+        stage: JobStage
+    ) -> EpisodeJob:
+        now = time.time()
+        job_id = self._connection.execute(
+            "INSERT INTO jobs (outline, sources, hosts, transcript, stage, status, created, updated) "
+            "VALUES (?, ?, ?, ?, ?, 'pending', ?, ?)",
+            (outline, json.dumps(sources), json.dumps(hosts), transcript, stage, now, now)
+        ).lastrowid
+        return self.get_job(job_id)
+
+    def _update_held_job(self, job_id: int, worker: str, assignments: str, parameters: tuple) -> None:
+        """Update a job, provided the worker still holds its lease."""
+        updated = self._connection.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ? AND status = 'running'",
+            (*parameters, job_id, worker)
+        ).rowcount
+        if not updated:
+            raise LeaseLostError(f"Job {job_id} is no longer leased to worker {worker}.")
+
+    def _select_jobs(self, clause: str, parameters: tuple) -> list[EpisodeJob]:
+        rows = self._connection.execute(
+            f"""
+            SELECT {_JOB_COLUMNS},
+                (SELECT COUNT(*) FROM job_items WHERE job_id = jobs.id),
+                (SELECT COUNT(*) FROM job_items WHERE job_id = jobs.id AND done = 1)
+            FROM jobs {clause}
+            """,
+            parameters
+        ).fetchall()
+        return [
+            EpisodeJob(
+                id=job_id,
+                outline=outline,
+                sources=json.loads(sources),
+                hosts=json.loads(hosts),
+                transcript=transcript,
+                clip_dir=clip_dir,
+                podcast=podcast,
+                stage=stage,
+                status=status,
+                attempts=attempts,
+                error=error,
+                item_count=item_count,
+                items_done=items_done
+            )
+            for (
+                job_id, outline, sources, hosts, transcript, clip_dir, podcast,
+                stage, status, attempts, error, item_count, items_done
+            ) in rows
+        ]
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # IMMEDIATE takes the write lock before reading, so two workers never claim the same job
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
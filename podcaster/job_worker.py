@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+import socket
+from pathlib import Path
+
+from podcaster.models import Source
+from .audio_stitcher import AudioClipStitcher
+from .instrumentation import span
+from .job_store import EpisodeJob, JobStore, LeaseLostError
+from .source_repository import TextFileSourceRepository
+from .transcript_generator import TranscriptGenerator
+from .transcript_repository import TranscriptRepository
+from .transcript_to_audio_converter import DefaultTranscriptToAudioConverter
+
+class JobWorker:
+    """Builds the episodes queued in a JobStore, one at a time, until none are left.
+
+    Each stage is checkpointed in the store as soon as it finishes, and every clip as
+    soon as it has been written, so a job that is resumed after a crash or a failed
+    attempt neither generates its transcript nor synthesizes its finished clips again.
+    Any number of workers, in as many processes, can drain the same store.
+    """
+
+    def __init__(
+        self,
+        job_store: JobStore,
+        transcript_generator: TranscriptGenerator,
+        transcript_repository: TranscriptRepository,
+        transcript_to_audio_converter: DefaultTranscriptToAudioConverter,
+        audio_stitcher: AudioClipStitcher,
+        output_directory: str = 'output/podcasts',
+        lazy_sources: bool = False,
+        worker_id: str | None = None
+    ):
+        self._job_store = job_store
+        self._transcript_generator = transcript_generator
+        self._transcript_repository = transcript_repository
+        self._transcript_to_audio_converter = transcript_to_audio_converter
+        self._audio_stitcher = audio_stitcher
+        self._output_directory = output_directory
+        self._lazy_sources = lazy_sources
+        self._worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._sources: dict[tuple[str, ...], list[Source]] = {}
+
+    async def run_async(self) -> list[EpisodeJob]:
+        """Work on jobs until the queue is empty and return the jobs that were worked on."""
+        jobs = []
+        while (job := self._job_store.claim_job(self._worker_id)) is not None:
+            jobs.append(await self.run_job_async(job))
+        return jobs
+
+    async def run_job_async(self, job: EpisodeJob) -> EpisodeJob:
+        """Take a claimed job through its remaining stages and return its new state."""
+        heartbeat = asyncio.create_task(self._renew_lease_async(job.id))
+        try:
+            with span('job.run', job=job.id, stage=job.stage):
+                await self._run_stages_async(job)
+        except LeaseLostError as e:
+            # Another worker has taken the job over, so it is neither failed nor released
+            logging.warning(f"{e} Its result is discarded.")
+        except Exception as e:
+            logging.exception(f"Job {job.id} failed in stage '{self._job_store.get_job(job.id).stage}'")
+            try:
+                return self._job_store.fail_job(job.id, self._worker_id, repr(e))
+            except LeaseLostError as lost:
+                logging.warning(f"{lost} Its failure is not recorded.")
+        except BaseException:
+            self._job_store.release_job(job.id, self._worker_id)
+            raise
+        finally:
+            heartbeat.cancel()
+        return self._job_store.get_job(job.id)
+
+    async def _run_stages_async(self, job: EpisodeJob) -> None:
+        transcript_name = job.transcript
+        if job.stage == 'generate':
+            sources = await self._load_sources_async(job.sources)
+            outlines = await TextFileSourceRepository([job.outline]).load_sources_async()
+            transcript = await self._transcript_generator.generate_transcript_async(job.hosts, sources, outlines[0])
+            await self._transcript_repository.write_transcript_async(transcript)
+            transcript_name = self._transcript_repository.get_transcript_name(transcript)
+            self._job_store.advance_job(job.id, self._worker_id, 'synthesize', transcript=transcript_name)
+            logging.info(f"Job {job.id}: transcript '{transcript.title}' generated and saved.")
+
+        clip_dir = job.clip_dir
+        if job.stage in ('generate', 'synthesize'):
+            converter = self._transcript_to_audio_converter
+            transcript = await self._transcript_repository.read_transcript_async(transcript_name)
+            clip_dir = converter.get_output_dir(transcript)
+            self._job_store.set_items(job.id, converter.get_clip_names(transcript))
+            # A clip only counts as done while it is still on disk
+            completed = {
+                clip for clip in self._job_store.get_completed_items(job.id)
+                if (clip_dir / clip).exists()
+            }
+            if completed:
+                logging.info(f"Job {job.id}: resuming synthesis, {len(completed)} clips already synthesized.")
+            await converter.convert_transcript_to_audio_async(
+                transcript,
+                completed=completed,
+                on_clip_written=lambda clip: self._job_store.complete_item(job.id, clip)
+            )
+            self._job_store.advance_job(job.id, self._worker_id, 'stitch', clip_dir=str(clip_dir))
+            logging.info(f"Job {job.id}: transcript '{transcript.title}' converted to audio in {clip_dir}.")
+
+        output_file_name = self._audio_stitcher.get_output_file_name(f"{Path(clip_dir).name}_podcast")
+        await self._audio_stitcher.stitch_audio_clips_async(str(clip_dir), self._output_directory, output_file_name)
+        podcast = os.path.join(self._output_directory, output_file_name)
+        self._job_store.advance_job(job.id, self._worker_id, 'done', podcast=podcast)
+        logging.info(f"Job {job.id}: podcast saved to {podcast}.")
+
+    async def _load_sources_async(self, filepaths: list[str]) -> list[Source]:
+        key = tuple(filepaths)
+        if key not in self._sources:
+            self._sources[key] = await TextFileSourceRepository(filepaths, lazy=self._lazy_sources).load_sources_async()
+        return self._sources[key]
+
+    async def _renew_lease_async(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(self._job_store.lease_seconds / 3)
+            try:
+                self._job_store.renew_lease(job_id, self._worker_id)
+            except LeaseLostError as e:
+                logging.warning(f"{e} Its result will be discarded.")
+                return
@@ -0,0 +1,76 @@
+import os
+import librosa
+import numpy as np
+import soundfile as sf
+
+from .audio_stitcher import AudioClipStitcher, group_wav_files_by_order
+
+class LibrosaAudioClipStitcher(AudioClipStitcher):
+    async def stitch_audio_clips_async(
+        self,
+        input_directory: str,
+        output_directory: str,
+        output_file_name: str
+    ) -> None:
+        # Collect the clips in the input directory, grouped by their order prefix
+        grouped_files = group_wav_files_by_order(input_directory)
+
+        # Ensure the output directory exists
+        os.makedirs(output_directory, exist_ok=True)
+
+        # Initialize variables for final audio and sample rate
+        final_audio = None
+        sample_rate = None
+
+        # Process each group in order
+        for order in sorted(grouped_files.keys()):
+            combined_audio = None
+            for wav_file in grouped_files[order]:
+                audio_path = os.path.join(input_directory, wav_file)
+                audio_data, sr = librosa.load(audio_path, sr=None, mono=False)
+                if sample_rate is None:
+                    sample_rate = sr
+                elif sr != sample_rate:
+                    raise ValueError(f"Sample rate mismatch in file {wav_file}")
+
+                if combined_audio is None:
+                    combined_audio = audio_data
+                else:
+                    # Pad the shorter array with zeros
+                    max_length = max(combined_audio.shape[-1], audio_data.shape[-1])
+                    if audio_data.ndim == 1:
+                        # Mono audio
+                        padded_combined = np.pad(
+                            combined_audio,
+                            (0, max_length - combined_audio.shape[0]),
+                            mode='constant'
+                        )
+                        padded_audio_data = np.pad(
+                            audio_data,
+                            (0, max_length - audio_data.shape[0]),
+                            mode='constant'
+                        )
+                    else:
+                        # Stereo audio
+                        padded_combined = np.pad(
+                            combined_audio,
+                            ((0, 0), (0, max_length - combined_audio.shape[1])),
+                            mode='constant'
+                        )
+                        padded_audio_data = np.pad(
+                            audio_data,
+                            ((0, 0), (0, max_length - audio_data.shape[1])),
+                            mode='constant'
+                        )
+                    # Mix the audio clips together (overlay)
+                    combined_audio = padded_combined + padded_audio_data
+
+            if final_audio is None:
+                final_audio = combined_audio
+            else:
+                # Concatenate the combined segment
+                final_audio = np.concatenate((final_audio, combined_audio), axis=-1)
+
+        # Export the final stitched audio file
+        output_path = os.path.join(output_directory, output_file_name)
+        sf.write(output_path, final_audio, sample_rate)
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Type
+
+from pydantic import BaseModel, Field
+
+from .llm_client import LLMClient, T
+
+class LLMCacheStats(BaseModel):
+    hits: int = Field(default=0, description="The number of requests served from the cache.")
+    misses: int = Field(default=0, description="The number of requests forwarded to the wrapped client.")
+    coalesced: int = Field(default=0, description="The number of requests that waited on an identical in-flight request.")
+    evictions: int = Field(default=0, description="The number of entries removed because of their age or the size limit.")
+
+class CachingLLMClient(LLMClient):
+    """LLMClient decorator that stores validated responses in a local SQLite database.
+
+    Requests are fingerprinted on the model name, the prompt and, for structured output,
+    the JSON schema of the requested model, so any change to the template, sources or
+    schema misses the cache. Entries expire after `ttl_seconds` and the least recently
+    used ones are evicted once the stored responses exceed `max_size_bytes`. Identical
+    requests made while one is in flight, streamed or not, share its result. The shared
+    request runs in its own task, so cancelling the caller that started it neither
+    cancels the others nor loses the response. The database is only accessed from
+    worker threads, never on the event loop.
+    """
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        model: str,
+        database_path: str = 'output/cache/llm.sqlite3',
+        ttl_seconds: float | None = 30 * 24 * 60 * 60,
+        max_size_bytes: int = 256 * 1024 ** 2
+    ):
+        self._llm_client = llm_client
+        self._model = model
+        self._ttl_seconds = ttl_seconds
+        self._max_size_bytes = max_size_bytes
+        self._in_flight: dict[str, asyncio.Task[str]] = {}
+        self.stats = LLMCacheStats()
+
+        os.makedirs(os.path.dirname(database_path) or '.', exist_ok=True)
+        # The connection is used from whichever worker thread runs a query, one at a time
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                fingerprint TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._connection.commit()
+
+    def get_fingerprint(self, prompt: str, model_type: Type[BaseModel] | None = None) -> str:
+        """Return the cache key of a text (no model_type) or structured request."""
+        request = {
+            'model': self._model,
+            'prompt': prompt,
+            'schema': model_type.model_json_schema() if model_type is not None else None,
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+    async def generate_text_async(self, prompt: str) -> str:
+        return await self._get_or_generate_async(
+            self.get_fingerprint(prompt),
+            lambda: self._llm_client.generate_text_async(prompt)
+        )
+
+    async def generate_model_async(self, prompt: str, model_type: Type[T]) -> T:
+        async def generate_async() -> str:
+            model = await self._llm_client.generate_model_async(prompt, model_type)
+            return model.model_dump_json()
+
+        response = await self._get_or_generate_async(self.get_fingerprint(prompt, model_type), generate_async)
+        return model_type.model_validate_json(response)
+
+    async def stream_model_json_async(self, prompt: str, model_type: Type[T]) -> AsyncIterator[str]:
+        fingerprint = self.get_fingerprint(prompt, model_type)
+        cached = await asyncio.to_thread(self._get, fingerprint)
+        if cached is not None:
+            self.stats.hits += 1
+            yield cached
+            return
+
+        in_flight = self._in_flight.get(fingerprint)
+        if in_flight is not None:
+            self.stats.coalesced += 1
+            yield await asyncio.shield(in_flight)
+            return
+
+        self.stats.misses += 1
+        chunks: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def generate_async() -> str:
+            parts = []
+            try:
+                async for chunk in self._llm_client.stream_model_json_async(prompt, model_type):
+                    parts.append(chunk)
+                    chunks.put_nowait(chunk)
+            finally:
+                chunks.put_nowait(None)
+            # Only store responses that validate, in their normalized form
+            return model_type.model_validate_json(''.join(parts)).model_dump_json()
+
+        task = self._start_request(fingerprint, generate_async)
+        while (chunk := await chunks.get()) is not None:
+            yield chunk
+        # Raise the error the stream or its validation ended with, if any
+        await asyncio.shield(task)
+
+    def clear_expired(self) -> None:
+        """Remove expired entries and enforce the size limit."""
+        with self._lock:
+            self._clear_expired()
+
+    def _clear_expired(self) -> None:
+        if self._ttl_seconds is not None:
+            cursor = self._connection.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self._ttl_seconds,)
+            )
+            self.stats.evictions += cursor.rowcount
+        total_size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size > self._max_size_bytes:
+            rows = self._connection.execute("SELECT fingerprint, size FROM responses ORDER BY last_used").fetchall()
+            evicted = []
+            for fingerprint, size in rows:
+                if total_size <= self._max_size_bytes:
+                    break
+                evicted.append((fingerprint,))
+                total_size -= size
+            self._connection.executemany("DELETE FROM responses WHERE fingerprint = ?", evicted)
+            self.stats.evictions += len(evicted)
+        self._connection.commit()
+
+    async def _get_or_generate_async(self, fingerprint: str, generate_async: Callable[[], Awaitable[str]]) -> str:
+        cached = await asyncio.to_thread(self._get, fingerprint)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+
+        in_flight = self._in_flight.get(fingerprint)
+        if in_flight is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+            in_flight = self._start_request(fingerprint, generate_async)
+        return await asyncio.shield(in_flight)
+
+    def _start_request(self, fingerprint: str, generate_async: Callable[[], Awaitable[str]]) -> asyncio.Task[str]:
+        """Run a request in a task of its own, which identical requests wait on until it is stored."""
+        async def run_async() -> str:
+            response = await generate_async()
+            await asyncio.to_thread(self._put, fingerprint, response)
+            return response
+
+        def on_done(task: asyncio.Task[str]) -> None:
+            del self._in_flight[fingerprint]
+            # Waiters re-raise the exception; mark it retrieved for when there are none
+            if not task.cancelled():
+                task.exception()
+
+        task = asyncio.create_task(run_async())
+        self._in_flight[fingerprint] = task
+        task.add_done_callback(on_done)
+        return task
+
+    def _get(self, fingerprint: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response, created FROM responses WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created = row
+            now = time.time()
+            if self._ttl_seconds is not None and created < now - self._ttl_seconds:
+                return None
+            self._connection.execute("UPDATE responses SET last_used = ? WHERE fingerprint = ?", (now, fingerprint))
+            self._connection.commit()
+            return response
+
+    def _put(self, fingerprint: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (fingerprint, response, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, response, len(response.encode('utf-8')), now, now)
+            )
+            self._connection.commit()
+            self._clear_expired()
+        logging.debug(f"Cached LLM response {fingerprint}")
@@ -1,7 +1,16 @@
 from abc import ABC, abstractmethod
-from openai import AsyncClient
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import random
+import httpx
+from openai import AsyncClient, APIConnectionError, InternalServerError, RateLimitError
 from pydantic import BaseModel
-from typing import TypeVar, Type
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar, Type
+
+from .instrumentation import count, span
+from .rate_limiter import RateLimiter, get_retry_after
+from .source_retriever import estimate_tokens
 
 T = TypeVar('T', bound=BaseModel)
 
@@ -14,17 +23,58 @@ class LLMClient(ABC):
     async def generate_model_async(self, prompt: str, model_type: Type[T]) -> T:
         pass
 
+    async def stream_model_json_async(self, prompt: str, model_type: Type[T]) -> AsyncIterator[str]:
+        """Stream the JSON of a model_type instance in chunks as it is generated.
+
+        Clients that cannot stream yield the whole JSON of generate_model_async at once.
+        """
+        model = await self.generate_model_async(prompt, model_type)
+        yield model.model_dump_json()
+
 class OpenAILLMClient(LLMClient):
-    def __init__(self, api_key: str, model: str = 'gpt-4o'):
+    """LLMClient using OpenAI's chat completions API.
+
+    With a `rate_limiter`, every request waits for its turn in the limiter's shared
+    budget, charged with an estimate of its prompt tokens that is corrected once the
+    actual usage is known. The limiter learns from the rate limit headers of every
+    response, and requests that are rate limited anyway are retried by this client, up
+    to `max_rate_limit_retries` times, instead of by the SDK behind the limiter's back.
+    Connection errors, timeouts and server errors are then retried by this client too,
+    up to `max_retries` times with jittered exponential backoff, outside the limiter.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = 'gpt-4o',
+        rate_limiter: RateLimiter | None = None,
+        max_rate_limit_retries: int = 5,
+        http_client: httpx.AsyncClient | None = None,
+        max_retries: int = 2,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 8.0
+    ):
         self.api_key = api_key
         self.model = model
-        self.client = AsyncClient(api_key=self.api_key)
+        self.rate_limiter = rate_limiter
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.client = AsyncClient(
+            api_key=self.api_key,
+            http_client=http_client,
+            **({'max_retries': 0} if rate_limiter is not None else {})
+        )
 
     async def generate_text_async(self, prompt: str) -> str:
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-        )
+        with span('llm.request', model=self.model, output='text') as attributes:
+            async with self._request_async(prompt, lambda: self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+            )) as raw_response:
+                response = raw_response.parse()
+                self._record_usage(prompt, response.usage, attributes)
 
         if response.choices[0].message.content is None:
             raise Exception("No content returned from the LLM")
@@ -32,16 +82,15 @@ class OpenAILLMClient(LLMClient):
         return response.choices[0].message.content
 
     async def generate_model_async(self, prompt: str, model_type: Type[T]) -> T:
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            functions=[{
-                "name": "generate_model",
-                "description": "Generate a pydantic model",
-                "parameters": model_type.model_json_schema()
-            }],
-            function_call={"name": "generate_model"}
-        )
+        with span('llm.request', model=self.model, output=model_type.__name__) as attributes:
+            async with self._request_async(prompt, lambda: self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                functions=[self._get_model_function(model_type)],
+                function_call={"name": "generate_model"}
+            )) as raw_response:
+                response = raw_response.parse()
+                self._record_usage(prompt, response.usage, attributes)
 
         if response.choices[0].message.function_call is None:
             raise Exception("No function call returned from the LLM")
@@ -50,3 +99,77 @@ class OpenAILLMClient(LLMClient):
             raise Exception("No arguments returned from the LLM")
 
         return model_type.model_validate_json(response.choices[0].message.function_call.arguments)
+
+    async def stream_model_json_async(self, prompt: str, model_type: Type[T]) -> AsyncIterator[str]:
+        with span('llm.stream', model=self.model, output=model_type.__name__) as attributes:
+            # The concurrency slot is held until the stream is finished
+            async with self._request_async(prompt, lambda: self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                functions=[self._get_model_function(model_type)],
+                function_call={"name": "generate_model"},
+                stream=True,
+                # The last chunk then carries the token usage and no choices
+                stream_options={"include_usage": True}
+            )) as raw_response:
+                async for chunk in raw_response.parse():
+                    if chunk.usage is not None:
+                        self._record_usage(prompt, chunk.usage, attributes)
+                    if not chunk.choices:
+                        continue
+                    function_call = chunk.choices[0].delta.function_call
+                    if function_call is not None and function_call.arguments:
+                        yield function_call.arguments
+
+    @asynccontextmanager
+    async def _request_async(self, prompt: str, create: Callable[[], Awaitable[Any]]) -> AsyncIterator[Any]:
+        """Send a request through the rate limiter, if there is one, and yield its raw response."""
+        if self.rate_limiter is None:
+            yield await create()
+            return
+
+        attempt = 0
+        failures = 0
+        while True:
+            async with self.rate_limiter.limit(estimate_tokens(prompt)):
+                try:
+                    raw_response = await create()
+                except RateLimitError as e:
+                    self.rate_limiter.on_rate_limited(get_retry_after(e.response.headers), e.response.headers)
+                    if attempt >= self.max_rate_limit_retries:
+                        raise
+                    attempt += 1
+                    continue
+                except (APIConnectionError, InternalServerError) as e:
+                    if failures >= self.max_retries:
+                        raise
+                    error = e
+                else:
+                    self.rate_limiter.on_success(raw_response.headers)
+                    yield raw_response
+                    return
+            # The slot is only held while a request runs, so backing off never blocks other requests
+            delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** failures))
+            failures += 1
+            logging.warning(
+                f"LLM request failed ({error!r}), retrying in {delay:.2f}s (attempt {failures}/{self.max_retries})"
+            )
+            await asyncio.sleep(delay)
+
+    def _record_usage(self, prompt: str, usage, attributes: dict) -> None:
+        if usage is None:
+            return
+        if self.rate_limiter is not None:
+            self.rate_limiter.adjust_units(usage.total_tokens - estimate_tokens(prompt))
+        attributes['prompt_tokens'] = usage.prompt_tokens
+        attributes['completion_tokens'] = usage.completion_tokens
+        count('llm.prompt_tokens', usage.prompt_tokens)
+        count('llm.completion_tokens', usage.completion_tokens)
+
+    @staticmethod
+    def _get_model_function(model_type: Type[T]) -> dict:
+        return {
+            "name": "generate_model",
+            "description": "Generate a pydantic model",
+            "parameters": model_type.model_json_schema()
+        }
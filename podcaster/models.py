@@ -1,6 +1,24 @@
+import hashlib
+import mmap
+import os
+import re
 from enum import Enum
 from typing import Literal, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+_UNSAFE_NAME_CHARACTERS = re.compile(r'[^\w\-. ]')
+
+def get_safe_file_name(name: str) -> str:
+    """Return a file name for `name` that no other name maps to.
+
+    Spaces become underscores. When that cannot be undone, because the name has
+    underscores or characters that are unsafe in file names, or the result would only
+    be dots, a hash of the name is appended.
+    """
+    slug = _UNSAFE_NAME_CHARACTERS.sub('_', name).replace(' ', '_')
+    if slug.replace('_', ' ') != name or not slug.strip('.'):
+        slug = f"{slug}-{hashlib.sha256(name.encode('utf-8')).hexdigest()[:8]}"
+    return slug
 
 class Voice(Enum):
     ALLOY = "alloy"
@@ -19,6 +37,7 @@ class Host(BaseModel):
 class TranscriptItem(BaseModel):
     type: str = Field(description="The type of the item in the transcript.")
     order: int = Field(description="The order of the item in the transcript. To have people speak at the same time, they should have the same order.")
+    offset: float = Field(default=0.0, description="Seconds to shift the start of the item by, relative to the start of its order. A negative offset makes the speaker cut in before the previous order has finished.")
 
 class SpeechTranscriptItem(TranscriptItem):
     type: Literal["speech"] = Field(description="The type of the item in the transcript.")
@@ -36,8 +55,63 @@ class Transcript(BaseModel):
     hosts: list[Host] = Field(description="The hosts of the podcast.")
     items: list[TranscriptItemType] = Field(description="The items in the transcript.")
 
+    def get_slug(self) -> str:
+        """Return the name of the transcript's files, which no other title maps to."""
+        return get_safe_file_name(self.title)
+
+class TranscriptSection(BaseModel):
+    items: list[TranscriptItemType] = Field(description="The items in this section of the transcript.")
+
 class Source(BaseModel):
     text: str = Field(description="The text of the source.")
+    _content_hash: str | None = PrivateAttr(default=None)
+
+    def get_content_hash(self) -> str:
+        """Return the SHA-256 of the source's text, computed on first use."""
+        if self._content_hash is None:
+            self._content_hash = self._hash_content()
+        return self._content_hash
+
+    def _hash_content(self) -> str:
+        return hashlib.sha256(self.text.encode('utf-8')).hexdigest()
 
 class TextFileSource(Source):
     filepath: str = Field(description="The filepath of the source.")
+
+class MappedTextFileSource(TextFileSource):
+    """A TextFileSource that memory-maps its file and decodes the text only when accessed.
+
+    The text lives in the file, so it is left out of dumps and a dumped source is
+    loaded again from its filepath.
+    """
+
+    text: str = Field(default='', exclude=True, description="The text of the source, decoded from the file on access.")
+    _content_stamp: tuple[int, int] | None = PrivateAttr(default=None)
+
+    def read_text(self) -> str:
+        """Decode the text of the file."""
+        with open(self.filepath, 'rb') as file:
+            if file.seek(0, 2) == 0:
+                return ''
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return str(mapped, 'utf-8')
+
+    def get_content_hash(self) -> str:
+        """Return the SHA-256 of the file's text, hashed again whenever the file changes."""
+        stat = os.stat(self.filepath)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self._content_stamp != stamp:
+            self._content_hash = self._hash_content()
+            self._content_stamp = stamp
+        return self._content_hash
+
+    def _hash_content(self) -> str:
+        # The file holds the UTF-8 encoded text, so it is hashed without being decoded
+        with open(self.filepath, 'rb') as file:
+            if file.seek(0, 2) == 0:
+                return hashlib.sha256(b'').hexdigest()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+
+# Set after the class is built, where pydantic would otherwise take the property for the field's default
+MappedTextFileSource.text = property(MappedTextFileSource.read_text, doc="The text of the source, decoded on each access.")
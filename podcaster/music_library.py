@@ -0,0 +1,180 @@
+import hashlib
+import io
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+from pydantic import BaseModel, Field
+
+from podcaster.models import MusicThemeTranscriptItem, get_safe_file_name
+from .audio_normalizer import AudioFormat, remix, resample
+from .wav_reader import WAVE_FORMAT_PCM, WavInfo, encode_samples, write_wav_header
+
+MUSIC_CLIP_PREFIX = 'music_'
+
+# A gain envelope: the frame positions of its breakpoints and the gain at each of them
+GainEnvelope = tuple[np.ndarray, np.ndarray]
+
+class MusicMix(BaseModel):
+    gain: float = Field(default=1.0, description="The gain of a theme while nothing else plays.")
+    duck_gain: float = Field(default=0.25, description="The gain of a theme while speech of the same order plays.")
+    duck_seconds: float = Field(default=0.3, description="The length of the ramps into and out of the ducked gain.")
+    fade_in_seconds: float = Field(default=0.5, description="The length of the fade in at the start of a theme.")
+    fade_out_seconds: float = Field(default=1.0, description="The length of the fade out at the end of a theme.")
+
+def get_music_clip_name(item: MusicThemeTranscriptItem) -> str:
+    """Return the name of the clip a music theme item is placed as."""
+    return f"{item.order}-{MUSIC_CLIP_PREFIX}{get_safe_file_name(item.theme)}.wav"
+
+def is_music_clip(clip_name: str) -> bool:
+    return clip_name.split('-', 1)[-1].startswith(MUSIC_CLIP_PREFIX)
+
+def get_music_envelope(mix: MusicMix, sample_rate: int, clip_frames: int, speech_frames: int) -> GainEnvelope:
+    """Compute the gain breakpoints of a theme that shares its slot with speech_frames of speech.
+
+    The theme fades in and out at its edges and is ducked while the speech plays. The
+    breakpoints are combined by taking the smallest gain of the fades and the duck at
+    every breakpoint, which is exact because each of them is piecewise linear between
+    the union of their breakpoints.
+    """
+    last = max(clip_frames - 1, 0)
+    fade_in = min(int(mix.fade_in_seconds * sample_rate), last)
+    fade_out = min(int(mix.fade_out_seconds * sample_rate), last)
+    fade_positions = np.array([0, fade_in, last - fade_out, last], dtype=np.float64)
+    fade_gains = np.array([0.0 if fade_in else 1.0, 1.0, 1.0, 0.0 if fade_out else 1.0])
+
+    if speech_frames > 0:
+        ramp = int(mix.duck_seconds * sample_rate)
+        duck_positions = np.array([0, speech_frames, speech_frames + ramp], dtype=np.float64)
+        duck_gains = np.array([mix.duck_gain, mix.duck_gain, 1.0])
+    else:
+        duck_positions = np.array([0.0])
+        duck_gains = np.array([1.0])
+
+    positions = np.unique(np.concatenate((fade_positions, duck_positions)))
+    positions = positions[positions <= last]
+    gains = np.minimum(
+        np.interp(positions, fade_positions, fade_gains),
+        np.interp(positions, duck_positions, duck_gains)
+    ) * mix.gain
+    return positions, gains
+
+def apply_gain_envelope(block: np.ndarray, start: int, envelope: GainEnvelope) -> None:
+    """Scale the (frames, channels) block that starts at frame `start` of its clip in place."""
+    positions, gains = envelope
+    block *= np.interp(np.arange(start, start + len(block)), positions, gains).astype(block.dtype)[:, None]
+
+def get_group_envelopes(
+    clip_names: list[str],
+    clip_infos: list[WavInfo],
+    mix: MusicMix
+) -> list[GainEnvelope | None]:
+    """Return the gain envelope of each clip of an order group; None for clips played as is."""
+    speech_frames = max(
+        (info.frame_count for name, info in zip(clip_names, clip_infos) if not is_music_clip(name)),
+        default=0
+    )
+    return [
+        get_music_envelope(mix, info.sample_rate, info.frame_count, speech_frames) if is_music_clip(name) else None
+        for name, info in zip(clip_names, clip_infos)
+    ]
+
+class MusicThemeLibrary:
+    """Maps theme names to the audio assets in `theme_directory`.
+
+    An asset is any file soundfile can decode whose name without its extension is the
+    theme name. Assets are decoded once into PCM WAV in `target_format` and cached by
+    their path, size and modification time, so every episode reuses the same decoded
+    stinger. Themes are placed in clip directories as hardlinks to the cached file, which
+    the stitchers then memory-map.
+    """
+
+    def __init__(
+        self,
+        theme_directory: str = 'themes',
+        cache_directory: str = 'output/cache/themes',
+        target_format: AudioFormat | None = None
+    ):
+        self._theme_directory = Path(theme_directory)
+        self._cache_directory = Path(cache_directory)
+        # The TTS API returns 24 kHz mono 16-bit PCM
+        self._target_format = target_format or AudioFormat(sample_rate=24000, channels=1)
+        self._extensions = {f".{extension.lower()}" for extension in sf.available_formats()}
+
+    def get_theme_names(self) -> list[str]:
+        """Return the names of the themes in the library."""
+        if not self._theme_directory.is_dir():
+            return []
+        return sorted(
+            path.stem for path in self._theme_directory.iterdir()
+            if path.suffix.lower() in self._extensions
+        )
+
+    def has_theme(self, theme: str) -> bool:
+        """Return whether the library has an asset for a theme."""
+        return theme in self.get_theme_names()
+
+    def get_theme_path(self, theme: str) -> Path:
+        """Return the path of the decoded theme, decoding it if it is not cached yet."""
+        asset_path = self._find_asset(theme)
+        stat = asset_path.stat()
+        key = hashlib.sha256(
+            f"{asset_path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\0{self._target_format.model_dump_json()}".encode('utf-8')
+        ).hexdigest()
+        cached_path = self._cache_directory / f"{get_safe_file_name(theme)}-{key[:16]}.wav"
+        if not cached_path.exists():
+            self._decode(asset_path, cached_path)
+        return cached_path
+
+    def place_theme(self, item: MusicThemeTranscriptItem, output_dir: Path) -> Path:
+        """Place the decoded theme of an item in a clip directory."""
+        cached_path = self.get_theme_path(item.theme)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / get_music_clip_name(item)
+        # Never write through an existing file: it may be a hardlink to the cached theme.
+        # The theme is placed under a temporary name and renamed, so the clip is never partial.
+        temp_path = output_dir / f".{output_file.name}.tmp"
+        temp_path.unlink(missing_ok=True)
+        try:
+            os.link(cached_path, temp_path)
+        except OSError:
+            shutil.copyfile(cached_path, temp_path)
+        os.replace(temp_path, output_file)
+        return output_file
+
+    def read_theme_bytes(self, theme: str) -> bytes:
+        """Return the decoded theme as an in-memory WAV file."""
+        return self.get_theme_path(theme).read_bytes()
+
+    def _find_asset(self, theme: str) -> Path:
+        if self._theme_directory.is_dir():
+            for path in sorted(self._theme_directory.iterdir()):
+                if path.stem == theme and path.suffix.lower() in self._extensions:
+                    return path
+        raise FileNotFoundError(f"No audio asset found for music theme '{theme}' in {self._theme_directory}.")
+
+    def _decode(self, asset_path: Path, cached_path: Path) -> None:
+        frames, sample_rate = sf.read(asset_path, dtype='float32', always_2d=True)
+        target = self._target_format
+        frames = resample(remix(frames, target.channels), sample_rate, target.sample_rate)
+        info = WavInfo(
+            format_tag=WAVE_FORMAT_PCM,
+            channels=target.channels,
+            sample_rate=target.sample_rate,
+            bits_per_sample=target.bits_per_sample,
+            data_offset=0,
+            frame_count=len(frames)
+        )
+
+        output = io.BytesIO()
+        write_wav_header(output, info)
+        output.write(encode_samples(frames, info).tobytes())
+
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cached_path.with_suffix('.tmp')
+        temp_path.write_bytes(output.getvalue())
+        os.replace(temp_path, cached_path)
+        logging.info(f"Decoded music theme {asset_path} into {cached_path}")
@@ -0,0 +1,12 @@
+def split_outline(outline: str) -> tuple[str, list[str]]:
+    """Split an outline into its title (the first non-empty line) and its sections.
+
+    Every following non-empty line is a section. An outline with a single line is
+    treated as one section with that line as its title.
+    """
+    lines = [line.strip() for line in outline.splitlines() if line.strip()]
+    if not lines:
+        return '', []
+    if len(lines) == 1:
+        return lines[0], lines
+    return lines[0], lines[1:]
@@ -1,5 +1,10 @@
+import hashlib
+import os
 from abc import ABC, abstractmethod
-from jinja2 import Environment, FileSystemLoader
+from collections import OrderedDict
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from podcaster.models import Source
 
 class PromptRenderer(ABC):
     @abstractmethod
@@ -7,9 +12,47 @@ class PromptRenderer(ABC):
         pass
 
 class JinjaPromptRenderer(PromptRenderer):
-    def __init__(self, template_folder: str):
-        self.env = Environment(loader=FileSystemLoader(template_folder))
+    """Renders prompts from the Jinja templates in `template_folder`.
+
+    Templates are compiled once per process, and with a `cache_directory` their bytecode
+    is kept on disk so later processes skip parsing them. Templates render their sources
+    through the render_sources global, which memoizes the rendered block of the
+    `max_source_blocks` most recently used source lists by the hash of their content, so
+    generating many episodes from one corpus renders it once. The templates put this
+    block and the other shared content before anything specific to an episode, so
+    prompts built from the same sources share a prefix the LLM provider can cache.
+    """
+
+    def __init__(
+        self,
+        template_folder: str,
+        cache_directory: str | None = 'output/cache/jinja',
+        max_source_blocks: int = 16
+    ):
+        bytecode_cache = None
+        if cache_directory is not None:
+            os.makedirs(cache_directory, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(cache_directory)
+        # Templates are not reloaded when they change on disk, so they are never stat'ed again
+        self.env = Environment(loader=FileSystemLoader(template_folder), bytecode_cache=bytecode_cache, auto_reload=False)
+        self.env.globals['render_sources'] = self.render_sources
+        self._max_source_blocks = max_source_blocks
+        self._source_blocks: OrderedDict[str, str] = OrderedDict()
 
     def render_prompt(self, template_name: str, context: dict) -> str:
         template = self.env.get_template(template_name)
         return template.render(context)
+
+    def render_sources(self, sources: list[Source]) -> str:
+        """Render a list of sources with the sources.jinja template, reusing the block rendered for the same content."""
+        key = hashlib.sha256('\0'.join(source.get_content_hash() for source in sources).encode('ascii')).hexdigest()
+        block = self._source_blocks.get(key)
+        if block is not None:
+            self._source_blocks.move_to_end(key)
+            return block
+
+        block = self.env.get_template('sources.jinja').render(sources=sources)
+        self._source_blocks[key] = block
+        while len(self._source_blocks) > self._max_source_blocks:
+            self._source_blocks.popitem(last=False)
+        return block
@@ -0,0 +1,33 @@
+import os
+from pydub import AudioSegment
+
+from .audio_stitcher import AudioClipStitcher, group_wav_files_by_order
+
+class PydubAudioClipStitcher(AudioClipStitcher):
+    async def stitch_audio_clips_async(
+        self,
+        input_directory: str,
+        output_directory: str,
+        output_file_name: str
+    ) -> None:
+        # Collect the clips in the input directory, grouped by their order prefix
+        grouped_files = group_wav_files_by_order(input_directory)
+
+        # Initialize the final audio segment
+        final_audio = AudioSegment.empty()
+
+        # Process each group in order
+        for order in sorted(grouped_files.keys()):
+            combined_segment = AudioSegment.empty()
+            for wav_file in grouped_files[order]:
+                audio_path = os.path.join(input_directory, wav_file)
+                audio_segment = AudioSegment.from_wav(audio_path)
+                combined_segment = combined_segment.overlay(audio_segment)
+            final_audio += combined_segment
+
+        # Ensure the output directory exists
+        os.makedirs(output_directory, exist_ok=True)
+
+        # Export the final stitched audio file
+        output_path = os.path.join(output_directory, output_file_name)
+        final_audio.export(output_path, format='wav')
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Mapping
+
+from pydantic import BaseModel, Field
+
+from .instrumentation import count
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_SECONDS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+class RateLimiterStats(BaseModel):
+    requests: int = Field(default=0, description="The number of requests let through.")
+    rate_limited: int = Field(default=0, description="The number of rate limit errors reported.")
+    wait_seconds: float = Field(default=0.0, description="The total time requests waited for their turn.")
+
+def parse_reset_duration(value: str) -> float | None:
+    """Parse a rate limit reset duration such as '1s', '6m0s' or '20ms' into seconds."""
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return _parse_float(value)
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+class _TokenBucket:
+    """A token bucket refilled at `rate` per second, holding at most `capacity` tokens.
+
+    Amounts larger than the capacity are let through once the bucket is full and leave
+    it in debt, which later acquisitions wait out. Waiters are served in order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        # The rate this limiter was configured with, which may be a share of the provider's limit
+        self.configured = rate
+        # The rate to recover towards after backing off: the configured one, or the provider's limit if lower
+        self.ceiling = rate
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire_async(self, amount: float) -> None:
+        async with self._lock:
+            self.refill()
+            needed = min(amount, self.capacity)
+            while self.level < needed:
+                await asyncio.sleep((needed - self.level) / self.rate)
+                self.refill()
+            self.level -= amount
+
+class RateLimiter:
+    """Shares one request and unit budget between every client it is injected into.
+
+    Requests are limited to `requests_per_period` and units (tokens or characters) to
+    `units_per_period` per `period_seconds`, each with a token bucket that allows bursts
+    of `burst_seconds` worth of budget, and to `max_concurrency` in flight. The rates
+    adapt: the limits in x-ratelimit-* response headers cap the ceiling (never above the
+    configured rates, which may be one worker's share of the provider's limit) and the
+    remaining budget drains the buckets, a rate limit error halves the rates (down to
+    `min_rate_fraction` of the ceiling) and pauses every request until the error's
+    retry-after has passed, and each success raises them again by `recovery_fraction`
+    of the ceiling.
+    """
+
+    def __init__(
+        self,
+        requests_per_period: float | None = None,
+        units_per_period: float | None = None,
+        max_concurrency: int | None = None,
+        period_seconds: float = 60.0,
+        burst_seconds: float = 1.0,
+        unit_header: str = 'tokens',
+        min_rate_fraction: float = 0.1,
+        recovery_fraction: float = 0.05
+    ):
+        self._period_seconds = period_seconds
+        self._burst_seconds = burst_seconds
+        self._unit_header = unit_header
+        self._min_rate_fraction = min_rate_fraction
+        self._recovery_fraction = recovery_fraction
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._requests = self._create_bucket(requests_per_period)
+        self._units = self._create_bucket(units_per_period)
+        self._paused_until = 0.0
+        self.stats = RateLimiterStats()
+
+    @asynccontextmanager
+    async def limit(self, units: float = 0) -> AsyncIterator[None]:
+        """Wait for a turn to send a request of `units` tokens or characters, and hold a concurrency slot while it runs."""
+        async with self._semaphore or nullcontext():
+            start = time.monotonic()
+            while (delay := self._paused_until - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            if self._requests is not None:
+                await self._requests.acquire_async(1)
+            if self._units is not None and units:
+                await self._units.acquire_async(units)
+            waited = time.monotonic() - start
+            self.stats.requests += 1
+            self.stats.wait_seconds += waited
+            count('rate_limiter.wait_seconds', waited)
+            yield
+
+    def adjust_units(self, delta: float) -> None:
+        """Charge (or refund, if negative) units once a request's actual usage is known."""
+        if self._units is not None and delta:
+            self._units.refill()
+            self._units.level -= delta
+
+    def on_success(self, headers: Mapping[str, str] | None = None) -> None:
+        """Recover the rates after a successful request and learn from its response headers."""
+        if headers is not None:
+            self._update_bucket(self._requests, headers, 'requests')
+            self._update_bucket(self._units, headers, self._unit_header)
+        for bucket in (self._requests, self._units):
+            if bucket is not None:
+                self._set_rate(bucket, min(bucket.ceiling, bucket.rate + bucket.ceiling * self._recovery_fraction))
+
+    def on_rate_limited(self, retry_after_seconds: float | None = None, headers: Mapping[str, str] | None = None) -> None:
+        """Back off after a rate limit error."""
+        self.stats.rate_limited += 1
+        count('rate_limiter.rate_limited')
+        if headers is not None:
+            self._update_bucket(self._requests, headers, 'requests')
+            self._update_bucket(self._units, headers, self._unit_header)
+        for bucket in (self._requests, self._units):
+            if bucket is not None:
+                self._set_rate(bucket, max(bucket.ceiling * self._min_rate_fraction, bucket.rate / 2))
+        if retry_after_seconds:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after_seconds)
+        logging.warning(
+            f"Rate limited, backing off for {retry_after_seconds or 0:.2f}s "
+            f"({self.get_requests_per_period() or 'unlimited'} requests per period)"
+        )
+
+    def get_requests_per_period(self) -> float | None:
+        return self._requests.rate * self._period_seconds if self._requests is not None else None
+
+    def get_units_per_period(self) -> float | None:
+        return self._units.rate * self._period_seconds if self._units is not None else None
+
+    def _create_bucket(self, per_period: float | None) -> _TokenBucket | None:
+        if per_period is None:
+            return None
+        rate = per_period / self._period_seconds
+        return _TokenBucket(rate, max(1.0, rate * self._burst_seconds))
+
+    def _set_rate(self, bucket: _TokenBucket, rate: float) -> None:
+        bucket.refill()
+        bucket.rate = rate
+        bucket.capacity = max(1.0, rate * self._burst_seconds)
+        bucket.level = min(bucket.level, bucket.capacity)
+
+    def _update_bucket(self, bucket: _TokenBucket | None, headers: Mapping[str, str], name: str) -> None:
+        if bucket is None:
+            return
+        limit = _parse_float(headers.get(f'x-ratelimit-limit-{name}'))
+        if limit is not None:
+            bucket.ceiling = min(bucket.configured, limit / self._period_seconds)
+            if bucket.rate > bucket.ceiling:
+                self._set_rate(bucket, bucket.ceiling)
+        remaining = _parse_float(headers.get(f'x-ratelimit-remaining-{name}'))
+        if remaining is not None:
+            # Never plan to spend more than the provider says is left
+            bucket.refill()
+            bucket.level = min(bucket.level, remaining)
+
+def get_retry_after(headers: Mapping[str, str]) -> float | None:
+    """Return how long a rate limit response asks to wait, in seconds."""
+    retry_after_ms = _parse_float(headers.get('retry-after-ms'))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    retry_after = _parse_float(headers.get('retry-after'))
+    if retry_after is not None:
+        return retry_after
+    reset = headers.get('x-ratelimit-reset-requests')
+    return parse_reset_duration(reset) if reset is not None else None
+
+def _parse_float(value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -1,7 +1,11 @@
+import asyncio
+import glob
+import os
 import aiofiles
 from abc import ABC, abstractmethod
 
-from podcaster.models import Source, TextFileSource
+from podcaster.models import MappedTextFileSource, Source, TextFileSource
+from .instrumentation import count, span
 
 
 class SourceRepository(ABC):
@@ -10,14 +14,55 @@ class SourceRepository(ABC):
         pass
 
 class TextFileSourceRepository(SourceRepository):
-    def __init__(self, filepaths: list[str]):
+    """Loads sources from text files.
+
+    Entries may be files, directories (searched recursively for `pattern`) or glob
+    patterns. Files are read concurrently, at most `max_concurrency` at a time. With
+    `lazy` enabled nothing is read up front; each source memory-maps its file and only
+    decodes it when its text is accessed.
+    """
+
+    def __init__(
+        self,
+        filepaths: list[str],
+        max_concurrency: int = 64,
+        lazy: bool = False,
+        pattern: str = '*.txt'
+    ):
         self._filepaths = filepaths
+        self._max_concurrency = max_concurrency
+        self._lazy = lazy
+        self._pattern = pattern
 
     async def load_sources_async(self) -> list[Source]:
-        sources: list[Source] = []
-        for filepath in self._filepaths:
-            async with aiofiles.open(filepath, 'r', encoding='utf-8') as file:
-                text = await file.read()
-                sources.append(TextFileSource(text=text, filepath=filepath))
+        filepaths = self._expand_filepaths()
+
+        if self._lazy:
+            for filepath in filepaths:
+                if not os.path.isfile(filepath):
+                    raise FileNotFoundError(f"Source file {filepath} not found.")
+            return [MappedTextFileSource(filepath=filepath) for filepath in filepaths]
+
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def load_source_async(filepath: str) -> Source:
+            async with semaphore:
+                async with aiofiles.open(filepath, 'r', encoding='utf-8') as file:
+                    text = await file.read()
+            return TextFileSource(text=text, filepath=filepath)
+
+        with span('sources.load', files=len(filepaths)):
+            sources = list(await asyncio.gather(*(load_source_async(filepath) for filepath in filepaths)))
+        count('sources.characters', sum(len(source.text) for source in sources))
         return sources
 
+    def _expand_filepaths(self) -> list[str]:
+        filepaths: list[str] = []
+        for filepath in self._filepaths:
+            if os.path.isdir(filepath):
+                filepaths.extend(sorted(glob.glob(os.path.join(filepath, '**', self._pattern), recursive=True)))
+            elif any(char in filepath for char in '*?['):
+                filepaths.extend(sorted(glob.glob(filepath, recursive=True)))
+            else:
+                filepaths.append(filepath)
+        return filepaths
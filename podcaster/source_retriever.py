@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from pydantic import Field
+
+from podcaster.models import Source, TextFileSource
+from .outline import split_outline
+
+_INDEX_VERSION = 1
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this "
+    "to was were will with".split()
+)
+
+class SourceChunk(Source):
+    source_key: str = Field(description="The key of the source the chunk was taken from.")
+    index: int = Field(description="The position of the chunk within its source.")
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, tokenizer-free estimate of the number of LLM tokens in text."""
+    return math.ceil(len(text) / 4)
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase terms for lexical matching."""
+    return [term for term in _TOKEN_PATTERN.findall(text.lower()) if term not in _STOPWORDS]
+
+def chunk_text(text: str, chunk_tokens: int) -> list[str]:
+    """Split text into chunks of roughly chunk_tokens tokens, preferring paragraph breaks."""
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        # Paragraphs that are too long on their own are split between words
+        pieces = [paragraph]
+        if estimate_tokens(paragraph) > chunk_tokens:
+            words = paragraph.split()
+            words_per_piece = max(1, len(words) * chunk_tokens // estimate_tokens(paragraph))
+            pieces = [' '.join(words[i:i + words_per_piece]) for i in range(0, len(words), words_per_piece)]
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > chunk_tokens:
+                chunks.append('\n\n'.join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+class BM25SourceIndex:
+    """Persistent BM25 index over chunks of sources.
+
+    Sources are keyed by file path (or content hash for sources without a file) and
+    fingerprinted by modification time and size, so an update only re-chunks sources
+    that changed since the index was last saved. It is safe to update and search from
+    several threads at once.
+    """
+
+    def __init__(self, index_path: str = 'output/index/sources.json', chunk_tokens: int = 300, k1: float = 1.5, b: float = 0.75):
+        self._index_path = Path(index_path)
+        self._chunk_tokens = chunk_tokens
+        self._k1 = k1
+        self._b = b
+        self._documents: dict[str, dict] = {}
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._chunks: list[tuple[str, int, str, int]] = []
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def update(self, sources: list[Source]) -> None:
+        """Bring the index in line with sources, re-chunking only changed ones, and save it."""
+        with self._lock:
+            self._update(sources)
+
+    def _update(self, sources: list[Source]) -> None:
+        self._load()
+        documents: dict[str, dict] = {}
+        changed = 0
+        for source in sources:
+            key, fingerprint = self._get_key_and_fingerprint(source)
+            document = self._documents.get(key)
+            if document is None or document['fingerprint'] != fingerprint:
+                document = {
+                    'fingerprint': fingerprint,
+                    'chunks': [
+                        {'text': chunk, 'terms': Counter(tokenize(chunk))}
+                        for chunk in chunk_text(source.text, self._chunk_tokens)
+                    ]
+                }
+                changed += 1
+            documents[key] = document
+
+        removed = len(self._documents.keys() - documents.keys())
+        self._documents = documents
+        self._build_postings()
+        if changed or removed:
+            logging.info(f"Source index: {changed} sources (re)indexed, {removed} removed, {len(self._chunks)} chunks")
+            self._save()
+
+    def search(self, query: str, limit: int | None = None) -> list[tuple[float, SourceChunk]]:
+        """Return the chunks matching query with their BM25 scores, best first."""
+        with self._lock:
+            return self._search(query, limit)
+
+    def _search(self, query: str, limit: int | None) -> list[tuple[float, SourceChunk]]:
+        if not self._chunks:
+            return []
+        average_length = sum(chunk[3] for chunk in self._chunks) / len(self._chunks)
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self._chunks) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings:
+                length = self._chunks[chunk_id][3]
+                norm = self._k1 * (1 - self._b + self._b * length / average_length)
+                scores[chunk_id] += idf * frequency * (self._k1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        results = []
+        for chunk_id, score in ranked:
+            source_key, index, text, _ = self._chunks[chunk_id]
+            results.append((score, SourceChunk(text=text, source_key=source_key, index=index)))
+        return results
+
+    @staticmethod
+    def _get_key_and_fingerprint(source: Source) -> tuple[str, str]:
+        if isinstance(source, TextFileSource):
+            stat = os.stat(source.filepath)
+            return source.filepath, f"{stat.st_mtime_ns}:{stat.st_size}"
+        digest = hashlib.sha256(source.text.encode('utf-8')).hexdigest()
+        return f"sha256:{digest}", digest
+
+    def _build_postings(self) -> None:
+        postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        chunks = []
+        for key in sorted(self._documents.keys()):
+            for index, chunk in enumerate(self._documents[key]['chunks']):
+                chunk_id = len(chunks)
+                chunks.append((key, index, chunk['text'], sum(chunk['terms'].values())))
+                for term, frequency in chunk['terms'].items():
+                    postings[term].append((chunk_id, frequency))
+        self._postings = dict(postings)
+        self._chunks = chunks
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self._index_path.exists():
+            return
+        data = json.loads(self._index_path.read_text(encoding='utf-8'))
+        if data.get('version') != _INDEX_VERSION or data.get('chunk_tokens') != self._chunk_tokens:
+            logging.info("Source index is out of date, rebuilding.")
+            return
+        self._documents = data['documents']
+
+    def _save(self) -> None:
+        self._index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self._index_path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps({
+            'version': _INDEX_VERSION,
+            'chunk_tokens': self._chunk_tokens,
+            'documents': self._documents,
+        }), encoding='utf-8')
+        os.replace(temp_path, self._index_path)
+
+class SourceRetriever:
+    """Selects the source chunks relevant to an outline, within a token budget.
+
+    The budget is shared evenly between the outline's sections; each section takes its
+    best-scoring chunks that are not already selected. Selected chunks are returned in
+    source order so the prompt reads coherently.
+    """
+
+    def __init__(self, index: BM25SourceIndex, token_budget: int = 8000):
+        self._index = index
+        self._token_budget = token_budget
+
+    async def select_sources_async(self, sources: list[Source], outline: Source) -> list[Source]:
+        return await asyncio.to_thread(self._select_sources, sources, outline)
+
+    def _select_sources(self, sources: list[Source], outline: Source) -> list[Source]:
+        self._index.update(sources)
+        title, sections = split_outline(outline.text)
+        if not sections:
+            sections = [title]
+
+        selected: dict[tuple[str, int], SourceChunk] = {}
+        section_budget = self._token_budget // len(sections)
+        for section in sections:
+            remaining = section_budget
+            for _, chunk in self._index.search(f"{title}\n{section}"):
+                chunk_id = (chunk.source_key, chunk.index)
+                if chunk_id in selected:
+                    continue
+                tokens = estimate_tokens(chunk.text)
+                if tokens > remaining:
+                    continue
+                selected[chunk_id] = chunk
+                remaining -= tokens
+                if remaining <= 0:
+                    break
+
+        return [selected[chunk_id] for chunk_id in sorted(selected.keys())]
@@ -1,31 +1,165 @@
+import asyncio
+import os
+import re
+import tempfile
+import aiofiles
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Any, Awaitable, Callable
 
-from podcaster.models import SpeechTranscriptItem, Transcript
+from podcaster.models import Host, SpeechTranscriptItem, Transcript
+from .instrumentation import count, span
 from .tts_client import TTSClient, Voice
+from .wav_reader import join_wav_buffers, join_wav_files
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+')
+
+# Runs one TTS request, e.g. within a concurrency limit and retry policy
+RequestRunner = Callable[[Callable[[], Awaitable[Any]]], Awaitable[Any]]
+
+async def run_request_directly(request: Callable[[], Awaitable[Any]]) -> Any:
+    return await request()
 
 class SpeechToAudioConverter(ABC):
     """Interface for converting a SpeechTranscriptItem to an audio file."""
 
     @abstractmethod
-    async def convert_speech_transcript_item_to_audio_async(self, transcript: Transcript, item: SpeechTranscriptItem, output_dir: Path):
-        """Convert a single SpeechTranscriptItem to an audio file."""
+    async def convert_speech_transcript_item_to_audio_async(
+        self,
+        transcript: Transcript,
+        item: SpeechTranscriptItem,
+        output_dir: Path,
+        run_request: RequestRunner = run_request_directly
+    ):
+        """Convert a single SpeechTranscriptItem to an audio file, making each TTS request through run_request."""
         pass
 
+    async def synthesize_speech_transcript_item_async(
+        self,
+        transcript: Transcript,
+        item: SpeechTranscriptItem,
+        run_request: RequestRunner = run_request_directly
+    ) -> bytes:
+        """Convert a single SpeechTranscriptItem to audio and return its bytes.
+
+        Converters that can only write files convert into a temporary directory and read
+        the clip back.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            await self.convert_speech_transcript_item_to_audio_async(transcript, item, Path(temp_dir), run_request)
+            async with aiofiles.open(Path(temp_dir) / f"{item.order}-{item.speaker_id}.wav", 'rb') as file:
+                return await file.read()
+
+def split_utterance(text: str, max_chars: int) -> list[str]:
+    """Split text into pieces of at most max_chars characters at sentence boundaries.
+
+    Sentences are packed greedily; a single sentence longer than max_chars is split
+    between words.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces: list[str] = []
+    current = ''
+    for sentence in _SENTENCE_BOUNDARY.split(text.strip()):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
 class DefaultSpeechToAudioConverter(SpeechToAudioConverter):
+    """Synthesizes each item into a single {order}-{speaker}.wav clip.
+
+    Utterances longer than `max_chunk_chars` are split at sentence boundaries, the pieces
+    are synthesized concurrently and their PCM is joined losslessly into the clip, so a
+    long monologue takes about as long as its longest sentence group. Every piece is a
+    request of its own to `run_request`, so it takes its own concurrency slot and a
+    failed piece is retried without the others.
+    """
 
-    def __init__(self, tts_client: TTSClient):
+    def __init__(self, tts_client: TTSClient, max_chunk_chars: int = 4096):
         self._tts_client = tts_client
+        self._max_chunk_chars = max_chunk_chars
 
-    async def convert_speech_transcript_item_to_audio_async(self, transcript: Transcript, item: SpeechTranscriptItem, output_dir: Path):
+    async def convert_speech_transcript_item_to_audio_async(
+        self,
+        transcript: Transcript,
+        item: SpeechTranscriptItem,
+        output_dir: Path,
+        run_request: RequestRunner = run_request_directly
+    ):
         output_dir.mkdir(parents=True, exist_ok=True)
         text = item.content
         speaker = item.speaker_id
         filename = f"{item.order}-{speaker}.wav"
         output_path = output_dir / filename
 
+        host = self._get_host(transcript, speaker)
+
+        pieces = split_utterance(text, self._max_chunk_chars)
+        with span('speech.item', order=item.order, speaker=speaker, pieces=len(pieces)) as attributes:
+            if len(pieces) == 1:
+                # Synthesize next to the clip and rename it into place, so an interrupted
+                # request never leaves a truncated clip behind
+                temp_path = output_dir / f".{filename}.tmp"
+                try:
+                    await run_request(lambda: self._tts_client.synthesize_speech_async(text, host.voice, temp_path))
+                    os.replace(temp_path, output_path)
+                finally:
+                    temp_path.unlink(missing_ok=True)
+            else:
+                piece_paths = [output_dir / f".{filename}.part{index}" for index in range(len(pieces))]
+                try:
+                    async with asyncio.TaskGroup() as task_group:
+                        for piece, piece_path in zip(pieces, piece_paths):
+                            task_group.create_task(run_request(
+                                lambda piece=piece, piece_path=piece_path: self._tts_client.synthesize_speech_async(
+                                    piece, host.voice, piece_path
+                                )
+                            ))
+                    await asyncio.to_thread(join_wav_files, piece_paths, output_path)
+                finally:
+                    for piece_path in piece_paths:
+                        if piece_path.exists():
+                            os.remove(piece_path)
+            size = output_path.stat().st_size
+            attributes['bytes'] = size
+            count('speech.bytes_written', size)
+
+    async def synthesize_speech_transcript_item_async(
+        self,
+        transcript: Transcript,
+        item: SpeechTranscriptItem,
+        run_request: RequestRunner = run_request_directly
+    ) -> bytes:
+        """Synthesize a single SpeechTranscriptItem and return its WAV bytes without touching disk."""
+        host = self._get_host(transcript, item.speaker_id)
+        pieces = split_utterance(item.content, self._max_chunk_chars)
+        with span('speech.item', order=item.order, speaker=item.speaker_id, pieces=len(pieces)):
+            buffers = await asyncio.gather(*(
+                run_request(lambda piece=piece: self._tts_client.synthesize_speech_bytes_async(piece, host.voice))
+                for piece in pieces
+            ))
+            if len(buffers) == 1:
+                return buffers[0]
+            return join_wav_buffers(list(buffers))
+
+    @staticmethod
+    def _get_host(transcript: Transcript, speaker: str) -> Host:
         host = next((host for host in transcript.hosts if host.id == speaker), None)
         if host is None:
             raise ValueError(f"Host with id {speaker} not found in transcript.")
-        
-        await self._tts_client.synthesize_speech_async(text, host.voice, output_path)
+        return host
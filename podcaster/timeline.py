@@ -0,0 +1,218 @@
+import os
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from podcaster.models import MusicThemeTranscriptItem, Transcript
+from .music_library import GainEnvelope, MusicMix, apply_gain_envelope, get_group_envelopes, get_music_clip_name
+from .wav_reader import WavInfo, encode_samples, open_wav_frames, read_wav_info
+
+# A clip to place: the order and offset in seconds of its item, its name and its path
+TimelineClip = tuple[int, float, str, str]
+
+class ClipPlacement(BaseModel):
+    order: int = Field(description="The order of the item the clip was synthesized from.")
+    name: str = Field(description="The name of the clip.")
+    path: str = Field(description="The path of the clip file.")
+    info: WavInfo = Field(description="The format and length of the clip.")
+    start_frame: int = Field(description="The frame of the output the clip starts at.")
+
+    @property
+    def end_frame(self) -> int:
+        return self.start_frame + self.info.frame_count
+
+class Timeline(BaseModel):
+    sample_rate: int = Field(description="The sample rate of every clip and of the output.")
+    channels: int = Field(description="The channels of the output, the most of any clip.")
+    frame_count: int = Field(description="The length of the output in frames.")
+    placements: list[ClipPlacement] = Field(description="Where each clip starts, ordered by start.")
+
+def build_timeline(clips: list[TimelineClip]) -> Timeline:
+    """Place clips on a timeline.
+
+    Order groups follow each other: a group starts where the clips of the previous one
+    have all ended, and each clip starts at its group's start shifted by its item's
+    offset. A negative offset makes a clip cut into the previous group, a positive one
+    leaves a pause. A group that ends before the previous one never moves the next
+    group back.
+    """
+    if not clips:
+        raise ValueError('No clips to place.')
+
+    groups: dict[int, list[tuple[float, str, str]]] = {}
+    for order, offset, name, path in clips:
+        groups.setdefault(order, []).append((offset, name, path))
+
+    sample_rate = None
+    channels = 0
+    placements: list[ClipPlacement] = []
+    cursor = 0
+    for order in sorted(groups.keys()):
+        group_start = cursor
+        for offset, name, path in groups[order]:
+            info = read_wav_info(path)
+            if sample_rate is None:
+                sample_rate = info.sample_rate
+            elif info.sample_rate != sample_rate:
+                raise ValueError(f"Sample rate mismatch in file {path}")
+            channels = max(channels, info.channels)
+            start_frame = max(0, group_start + round(offset * sample_rate))
+            placements.append(ClipPlacement(order=order, name=name, path=path, info=info, start_frame=start_frame))
+            cursor = max(cursor, start_frame + info.frame_count)
+
+    placements.sort(key=lambda placement: placement.start_frame)
+    return Timeline(sample_rate=sample_rate, channels=channels, frame_count=cursor, placements=placements)
+
+def build_transcript_timeline(transcript: Transcript, clip_dir: str | os.PathLike) -> Timeline:
+    """Place the clips of a transcript's items, as synthesized into clip_dir, on a timeline.
+
+    Items without a clip, such as music themes that were skipped, are left out.
+    """
+    clips: list[TimelineClip] = []
+    for item in transcript.items:
+        name = get_music_clip_name(item) if isinstance(item, MusicThemeTranscriptItem) else f"{item.order}-{item.speaker_id}.wav"
+        path = Path(clip_dir) / name
+        if path.exists():
+            clips.append((item.order, item.offset, name, str(path)))
+    return build_timeline(clips)
+
+def get_timeline_envelopes(timeline: Timeline, mix: MusicMix) -> list[GainEnvelope | None]:
+    """Return the gain envelope of each placement, ducking music under the speech of its order group."""
+    groups: dict[int, list[int]] = {}
+    for index, placement in enumerate(timeline.placements):
+        groups.setdefault(placement.order, []).append(index)
+
+    envelopes: list[GainEnvelope | None] = [None] * len(timeline.placements)
+    for indices in groups.values():
+        group_envelopes = get_group_envelopes(
+            [timeline.placements[index].name for index in indices],
+            [timeline.placements[index].info for index in indices],
+            mix
+        )
+        for index, envelope in zip(indices, group_envelopes):
+            envelopes[index] = envelope
+    return envelopes
+
+def iter_timeline_samples(
+    timeline: Timeline,
+    output_info: WavInfo,
+    envelopes: list[GainEnvelope | None] | None = None,
+    block_frames: int = 65536
+) -> Iterator[np.ndarray]:
+    """Mix a timeline into consecutive (frames, channels) blocks of raw samples in output_info's format.
+
+    The timeline is cut at every clip start and end. Spans where a single clip plays that
+    needs no conversion are yielded straight from its memory map, and silent spans are
+    encoded once per block. Runs of the remaining spans are mixed block by block, adding
+    only the part of each clip that falls into a block into a preallocated buffer. Each
+    block only visits the clips playing in it, so the work is linear in the length of the
+    output plus the overlapping audio however the clips are grouped.
+    """
+    envelopes = envelopes or [None] * len(timeline.placements)
+    block = np.zeros((block_frames, output_info.channels), dtype=np.float32)
+    scratch = np.empty((block_frames, output_info.channels), dtype=np.float32)
+    silence = encode_samples(block, output_info)
+    clip_frames: dict[int, np.ndarray] = {}
+
+    def get_clip_frames(index: int) -> np.ndarray:
+        if index not in clip_frames:
+            placement = timeline.placements[index]
+            clip_frames[index] = open_wav_frames(placement.path, placement.info)
+        return clip_frames[index]
+
+    for kind, region_start, region_end, indices in _get_regions(timeline, output_info, envelopes):
+        if kind == 'silent':
+            for start in range(region_start, region_end, block_frames):
+                yield silence[:min(block_frames, region_end - start)]
+        elif kind == 'solo':
+            placement = timeline.placements[indices[0]]
+            frames = get_clip_frames(indices[0])
+            yield frames[region_start - placement.start_frame:region_end - placement.start_frame]
+        else:
+            # Placements are ordered by start, so a sweep over them keeps only the clips
+            # playing in the current block
+            pending = sorted(indices)
+            next_pending = 0
+            playing: list[int] = []
+            for start in range(region_start, region_end, block_frames):
+                end = min(start + block_frames, region_end)
+                while next_pending < len(pending) and timeline.placements[pending[next_pending]].start_frame < end:
+                    playing.append(pending[next_pending])
+                    next_pending += 1
+                playing = [index for index in playing if timeline.placements[index].end_frame > start]
+                mixed = block[:end - start]
+                mixed.fill(0)
+                for index in playing:
+                    placement = timeline.placements[index]
+                    overlap_start = max(start, placement.start_frame)
+                    overlap_end = min(end, placement.end_frame)
+                    clip_start = overlap_start - placement.start_frame
+                    frames = overlap_end - overlap_start
+                    decoded = scratch[:frames, :placement.info.channels]
+                    np.multiply(
+                        get_clip_frames(index)[clip_start:clip_start + frames],
+                        placement.info.scale,
+                        out=decoded,
+                        casting='unsafe'
+                    )
+                    if placement.info.zero:
+                        decoded -= placement.info.zero * placement.info.scale
+                    if envelopes[index] is not None:
+                        apply_gain_envelope(decoded, clip_start, envelopes[index])
+                    # Mono clips are broadcast across all output channels
+                    mixed[overlap_start - start:overlap_end - start] += decoded
+                yield encode_samples(mixed, output_info)
+
+        # Clips that have ended are never read again
+        for index in [index for index in clip_frames if timeline.placements[index].end_frame <= region_end]:
+            del clip_frames[index]
+
+def _get_regions(
+    timeline: Timeline,
+    output_info: WavInfo,
+    envelopes: list[GainEnvelope | None]
+) -> Iterator[tuple[str, int, int, list[int]]]:
+    """Split a timeline into consecutive silent, solo and mixed regions and the clips playing in each."""
+    starts: dict[int, list[int]] = {}
+    ends: dict[int, list[int]] = {}
+    for index, placement in enumerate(timeline.placements):
+        if placement.info.frame_count:
+            starts.setdefault(placement.start_frame, []).append(index)
+            ends.setdefault(placement.end_frame, []).append(index)
+    cuts = sorted({0, timeline.frame_count, *starts.keys(), *ends.keys()})
+
+    active: set[int] = set()
+    # The mixed region being collected: its start and every clip playing in it
+    mix_start: int | None = None
+    mix_indices: dict[int, None] = {}
+    for span_start, span_end in zip(cuts, cuts[1:]):
+        active.difference_update(ends.get(span_start, []))
+        active.update(starts.get(span_start, []))
+
+        kind = 'mix'
+        if not active:
+            kind = 'silent'
+        elif len(active) == 1:
+            placement = timeline.placements[next(iter(active))]
+            if (
+                envelopes[next(iter(active))] is None
+                and placement.info.channels == output_info.channels
+                and placement.info.dtype == output_info.dtype
+            ):
+                kind = 'solo'
+
+        if kind == 'mix':
+            if mix_start is None:
+                mix_start = span_start
+            mix_indices.update(dict.fromkeys(active))
+            continue
+        if mix_start is not None:
+            yield 'mix', mix_start, span_start, list(mix_indices)
+            mix_start = None
+            mix_indices = {}
+        yield kind, span_start, span_end, list(active)
+
+    if mix_start is not None:
+        yield 'mix', mix_start, timeline.frame_count, list(mix_indices)
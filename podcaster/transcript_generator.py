@@ -1,9 +1,26 @@
+import asyncio
+import logging
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 from jinja2 import Environment, FileSystemLoader
+from pydantic import TypeAdapter
 
-from podcaster.models import Transcript, Source
+from podcaster.models import (
+    Host,
+    SpeechTranscriptItem,
+    Source,
+    Transcript,
+    TranscriptItemType,
+    TranscriptSection,
+    Voice,
+)
+from podcaster.incremental_json import IncrementalArrayParser
 from podcaster.llm_client import LLMClient
+from podcaster.outline import split_outline
 from podcaster.prompt_renderer import PromptRenderer
+from podcaster.source_retriever import SourceRetriever
+
+_transcript_item_adapter = TypeAdapter(TranscriptItemType)
 
 class TranscriptGenerator(ABC):
     @abstractmethod
@@ -13,13 +30,57 @@ class TranscriptGenerator(ABC):
         pass
 
 class LLMTranscriptGenerator(TranscriptGenerator):
-    def __init__(self, llm_client: LLMClient, prompt_renderer: PromptRenderer):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        prompt_renderer: PromptRenderer,
+        source_retriever: SourceRetriever | None = None
+    ):
         self.llm_client = llm_client
         self.prompt_renderer = prompt_renderer
+        self.source_retriever = source_retriever
 
     async def generate_transcript_async(
         self, hosts: list[str], sources: list[Source], outline: Source
     ) -> Transcript:
+        prompt = await self._render_prompt_async(hosts, sources, outline)
+
+        # Get the transcript content from the LLM
+        return await self.llm_client.generate_model_async(prompt, Transcript)
+
+    async def stream_transcript_items_async(
+        self, hosts: list[str], sources: list[Source], outline: Source
+    ) -> AsyncIterator[tuple[Transcript, TranscriptItemType]]:
+        """Yield each transcript item as soon as the LLM has finished generating it.
+
+        Items are paired with the transcript's header: a Transcript with the title and
+        hosts but no items. Items generated before the header is complete are held back
+        until it is.
+        """
+        prompt = await self._render_prompt_async(hosts, sources, outline)
+        parser = IncrementalArrayParser('items')
+        header: Transcript | None = None
+        pending: list[TranscriptItemType] = []
+
+        async for chunk in self.llm_client.stream_model_json_async(prompt, Transcript):
+            pending.extend(_transcript_item_adapter.validate_python(item) for item in parser.feed(chunk))
+            if header is None and 'title' in parser.fields and 'hosts' in parser.fields:
+                header = Transcript(title=parser.fields['title'], hosts=parser.fields['hosts'], items=[])
+            if header is not None:
+                for item in pending:
+                    yield header, item
+                pending.clear()
+
+        if not parser.complete:
+            raise ValueError("The LLM stopped before completing the transcript.")
+        if header is None:
+            raise ValueError("The LLM did not generate a transcript title and hosts.")
+
+    async def _render_prompt_async(self, hosts: list[str], sources: list[Source], outline: Source) -> str:
+        # Only pass the parts of the sources that are relevant to the outline
+        if self.source_retriever is not None:
+            sources = await self.source_retriever.select_sources_async(sources, outline)
+
         # Prepare the context for the template
         context = {
             "hosts": hosts,
@@ -28,7 +89,122 @@ class LLMTranscriptGenerator(TranscriptGenerator):
         }
 
         # Render the prompt using the template
-        prompt = self.prompt_renderer.render_prompt("generate_transcript.jinja", context)
+        return self.prompt_renderer.render_prompt("generate_transcript.jinja", context)
 
-        # Get the transcript content from the LLM
-        return await self.llm_client.generate_model_async(prompt, Transcript)
+class SectionedLLMTranscriptGenerator(TranscriptGenerator):
+    """Generates each section of the outline in a parallel LLM call and merges the results.
+
+    Hosts are assigned ids and voices up front so every section shares them, and the
+    episode is titled after the first line of the outline. Item orders are renumbered so
+    that sections follow each other while items sharing an order keep sharing it. A
+    section whose completion fails validation is retried on its own, with the error
+    added to its prompt.
+    """
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        prompt_renderer: PromptRenderer,
+        source_retriever: SourceRetriever | None = None,
+        voices: list[Voice] | None = None,
+        episode_minutes: int = 30,
+        max_section_retries: int = 2
+    ):
+        self.llm_client = llm_client
+        self.prompt_renderer = prompt_renderer
+        self.source_retriever = source_retriever
+        self.voices = voices or list(Voice)
+        self.episode_minutes = episode_minutes
+        self.max_section_retries = max_section_retries
+
+    def create_hosts(self, hosts: list[str]) -> list[Host]:
+        """Give each host a unique id and a distinct voice.
+
+        The id is the host's first name, or their full name when another host shares it,
+        numbered if the full names are the same too.
+        """
+        first_names = [(name.split() or [f"Host{index + 1}"])[0] for index, name in enumerate(hosts)]
+        ids: list[str] = []
+        for index, name in enumerate(hosts):
+            host_id = first_names[index]
+            if first_names.count(host_id) > 1:
+                host_id = '_'.join(name.split())
+            candidate, number = host_id, 2
+            while candidate in ids:
+                candidate = f"{host_id}{number}"
+                number += 1
+            ids.append(candidate)
+        return [
+            Host(name=name, id=ids[index], voice=self.voices[index % len(self.voices)])
+            for index, name in enumerate(hosts)
+        ]
+
+    async def generate_transcript_async(
+        self, hosts: list[str], sources: list[Source], outline: Source
+    ) -> Transcript:
+        title, sections = split_outline(outline.text)
+        if not sections:
+            raise ValueError("The outline is empty.")
+        transcript_hosts = self.create_hosts(hosts)
+
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [
+                task_group.create_task(self._generate_section_async(
+                    title, transcript_hosts, sources, outline, sections, index
+                ))
+                for index in range(len(sections))
+            ]
+
+        items: list[TranscriptItemType] = []
+        next_order = 1
+        for task in tasks:
+            section_items = task.result()
+            # Map the section's orders onto consecutive orders after the previous section
+            section_orders = sorted({item.order for item in section_items})
+            orders = {order: next_order + index for index, order in enumerate(section_orders)}
+            items.extend(item.model_copy(update={'order': orders[item.order]}) for item in section_items)
+            next_order += len(section_orders)
+
+        return Transcript(title=title, hosts=transcript_hosts, items=items)
+
+    async def _generate_section_async(
+        self,
+        title: str,
+        hosts: list[Host],
+        sources: list[Source],
+        outline: Source,
+        sections: list[str],
+        index: int
+    ) -> list[TranscriptItemType]:
+        section = sections[index]
+        if self.source_retriever is not None:
+            sources = await self.source_retriever.select_sources_async(sources, Source(text=f"{title}\n{section}"))
+
+        context = {
+            "title": title,
+            "hosts": hosts,
+            "sources": sources,
+            "outline": outline.text,
+            "section": section,
+            "section_number": index + 1,
+            "section_count": len(sections),
+            "minutes": max(1, round(self.episode_minutes / len(sections))),
+        }
+        host_ids = {host.id for host in hosts}
+
+        attempt = 0
+        while True:
+            # A retry tells the LLM what was wrong, which also keeps it from hitting a cached response
+            prompt = self.prompt_renderer.render_prompt("generate_transcript_section.jinja", context)
+            try:
+                transcript_section = await self.llm_client.generate_model_async(prompt, TranscriptSection)
+                for item in transcript_section.items:
+                    if isinstance(item, SpeechTranscriptItem) and item.speaker_id not in host_ids:
+                        raise ValueError(f"Unknown speaker id {item.speaker_id} in section {index + 1}.")
+                return transcript_section.items
+            except ValueError as e:
+                if attempt >= self.max_section_retries:
+                    raise
+                attempt += 1
+                context["previous_error"] = str(e)
+                logging.warning(f"Section {index + 1} failed validation ({e}), retrying (attempt {attempt}/{self.max_section_retries})")
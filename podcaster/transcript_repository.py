@@ -1,8 +1,26 @@
 from abc import ABC, abstractmethod
+import asyncio
+import json
 import os
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator
+
 import aiofiles
-import json
-from podcaster.models import Transcript
+from pydantic import BaseModel, Field, TypeAdapter
+
+from podcaster.models import Host, Transcript, TranscriptItemType
+from .instrumentation import count, span
+
+_transcript_item_adapter = TypeAdapter(TranscriptItemType)
+_hosts_adapter = TypeAdapter(list[Host])
+
+class TranscriptSummary(BaseModel):
+    name: str = Field(description="The name the transcript is read by.")
+    title: str = Field(description="The title of the podcast.")
+    hosts: list[Host] = Field(description="The hosts of the podcast.")
+    item_count: int = Field(description="The number of items in the transcript.")
 
 class TranscriptRepository(ABC):
     """Interface for handling transcripts."""
@@ -22,6 +40,32 @@ class TranscriptRepository(ABC):
         """Read a transcript from storage by filename."""
         pass
 
+    def get_transcript_name(self, transcript: Transcript) -> str:
+        """Return the name a written transcript is read back by."""
+        return transcript.title
+
+    async def list_transcript_summaries_async(self) -> list[TranscriptSummary]:
+        """List the title, hosts and item count of all available transcripts.
+
+        Repositories without an index read every transcript to summarize it.
+        """
+        summaries = []
+        for name in await self.list_transcripts_async():
+            transcript = await self.read_transcript_async(name)
+            summaries.append(TranscriptSummary(
+                name=name, title=transcript.title, hosts=transcript.hosts, item_count=len(transcript.items)
+            ))
+        return summaries
+
+    async def iter_transcript_items_async(self, filename: str) -> AsyncIterator[TranscriptItemType]:
+        """Yield the items of a transcript in order.
+
+        Repositories that cannot read items one at a time read the whole transcript.
+        """
+        transcript = await self.read_transcript_async(filename)
+        for item in transcript.items:
+            yield item
+
 class LocalTranscriptRepository(TranscriptRepository):
     """Local filesystem implementation of TranscriptRepository."""
 
@@ -38,17 +82,134 @@ class LocalTranscriptRepository(TranscriptRepository):
                 files.append(filename)
         return files
 
+    def get_transcript_name(self, transcript: Transcript) -> str:
+        return f"{transcript.get_slug()}.txt"
+
     async def write_transcript_async(self, transcript: Transcript) -> None:
         """Asynchronously write the transcript to a file."""
-        filename = f"{transcript.title.replace(' ', '_')}.txt"
-        output_path = os.path.join(self._directory, filename)
-        async with aiofiles.open(output_path, 'w', encoding='utf-8') as file:
-            await file.write(transcript.model_dump_json(indent=4))
+        output_path = os.path.join(self._directory, self.get_transcript_name(transcript))
+        with span('transcript.write', title=transcript.title, items=len(transcript.items)):
+            content = transcript.model_dump_json(indent=4)
+            async with aiofiles.open(output_path, 'w', encoding='utf-8') as file:
+                await file.write(content)
+        count('transcript.bytes_written', len(content))
 
     async def read_transcript_async(self, filename: str) -> Transcript:
         """Asynchronously read a transcript from a file."""
         input_path = os.path.join(self._directory, filename)
-        async with aiofiles.open(input_path, 'r', encoding='utf-8') as file:
-            content = await file.read()
-            transcript_data = json.loads(content)
-            return Transcript(**transcript_data)
+        with span('transcript.read', transcript=filename):
+            async with aiofiles.open(input_path, 'r', encoding='utf-8') as file:
+                return Transcript.model_validate_json(await file.read())
+
+class SQLiteTranscriptRepository(TranscriptRepository):
+    """SQLite implementation of TranscriptRepository.
+
+    Transcripts are stored by title, so titles that only differ in spacing no longer
+    share a file name. The title, hosts and item count of every transcript are kept in
+    an index table, so listing never reads items. Items are stored one row each as JSON:
+    reading a transcript validates the joined rows with a single model_validate_json
+    call, and iter_transcript_items_async fetches and parses them `batch_size` at a time.
+    """
+
+    def __init__(self, database_path: str = 'output/transcripts.sqlite3', batch_size: int = 256):
+        self._batch_size = batch_size
+        os.makedirs(os.path.dirname(database_path) or '.', exist_ok=True)
+        # Queries run in worker threads so they never block the event loop, one at a time
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS transcripts (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL UNIQUE,
+                hosts TEXT NOT NULL,
+                item_count INTEGER NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS transcript_items (
+                transcript_id INTEGER NOT NULL REFERENCES transcripts (id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                item TEXT NOT NULL,
+                PRIMARY KEY (transcript_id, position)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.commit()
+
+    async def list_transcripts_async(self) -> list:
+        """List the titles of all transcripts."""
+        rows = await asyncio.to_thread(self._fetch_all, "SELECT title FROM transcripts ORDER BY title")
+        return [row[0] for row in rows]
+
+    async def list_transcript_summaries_async(self) -> list[TranscriptSummary]:
+        rows = await asyncio.to_thread(self._fetch_all, "SELECT title, hosts, item_count FROM transcripts ORDER BY title")
+        return [
+            TranscriptSummary(
+                name=title,
+                title=title,
+                hosts=_hosts_adapter.validate_json(hosts),
+                item_count=item_count
+            )
+            for title, hosts, item_count in rows
+        ]
+
+    async def write_transcript_async(self, transcript: Transcript) -> None:
+        """Replace the transcript with the same title in a single transaction."""
+        hosts = _hosts_adapter.dump_json(transcript.hosts).decode('utf-8')
+        items = [item.model_dump_json() for item in transcript.items]
+        with span('transcript.write', title=transcript.title, items=len(transcript.items)):
+            await asyncio.to_thread(self._write, transcript.title, hosts, items)
+
+    async def read_transcript_async(self, filename: str) -> Transcript:
+        """Read a transcript by title."""
+        with span('transcript.read', transcript=filename):
+            hosts, items = await asyncio.to_thread(self._read, filename)
+            return Transcript.model_validate_json(
+                f'{{"title": {json.dumps(filename)}, "hosts": {hosts}, "items": [{",".join(items)}]}}'
+            )
+
+    async def iter_transcript_items_async(self, filename: str) -> AsyncIterator[TranscriptItemType]:
+        transcript_id, _ = await asyncio.to_thread(self._read_header, filename)
+        position = 0
+        while rows := await asyncio.to_thread(self._fetch_all, (
+            "SELECT position, item FROM transcript_items WHERE transcript_id = ? AND position >= ? "
+            "ORDER BY position LIMIT ?"
+        ), (transcript_id, position, self._batch_size)):
+            for _, item in rows:
+                yield _transcript_item_adapter.validate_json(item)
+            position = rows[-1][0] + 1
+
+    def _fetch_all(self, query: str, parameters: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def _write(self, title: str, hosts: str, items: list[str]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM transcripts WHERE title = ?", (title,))
+            transcript_id = self._connection.execute(
+                "INSERT INTO transcripts (title, hosts, item_count, updated) VALUES (?, ?, ?, ?)",
+                (title, hosts, len(items), time.time())
+            ).lastrowid
+            self._connection.executemany(
+                "INSERT INTO transcript_items (transcript_id, position, item) VALUES (?, ?, ?)",
+                ((transcript_id, position, item) for position, item in enumerate(items))
+            )
+
+    def _read(self, title: str) -> tuple[str, list[str]]:
+        with self._lock:
+            transcript_id, hosts = self._get_header(title)
+            items = [row[0] for row in self._connection.execute(
+                "SELECT item FROM transcript_items WHERE transcript_id = ? ORDER BY position", (transcript_id,)
+            )]
+            return hosts, items
+
+    def _read_header(self, title: str) -> tuple[int, str]:
+        with self._lock:
+            return self._get_header(title)
+
+    def _get_header(self, title: str) -> tuple[int, str]:
+        row = self._connection.execute("SELECT id, hosts FROM transcripts WHERE title = ?", (title,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Transcript '{title}' not found.")
+        return row
@@ -1,30 +1,215 @@
+import asyncio
+import functools
+import logging
 import os
+import random
 from pathlib import Path
 from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Collection, TypeVar
 
-from podcaster.models import SpeechTranscriptItem, Transcript
+from podcaster.clip_manifest import build_clip_manifest, diff_clip_manifest, write_clip_manifest
+from podcaster.models import MusicThemeTranscriptItem, SpeechTranscriptItem, Transcript, TranscriptItemType
+from .music_library import MusicThemeLibrary, get_music_clip_name
 from .speech_to_audio_converter import SpeechToAudioConverter
+from .tts_client import TransientTTSError
+
+T = TypeVar('T')
 
 class TranscriptToAudioConverter(ABC):
     """Interface for converting transcripts to audio files."""
 
     @abstractmethod
-    async def convert_transcript_to_audio_async(self, transcript: Transcript):
-        """Convert a single transcript to audio files."""
+    async def convert_transcript_to_audio_async(self, transcript: Transcript) -> Path:
+        """Convert a single transcript to audio files and return the clip directory."""
         pass
 
 
 class DefaultTranscriptToAudioConverter(TranscriptToAudioConverter):
-    """Implementation of TranscriptToAudioConverter."""
+    """Implementation of TranscriptToAudioConverter.
+
+    Up to `max_concurrency` TTS requests run at once, counting every piece of a long
+    item as a request of its own. Each attempt is bounded by `request_timeout` seconds
+    and retried up to `max_retries` times with jittered exponential backoff when it
+    times out or fails with a TransientTTSError.
+
+    With `incremental` enabled, a manifest of every clip's order, speaker, voice and
+    content hash is kept next to the clips. A re-run only synthesizes items that were
+    added or changed since the manifest was written and deletes clips that are no longer
+    part of the transcript.
 
-    def __init__(self, speech_to_audio_converter: SpeechToAudioConverter):
+    With a `music_library`, music theme items are placed as {order}-music_{theme}.wav
+    clips holding the library's decoded theme; without one, or when the library has no
+    asset for a theme, they are skipped.
+    """
+
+    def __init__(
+        self,
+        speech_to_audio_converter: SpeechToAudioConverter,
+        max_concurrency: int = 1,
+        request_timeout: float | None = None,
+        max_retries: int = 0,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
+        output_directory: str = 'output/clips',
+        incremental: bool = False,
+        music_library: MusicThemeLibrary | None = None
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
         self._speech_to_audio_converter = speech_to_audio_converter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._request_timeout = request_timeout
+        self._max_retries = max_retries
+        self._retry_base_delay = retry_base_delay
+        self._retry_max_delay = retry_max_delay
+        self._output_directory = Path(output_directory)
+        self._incremental = incremental
+        self._music_library = music_library
+
+    def get_output_dir(self, transcript: Transcript) -> Path:
+        """Return the directory the clips of a transcript are written to."""
+        return self._output_directory / transcript.get_slug()
+
+    def get_clip_names(self, transcript: Transcript) -> list[str]:
+        """Return the names of the clips a transcript is converted to, in transcript order."""
+        return [self._get_clip_name(item) for item in transcript.items if self._has_clip(item)]
+
+    async def convert_transcript_to_audio_async(
+        self,
+        transcript: Transcript,
+        completed: Collection[str] = (),
+        on_clip_written: Callable[[str], None] | None = None
+    ) -> Path:
+        """Convert a single transcript to audio files.
+
+        Clips named in `completed` are taken as already in place and not synthesized
+        again, and `on_clip_written` is called with the name of every clip once it has
+        been written, so a caller can checkpoint a conversion and resume it after a crash.
+        """
+        output_dir = self.get_output_dir(transcript)
+        self._warn_about_unknown_themes(transcript)
+        segments = [
+            segment for segment in transcript.items
+            if self._has_clip(segment) and self._get_clip_name(segment) not in completed
+        ]
+
+        if self._incremental:
+            manifest = build_clip_manifest(transcript, self._get_music_themes())
+            diff = diff_clip_manifest(output_dir, manifest)
+            for orphan in diff.orphans:
+                os.remove(output_dir / orphan)
+            changed = {entry.filename for entry in diff.changed}
+            segments = [segment for segment in segments if self._get_clip_name(segment) in changed]
+            logging.info(
+                f"Synthesizing {len(segments)} changed items, reusing {len(diff.unchanged)}, "
+                f"removed {len(diff.orphans)} orphaned clips"
+            )
+
+        async def convert_async(segment: TranscriptItemType) -> None:
+            await self.convert_transcript_item_to_audio_async(transcript, segment, output_dir)
+            if on_clip_written is not None:
+                on_clip_written(self._get_clip_name(segment))
+
+        async with asyncio.TaskGroup() as task_group:
+            for segment in segments:
+                task_group.create_task(convert_async(segment))
+
+        if self._incremental:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            write_clip_manifest(output_dir, manifest)
+
+        return output_dir
+
+    def finish_output_dir(self, transcript: Transcript) -> None:
+        """Write the manifest of a transcript whose items were converted one by one and remove orphaned clips."""
+        output_dir = self.get_output_dir(transcript)
+        manifest = build_clip_manifest(transcript, self._get_music_themes())
+        diff = diff_clip_manifest(output_dir, manifest)
+        for orphan in diff.orphans:
+            os.remove(output_dir / orphan)
+        if diff.orphans:
+            logging.info(f"Removed {len(diff.orphans)} orphaned clips from {output_dir}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        write_clip_manifest(output_dir, manifest)
+
+    async def convert_transcript_to_audio_buffers_async(self, transcript: Transcript) -> dict[str, bytes]:
+        """Convert a transcript to in-memory clips, keyed by their {order}-{speaker}.wav names."""
+        clips: dict[str, bytes] = {}
+        self._warn_about_unknown_themes(transcript)
+
+        async def convert_async(item: TranscriptItemType) -> None:
+            if isinstance(item, MusicThemeTranscriptItem):
+                clips[get_music_clip_name(item)] = await asyncio.to_thread(
+                    self._music_library.read_theme_bytes, item.theme
+                )
+                return
+            run_request = functools.partial(self._run_with_retry_async, item)
+            clips[f"{item.order}-{item.speaker_id}.wav"] = (
+                await self._speech_to_audio_converter.synthesize_speech_transcript_item_async(transcript, item, run_request)
+            )
+
+        async with asyncio.TaskGroup() as task_group:
+            for segment in transcript.items:
+                if self._has_clip(segment):
+                    task_group.create_task(convert_async(segment))
+
+        return clips
+
+    async def convert_transcript_item_to_audio_async(
+        self,
+        transcript: Transcript,
+        item: TranscriptItemType,
+        output_dir: Path
+    ) -> None:
+        """Convert a single item, respecting the concurrency limit, timeout and retry policy."""
+        if isinstance(item, MusicThemeTranscriptItem):
+            if self._has_clip(item):
+                await asyncio.to_thread(self._music_library.place_theme, item, output_dir)
+            return
+        await self._speech_to_audio_converter.convert_speech_transcript_item_to_audio_async(
+            transcript, item, output_dir, functools.partial(self._run_with_retry_async, item)
+        )
+
+    def _has_clip(self, item: TranscriptItemType) -> bool:
+        if isinstance(item, MusicThemeTranscriptItem):
+            return self._music_library is not None and self._music_library.has_theme(item.theme)
+        return True
+
+    def _get_music_themes(self) -> list[str]:
+        return self._music_library.get_theme_names() if self._music_library is not None else []
+
+    def _warn_about_unknown_themes(self, transcript: Transcript) -> None:
+        if self._music_library is None:
+            return
+        themes = set(self._get_music_themes())
+        unknown = sorted({
+            item.theme for item in transcript.items
+            if isinstance(item, MusicThemeTranscriptItem) and item.theme not in themes
+        })
+        if unknown:
+            logging.warning(f"Skipping music theme items without an asset in the library: {', '.join(unknown)}")
 
-    async def convert_transcript_to_audio_async(self, transcript: Transcript):
-        """Convert a single transcript to audio files."""
-        podcast_title = transcript.title.replace(' ', '_')
+    @staticmethod
+    def _get_clip_name(item: TranscriptItemType) -> str:
+        if isinstance(item, MusicThemeTranscriptItem):
+            return get_music_clip_name(item)
+        return f"{item.order}-{item.speaker_id}.wav"
 
-        for segment in transcript.items:
-            if isinstance(segment, SpeechTranscriptItem):
-                output_dir = Path('output') / 'clips' / podcast_title
-                await self._speech_to_audio_converter.convert_speech_transcript_item_to_audio_async(transcript, segment, output_dir)
+    async def _run_with_retry_async(self, item: SpeechTranscriptItem, convert: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            # The slot is only held while a request runs, so backing off never blocks other items
+            async with self._semaphore:
+                try:
+                    return await asyncio.wait_for(convert(), timeout=self._request_timeout)
+                except (TransientTTSError, TimeoutError) as e:
+                    if attempt >= self._max_retries:
+                        raise
+                    error = e
+            delay = random.uniform(0, min(self._retry_max_delay, self._retry_base_delay * 2 ** attempt))
+            attempt += 1
+            logging.warning(
+                f"Synthesis of item {item.order}-{item.speaker_id} failed ({error!r}), "
+                f"retrying in {delay:.2f}s (attempt {attempt}/{self._max_retries})"
+            )
+            await asyncio.sleep(delay)
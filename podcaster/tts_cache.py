@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import unicodedata
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+from pydantic import BaseModel, Field
+
+from podcaster.models import Voice
+from .tts_client import TTSClient
+
+class TTSCacheStats(BaseModel):
+    hits: int = Field(default=0, description="The number of requests served from the cache.")
+    misses: int = Field(default=0, description="The number of requests forwarded to the wrapped client.")
+    bytes_saved: int = Field(default=0, description="The number of audio bytes served from the cache instead of synthesized.")
+    evictions: int = Field(default=0, description="The number of entries evicted to stay within the size limit.")
+
+class CachingTTSClient(TTSClient):
+    """TTSClient decorator that stores synthesized audio in a local content-addressed cache.
+
+    Entries are keyed on a hash of the normalized text, the voice, the TTS model and the
+    response format, and evicted least-recently-used first once the cache grows beyond
+    `max_size_bytes`.
+    Hits are hardlinked into place where possible and copied otherwise.
+    """
+
+    def __init__(
+        self,
+        tts_client: TTSClient,
+        model: str,
+        response_format: str = 'wav',
+        directory: str = 'output/cache/tts',
+        max_size_bytes: int = 2 * 1024 ** 3
+    ):
+        self._tts_client = tts_client
+        self._model = model
+        self._response_format = response_format
+        self._directory = Path(directory)
+        self._max_size_bytes = max_size_bytes
+        self._entries: OrderedDict[str, int] | None = None
+        self._size_bytes = 0
+        # The lock of each key being synthesized and the number of requests holding or awaiting it
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}
+        self.stats = TTSCacheStats()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Normalize text so that insignificant differences share a cache entry."""
+        return ' '.join(unicodedata.normalize('NFC', text).split())
+
+    def get_cache_key(self, text: str, voice: Voice) -> str:
+        """Return the content address of the audio for text spoken by voice."""
+        digest = hashlib.sha256()
+        for part in (self._model, self._response_format, voice.value, self.normalize_text(text)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    async def synthesize_speech_async(self, text: str, voice: Voice, output_file: Path) -> None:
+        key = self.get_cache_key(text, voice)
+        async with self._lock_key(key):
+            entries = self._load_entries()
+            entry_path = self._get_entry_path(key)
+            if key in entries and entry_path.exists():
+                entries.move_to_end(key)
+                os.utime(entry_path)
+                self.stats.hits += 1
+                self.stats.bytes_saved += entries[key]
+            else:
+                self.stats.misses += 1
+                await self._synthesize_entry_async(key, text, voice, entry_path)
+            await asyncio.to_thread(self._place_entry, entry_path, Path(output_file))
+
+    async def synthesize_speech_bytes_async(self, text: str, voice: Voice) -> bytes:
+        key = self.get_cache_key(text, voice)
+        async with self._lock_key(key):
+            entries = self._load_entries()
+            entry_path = self._get_entry_path(key)
+            if key in entries and entry_path.exists():
+                entries.move_to_end(key)
+                os.utime(entry_path)
+                self.stats.hits += 1
+                self.stats.bytes_saved += entries[key]
+                return await asyncio.to_thread(entry_path.read_bytes)
+
+            self.stats.misses += 1
+            audio = await self._tts_client.synthesize_speech_bytes_async(text, voice)
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = entry_path.with_suffix('.tmp')
+            await asyncio.to_thread(temp_path.write_bytes, audio)
+            os.replace(temp_path, entry_path)
+            self._add_entry(key, entry_path)
+            return audio
+
+    @asynccontextmanager
+    async def _lock_key(self, key: str) -> AsyncIterator[None]:
+        """Serialize requests for one key, dropping its lock once no request needs it."""
+        lock, users = self._locks.get(key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    async def _synthesize_entry_async(self, key: str, text: str, voice: Voice, entry_path: Path) -> None:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = entry_path.with_suffix('.tmp')
+        try:
+            await self._tts_client.synthesize_speech_async(text, voice, temp_path)
+            os.replace(temp_path, entry_path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        self._add_entry(key, entry_path)
+
+    def _add_entry(self, key: str, entry_path: Path) -> None:
+        entries = self._load_entries()
+        size = entry_path.stat().st_size
+        self._size_bytes += size - entries.pop(key, 0)
+        entries[key] = size
+        self._evict()
+
+    def _get_entry_path(self, key: str) -> Path:
+        return self._directory / key[:2] / f"{key}.audio"
+
+    def _place_entry(self, entry_path: Path, output_file: Path) -> None:
+        # Never write through an existing file: it may be a hardlink to another cache entry.
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.unlink(missing_ok=True)
+        try:
+            os.link(entry_path, output_file)
+        except OSError:
+            shutil.copyfile(entry_path, output_file)
+
+    def _load_entries(self) -> OrderedDict[str, int]:
+        """Index the cache directory on first use, least recently used first."""
+        if self._entries is None:
+            found = []
+            if self._directory.exists():
+                for entry_path in self._directory.glob('*/*.audio'):
+                    stat = entry_path.stat()
+                    found.append((stat.st_mtime, entry_path.stem, stat.st_size))
+            found.sort()
+            self._entries = OrderedDict((key, size) for _, key, size in found)
+            self._size_bytes = sum(size for _, _, size in found)
+        return self._entries
+
+    def _evict(self) -> None:
+        entries = self._load_entries()
+        # Always keep the most recent entry, even if it alone exceeds the limit.
+        while self._size_bytes > self._max_size_bytes and len(entries) > 1:
+            key, size = entries.popitem(last=False)
+            self._get_entry_path(key).unlink(missing_ok=True)
+            self._size_bytes -= size
+            self.stats.evictions += 1
+            logging.debug(f"Evicted TTS cache entry {key} ({size} bytes)")
@@ -1,9 +1,19 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 from pathlib import Path
+import os
+import tempfile
 import aiofiles
-from openai import AsyncOpenAI
+import httpx
+from openai import AsyncOpenAI, APIConnectionError, InternalServerError, RateLimitError
 
 from podcaster.models import Voice
+from .instrumentation import count, span
+from .rate_limiter import RateLimiter, get_retry_after
+
+class TransientTTSError(Exception):
+    """Raised when a TTS request failed in a way that is worth retrying (rate limits, outages)."""
+    pass
 
 class TTSClient(ABC):
     """Interface for Text-to-Speech clients."""
@@ -13,19 +23,110 @@ class TTSClient(ABC):
         """Convert text to speech audio bytes and save to a file."""
         pass
 
+    async def synthesize_speech_bytes_async(self, text: str, voice: Voice) -> bytes:
+        """Convert text to speech audio bytes and return them.
+
+        Clients that can only write files synthesize to a temporary file and read it back.
+        """
+        file_descriptor, temp_path = tempfile.mkstemp(suffix='.wav')
+        os.close(file_descriptor)
+        try:
+            await self.synthesize_speech_async(text, voice, Path(temp_path))
+            async with aiofiles.open(temp_path, 'rb') as file:
+                return await file.read()
+        finally:
+            os.remove(temp_path)
+
 class OpenAITTSClient(TTSClient):
-    """Implementation of TTSClient using OpenAI's Text-to-Speech API."""
+    """Implementation of TTSClient using OpenAI's Text-to-Speech API.
 
-    def __init__(self, api_key: str):
+    Audio is downloaded with the SDK's async streaming response, so concurrent syntheses
+    progress in parallel, and written to disk in `write_buffer_size` blocks.
+
+    With a `rate_limiter`, every request waits for its turn in the limiter's shared
+    budget, charged with the number of characters it synthesizes. Rate limit errors
+    back the limiter off and are raised as TransientTTSError for the caller to retry.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = 'tts-1',
+        write_buffer_size: int = 1024 * 1024,
+        rate_limiter: RateLimiter | None = None,
+        http_client: httpx.AsyncClient | None = None
+    ):
         self._api_key = api_key
-        self._client = AsyncOpenAI(api_key=self._api_key)
+        self.model = model
+        # WAV, so that clips can be memory-mapped and stitched without decoding
+        self.response_format = 'wav'
+        self._write_buffer_size = write_buffer_size
+        self._rate_limiter = rate_limiter
+        self._client = AsyncOpenAI(
+            api_key=self._api_key,
+            http_client=http_client,
+            **({'max_retries': 0} if rate_limiter is not None else {})
+        )
 
     async def synthesize_speech_async(self, text: str, voice: Voice, output_file: Path) -> None:
-        response = await self._client.audio.speech.create(
-            model="tts-1",
-            voice=voice.value,
-            input=text
-        )
-        async with aiofiles.open(output_file, 'wb') as file:
-            for chunk in response.iter_bytes():
-                await file.write(chunk)
+        count('tts.characters', len(text))
+        try:
+            with span('tts.request', voice=voice.value, characters=len(text)) as attributes:
+                async with self._limit(text), self._client.audio.speech.with_streaming_response.create(
+                    model=self.model,
+                    voice=voice.value,
+                    input=text,
+                    response_format=self.response_format
+                ) as response:
+                    self._on_success(response.headers)
+                    async with aiofiles.open(output_file, 'wb') as file:
+                        size = 0
+                        buffer = bytearray()
+                        async for chunk in response.iter_bytes():
+                            buffer += chunk
+                            size += len(chunk)
+                            if len(buffer) >= self._write_buffer_size:
+                                await file.write(bytes(buffer))
+                                buffer.clear()
+                        if buffer:
+                            await file.write(bytes(buffer))
+                attributes['bytes'] = size
+                count('tts.bytes_written', size)
+        except RateLimitError as e:
+            self._on_rate_limited(e)
+            raise TransientTTSError(str(e)) from e
+        except (APIConnectionError, InternalServerError) as e:
+            raise TransientTTSError(str(e)) from e
+
+    async def synthesize_speech_bytes_async(self, text: str, voice: Voice) -> bytes:
+        count('tts.characters', len(text))
+        try:
+            with span('tts.request', voice=voice.value, characters=len(text)) as attributes:
+                async with self._limit(text), self._client.audio.speech.with_streaming_response.create(
+                    model=self.model,
+                    voice=voice.value,
+                    input=text,
+                    response_format=self.response_format
+                ) as response:
+                    self._on_success(response.headers)
+                    audio = await response.read()
+                attributes['bytes'] = len(audio)
+                return audio
+        except RateLimitError as e:
+            self._on_rate_limited(e)
+            raise TransientTTSError(str(e)) from e
+        except (APIConnectionError, InternalServerError) as e:
+            raise TransientTTSError(str(e)) from e
+
+    def _limit(self, text: str):
+        if self._rate_limiter is None:
+            return nullcontext()
+        return self._rate_limiter.limit(len(text))
+
+    def _on_success(self, headers: httpx.Headers) -> None:
+        if self._rate_limiter is not None:
+            self._rate_limiter.on_success(headers)
+
+    def _on_rate_limited(self, error: RateLimitError) -> None:
+        if self._rate_limiter is not None:
+            self._rate_limiter.on_rate_limited(get_retry_after(error.response.headers), error.response.headers)
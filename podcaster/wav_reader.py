@@ -0,0 +1,194 @@
+import io
+import os
+import struct
+import wave
+from typing import BinaryIO
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Streaming encoders (including the TTS API) cannot know the final length when they
+# write the header, so they leave one of these in the RIFF and data size fields.
+_UNKNOWN_SIZES = (0, 0xFFFFFFFF)
+
+class WavInfo(BaseModel):
+    format_tag: int = Field(description="The WAVE format tag (PCM or IEEE float).")
+    channels: int = Field(description="The number of interleaved channels.")
+    sample_rate: int = Field(description="The number of frames per second.")
+    bits_per_sample: int = Field(description="The size of a single sample in bits.")
+    data_offset: int = Field(description="The byte offset of the PCM payload.")
+    frame_count: int = Field(description="The number of frames in the PCM payload.")
+
+    @property
+    def block_align(self) -> int:
+        return self.channels * self.bits_per_sample // 8
+
+    @property
+    def dtype(self) -> np.dtype:
+        if self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            if self.bits_per_sample == 32:
+                return np.dtype('<f4')
+            if self.bits_per_sample == 64:
+                return np.dtype('<f8')
+        elif self.bits_per_sample == 8:
+            return np.dtype('u1')
+        elif self.bits_per_sample == 16:
+            return np.dtype('<i2')
+        elif self.bits_per_sample == 32:
+            return np.dtype('<i4')
+        raise ValueError(f"Unsupported WAV sample format: tag {self.format_tag}, {self.bits_per_sample} bits")
+
+    @property
+    def scale(self) -> float:
+        """The factor that maps raw sample values onto [-1.0, 1.0)."""
+        if self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            return 1.0
+        return 1.0 / (1 << (self.bits_per_sample - 1))
+
+    @property
+    def zero(self) -> int:
+        """The raw sample value of silence (8-bit PCM is unsigned)."""
+        return 128 if self.bits_per_sample == 8 else 0
+
+def encode_samples(frames: np.ndarray, info: WavInfo) -> np.ndarray:
+    """Convert float audio in [-1.0, 1.0) into raw samples of info's format, clipping overflow."""
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        return frames.astype(info.dtype)
+    limit = 1 << (info.bits_per_sample - 1)
+    return (np.clip(np.rint(frames * limit), -limit, limit - 1) + info.zero).astype(info.dtype)
+
+def read_wav_info(path: str | os.PathLike) -> WavInfo:
+    """Parse the RIFF header of a WAV file without reading its payload."""
+    with open(path, 'rb') as file:
+        return parse_wav_header(file, os.fstat(file.fileno()).st_size)
+
+def parse_wav_header(file: BinaryIO, total_size: int) -> WavInfo:
+    """Parse a RIFF/WAVE header from a seekable binary stream of total_size bytes."""
+    riff = file.read(12)
+    if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file.")
+
+    fmt = None
+    position = 12
+    while position + 8 <= total_size:
+        file.seek(position)
+        chunk_id, chunk_size = struct.unpack('<4sI', file.read(8))
+        position += 8
+
+        if chunk_id == b'fmt ':
+            fmt = file.read(chunk_size)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes its fmt chunk.")
+            format_tag, channels, sample_rate, _, _, bits_per_sample = struct.unpack('<HHIIHH', fmt[:16])
+            if format_tag == WAVE_FORMAT_EXTENSIBLE:
+                # The real format tag is the first two bytes of the SubFormat GUID
+                format_tag = struct.unpack('<H', fmt[24:26])[0]
+            available = total_size - position
+            if chunk_size in _UNKNOWN_SIZES or chunk_size > available:
+                chunk_size = available
+            block_align = channels * bits_per_sample // 8
+            return WavInfo(
+                format_tag=format_tag,
+                channels=channels,
+                sample_rate=sample_rate,
+                bits_per_sample=bits_per_sample,
+                data_offset=position,
+                frame_count=chunk_size // block_align
+            )
+        # Chunks are word aligned
+        position += chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV file has no data chunk.")
+
+def open_wav_frames(path: str | os.PathLike, info: WavInfo | None = None) -> np.ndarray:
+    """Expose the PCM payload of a WAV file as a read-only (frames, channels) memory map."""
+    if info is None:
+        info = read_wav_info(path)
+    if info.frame_count == 0:
+        return np.empty((0, info.channels), dtype=info.dtype)
+    return np.memmap(
+        path,
+        dtype=info.dtype,
+        mode='r',
+        offset=info.data_offset,
+        shape=(info.frame_count, info.channels)
+    )
+
+def read_wav_bytes(buffer: bytes) -> tuple[WavInfo, np.ndarray]:
+    """Parse an in-memory WAV file and expose its PCM payload as a (frames, channels) view."""
+    info = parse_wav_header(io.BytesIO(buffer), len(buffer))
+    frames = np.frombuffer(
+        buffer,
+        dtype=info.dtype,
+        count=info.frame_count * info.channels,
+        offset=info.data_offset
+    )
+    return info, frames.reshape(info.frame_count, info.channels)
+
+def join_wav_buffers(buffers: list[bytes]) -> bytes:
+    """Losslessly concatenate in-memory PCM WAV files that share one format."""
+    parsed = [read_wav_bytes(buffer) for buffer in buffers]
+    first = parsed[0][0]
+    for info, _ in parsed:
+        if info.format_tag != WAVE_FORMAT_PCM:
+            raise ValueError(f"Only PCM WAV data can be joined, got format tag {info.format_tag}.")
+        if (info.channels, info.sample_rate, info.bits_per_sample) != (first.channels, first.sample_rate, first.bits_per_sample):
+            raise ValueError("Format mismatch between WAV buffers.")
+
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as outfile:
+        outfile.setnchannels(first.channels)
+        outfile.setsampwidth(first.bits_per_sample // 8)
+        outfile.setframerate(first.sample_rate)
+        for _, frames in parsed:
+            outfile.writeframes(frames)
+    return output.getvalue()
+
+def join_wav_files(input_paths: list[str | os.PathLike], output_path: str | os.PathLike) -> None:
+    """Losslessly concatenate PCM WAV files that share one format into a single file."""
+    infos = [read_wav_info(path) for path in input_paths]
+    first = infos[0]
+    for path, info in zip(input_paths, infos):
+        if info.format_tag != WAVE_FORMAT_PCM:
+            raise ValueError(f"Only PCM WAV files can be joined, {path} has format tag {info.format_tag}.")
+        if (info.channels, info.sample_rate, info.bits_per_sample) != (first.channels, first.sample_rate, first.bits_per_sample):
+            raise ValueError(f"Format mismatch in file {path}")
+
+    # Write to a new file and rename it into place: the output may be a hardlink
+    temp_path = f"{output_path}.tmp"
+    try:
+        with wave.open(temp_path, 'wb') as outfile:
+            outfile.setnchannels(first.channels)
+            outfile.setsampwidth(first.bits_per_sample // 8)
+            outfile.setframerate(first.sample_rate)
+            for path, info in zip(input_paths, infos):
+                outfile.writeframes(open_wav_frames(path, info))
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def write_wav_header(file: BinaryIO, info: WavInfo) -> int:
+    """Write a canonical RIFF/WAVE header for info.frame_count frames and return its size."""
+    data_size = info.frame_count * info.block_align
+    fmt = struct.pack(
+        '<HHIIHH',
+        info.format_tag,
+        info.channels,
+        info.sample_rate,
+        info.sample_rate * info.block_align,
+        info.block_align,
+        info.bits_per_sample
+    )
+    header = (
+        b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt) + 8 + data_size) + b'WAVE'
+        + b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+        + b'data' + struct.pack('<I', data_size)
+    )
+    file.write(header)
+    return len(header)
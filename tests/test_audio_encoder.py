@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+import soundfile
+
+from podcaster import audio_encoder
+from podcaster.audio_encoder import AudioExport, FFmpegAudioEncoder, SoundFileAudioEncoder, open_audio_encoder, to_float32
+
+class RecordingFFmpegEncoder:
+    def __init__(self, path, sample_rate, channels, export):
+        self.export = export
+
+def test_auto_encodes_lossy_formats_with_ffmpeg_when_it_is_installed(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_encoder.shutil, 'which', lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(audio_encoder, 'FFmpegAudioEncoder', RecordingFFmpegEncoder)
+
+    encoder = open_audio_encoder(tmp_path / 'podcast.mp3', 24000, 1, AudioExport(format='mp3'))
+
+    assert isinstance(encoder, RecordingFFmpegEncoder)
+
+def test_auto_encodes_lossless_formats_with_soundfile(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_encoder.shutil, 'which', lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(audio_encoder, 'FFmpegAudioEncoder', RecordingFFmpegEncoder)
+
+    with open_audio_encoder(tmp_path / 'podcast.flac', 24000, 1, AudioExport(format='flac')) as encoder:
+        assert isinstance(encoder, SoundFileAudioEncoder)
+        encoder.write(np.zeros((2400, 1), dtype=np.int16))
+
+    assert soundfile.info(str(tmp_path / 'podcast.flac')).frames == 2400
+
+def test_auto_falls_back_to_soundfile_without_ffmpeg(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_encoder.shutil, 'which', lambda name: None)
+
+    with open_audio_encoder(tmp_path / 'podcast.ogg', 24000, 1, AudioExport(format='ogg')) as encoder:
+        assert isinstance(encoder, SoundFileAudioEncoder)
+        encoder.write(np.zeros((2400, 1), dtype=np.float32))
+
+    info = soundfile.info(str(tmp_path / 'podcast.ogg'))
+    assert (info.format, info.subtype) == ('OGG', 'VORBIS')
+
+def test_requested_ffmpeg_encoder_reports_a_missing_executable(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        FFmpegAudioEncoder(tmp_path / 'podcast.mp3', 24000, 1, AudioExport(format='mp3'), executable=str(tmp_path / 'ffmpeg'))
+
+def test_to_float32_scales_raw_samples():
+    assert to_float32(np.array([-32768, 16384], dtype=np.int16)).tolist() == [-1.0, 0.5]
+    assert to_float32(np.array([0, 192], dtype=np.uint8)).tolist() == [-1.0, 0.5]
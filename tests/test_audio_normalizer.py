@@ -0,0 +1,87 @@
+import os
+import wave
+
+import numpy as np
+import soundfile
+
+from podcaster.audio_normalizer import AudioFormat, AudioNormalizer, resample
+
+def write_wav(path, sample_rate: int, frames: bytes) -> str:
+    with wave.open(str(path), 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes(frames)
+    return str(path)
+
+def test_entries_are_keyed_by_content(tmp_path):
+    normalizer = AudioNormalizer(str(tmp_path / 'cache'), target_format=AudioFormat(sample_rate=24000, channels=1))
+    clip = write_wav(tmp_path / 'clip.wav', 16000, b'\x01\x00' * 1600)
+
+    first = normalizer.normalize([clip])[clip]
+    # Synthesizing the clip again with the same audio reuses the entry
+    os.remove(clip)
+    write_wav(clip, 16000, b'\x01\x00' * 1600)
+    assert normalizer.normalize([clip])[clip] == first
+
+    write_wav(clip, 16000, b'\x02\x00' * 1600)
+    assert normalizer.normalize([clip])[clip] != first
+
+def test_least_recently_used_entries_are_pruned(tmp_path):
+    normalizer = AudioNormalizer(
+        str(tmp_path / 'cache'), target_format=AudioFormat(sample_rate=24000, channels=1), max_size_bytes=10000
+    )
+    clips = [write_wav(tmp_path / f'clip{index}.wav', 16000, bytes([index, 0]) * 1600) for index in range(4)]
+
+    paths = []
+    for index, clip in enumerate(clips):
+        paths.append(normalizer.normalize([clip])[clip])
+        # Use distinct times, whatever the resolution of the file system's clock
+        os.utime(paths[-1], (index, index))
+
+    # Every entry is about 4.8 kB, so only the two most recent ones fit
+    assert [os.path.exists(path) for path in paths] == [False, False, True, True]
+
+def test_entries_in_use_are_never_pruned(tmp_path):
+    normalizer = AudioNormalizer(
+        str(tmp_path / 'cache'), target_format=AudioFormat(sample_rate=24000, channels=1), max_size_bytes=0
+    )
+    clips = [write_wav(tmp_path / f'clip{index}.wav', 16000, bytes([index, 0]) * 1600) for index in range(3)]
+
+    normalized = normalizer.normalize(clips)
+
+    assert all(os.path.exists(path) for path in normalized.values())
+
+def test_clips_are_resampled_and_remixed_to_the_target_format(tmp_path):
+    normalizer = AudioNormalizer(str(tmp_path / 'cache'), target_format=AudioFormat(sample_rate=24000, channels=2))
+    clip = write_wav(tmp_path / 'clip.wav', 16000, (8192).to_bytes(2, 'little') * 1600)
+
+    normalized = normalizer.normalize([clip])[clip]
+
+    assert normalized != clip
+    info = soundfile.info(normalized)
+    assert (info.samplerate, info.channels, info.subtype, info.frames) == (24000, 2, 'PCM_16', 2400)
+    samples, _ = soundfile.read(normalized, dtype='int16')
+    # A constant signal keeps its level in both channels
+    assert (samples == 8192).all()
+
+def test_clips_in_the_target_format_are_not_converted(tmp_path):
+    normalizer = AudioNormalizer(str(tmp_path / 'cache'), target_format=AudioFormat(sample_rate=16000, channels=1))
+    clip = write_wav(tmp_path / 'clip.wav', 16000, b'\x01\x00' * 1600)
+
+    assert normalizer.normalize([clip]) == {clip: clip}
+    assert not (tmp_path / 'cache').exists()
+
+def test_downsampling_suppresses_frequencies_above_the_target_nyquist_rate():
+    source_rate = 48000
+    times = np.arange(source_rate) / source_rate
+    # A 1 kHz tone passes, a 23 kHz tone would alias to 1 kHz at 24 kHz
+    low = np.sin(2 * np.pi * 1000 * times)[:, None]
+    high = np.sin(2 * np.pi * 23000 * times)[:, None]
+
+    resampled_low = resample(low, source_rate, 24000)
+    resampled_high = resample(high, source_rate, 24000)
+
+    assert resampled_low.shape == (24000, 1)
+    assert np.abs(resampled_low).max() > 0.9
+    assert np.abs(resampled_high).max() < 0.1
@@ -0,0 +1,97 @@
+import asyncio
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import soundfile
+
+from podcaster import audio_stitcher
+from podcaster.audio_encoder import AudioExport
+from podcaster.audio_stitcher import ParallelAudioClipStitcher, StreamingAudioClipStitcher, TimelineAudioClipStitcher
+
+def write_clips(clip_dir, count: int, frames: int = 2400) -> None:
+    clip_dir.mkdir()
+    for order in range(count):
+        with wave.open(str(clip_dir / f"{order}-Jane.wav"), 'wb') as file:
+            file.setnchannels(1)
+            file.setsampwidth(2)
+            file.setframerate(24000)
+            file.writeframes(bytes([order % 256, 0]) * frames)
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers=max_workers)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+def test_encoded_batches_are_mixed_within_a_bounded_window(tmp_path, monkeypatch):
+    write_clips(tmp_path / 'clips', 32)
+    stitcher = ParallelAudioClipStitcher(max_workers=2, batches_per_worker=8, export=AudioExport(format='flac'))
+    executor = CountingExecutor(max_workers=2)
+    stitcher._executor = executor
+
+    # Record how many batches had been submitted whenever a batch is encoded
+    submitted_at_writes = []
+    open_audio_encoder = audio_stitcher.open_audio_encoder
+
+    def open_counting_encoder(*args, **kwargs):
+        encoder = open_audio_encoder(*args, **kwargs)
+        write = encoder.write
+
+        def counting_write(frames):
+            submitted_at_writes.append(executor.submitted)
+            write(frames)
+
+        encoder.write = counting_write
+        return encoder
+
+    monkeypatch.setattr(audio_stitcher, 'open_audio_encoder', open_counting_encoder)
+
+    asyncio.run(stitcher.stitch_audio_clips_async(str(tmp_path / 'clips'), str(tmp_path), 'podcast.flac'))
+    stitcher.shutdown()
+
+    assert len(submitted_at_writes) == 16
+    # Before the i-th write, i batches were encoded and at most max_workers more were in flight
+    assert all(submitted <= index + 1 + 2 for index, submitted in enumerate(submitted_at_writes))
+    assert soundfile.info(str(tmp_path / 'podcast.flac')).frames == 32 * 2400
+
+def test_overlapping_loud_clips_are_clipped_like_the_timeline_stitcher(tmp_path, monkeypatch):
+    clip_dir = tmp_path / 'clips'
+    clip_dir.mkdir()
+    for speaker in ('Jane', 'John'):
+        for order, sample in ((0, 30000), (1, -30000)):
+            with wave.open(str(clip_dir / f"{order}-{speaker}.wav"), 'wb') as file:
+                file.setnchannels(1)
+                file.setsampwidth(2)
+                file.setframerate(24000)
+                file.writeframes(sample.to_bytes(2, 'little', signed=True) * 100)
+
+    # Record the frames handed to the encoder; lossy encoders don't clip them on their own
+    written = []
+    open_audio_encoder = audio_stitcher.open_audio_encoder
+
+    def open_recording_encoder(*args, **kwargs):
+        encoder = open_audio_encoder(*args, **kwargs)
+        write = encoder.write
+
+        def recording_write(frames):
+            written.append(frames.copy())
+            write(frames)
+
+        encoder.write = recording_write
+        return encoder
+
+    monkeypatch.setattr(audio_stitcher, 'open_audio_encoder', open_recording_encoder)
+
+    asyncio.run(StreamingAudioClipStitcher().stitch_audio_clips_async(str(clip_dir), str(tmp_path), 'streaming.wav'))
+    streamed = np.concatenate(written)
+    written.clear()
+    asyncio.run(TimelineAudioClipStitcher().stitch_audio_clips_async(str(clip_dir), str(tmp_path), 'timeline.wav'))
+
+    assert streamed.dtype == np.int16
+    assert list(streamed[:100, 0]) == [32767] * 100
+    assert list(streamed[100:, 0]) == [-32768] * 100
+    assert (streamed == np.concatenate(written)).all()
@@ -0,0 +1,45 @@
+import asyncio
+
+from podcaster.audio_stitcher import TimelineAudioClipStitcher
+from podcaster.clip_manifest import read_clip_manifest
+from podcaster.episode_pipeline import EpisodePipeline
+from podcaster.fakes import FakeLLMClient, FakeTTSClient
+from podcaster.models import Source
+from podcaster.prompt_renderer import JinjaPromptRenderer
+from podcaster.speech_to_audio_converter import DefaultSpeechToAudioConverter
+from podcaster.transcript_generator import LLMTranscriptGenerator
+from podcaster.transcript_repository import LocalTranscriptRepository
+from podcaster.transcript_to_audio_converter import DefaultTranscriptToAudioConverter
+
+def create_pipeline(tmp_path) -> EpisodePipeline:
+    converter = DefaultTranscriptToAudioConverter(
+        DefaultSpeechToAudioConverter(FakeTTSClient(latency=0, seconds_per_char=0.001)),
+        output_directory=str(tmp_path / 'clips')
+    )
+    return EpisodePipeline(
+        LLMTranscriptGenerator(
+            FakeLLMClient(latency=0, item_count=4, words_per_item=3, chunk_size=16),
+            JinjaPromptRenderer('prompts', cache_directory=None)
+        ),
+        LocalTranscriptRepository(str(tmp_path / 'transcripts')),
+        converter,
+        TimelineAudioClipStitcher(),
+        output_directory=str(tmp_path / 'podcasts'),
+        stream_items=True
+    )
+
+def test_streamed_items_leave_a_manifest_and_no_orphans(tmp_path):
+    outlines = [Source(text='Episode\n\nIntroduction')]
+    asyncio.run(create_pipeline(tmp_path).run_async(['Jane Doe', 'John Smith'], [], outlines))
+    [clip_dir] = (tmp_path / 'clips').iterdir()
+    # A clip left behind by an earlier, longer version of the same episode
+    (clip_dir / '99-Jane.wav').write_bytes((clip_dir / '0-Jane.wav').read_bytes())
+
+    report = asyncio.run(create_pipeline(tmp_path).run_async(['Jane Doe', 'John Smith'], [], outlines))
+
+    assert len(report.podcasts) == 1
+    assert not (clip_dir / '99-Jane.wav').exists()
+    manifest = read_clip_manifest(clip_dir)
+    assert manifest is not None
+    assert sorted(entry.filename for entry in manifest.entries) == sorted(path.name for path in clip_dir.glob('*.wav'))
+    assert len(manifest.entries) == 4
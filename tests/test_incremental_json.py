@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from podcaster.incremental_json import IncrementalArrayParser
+
+DOCUMENT = json.dumps({
+    'title': 'Quotes \" and \\\\ backslashes, é and \\u00e9 and {braces} [brackets]',
+    'hosts': [{'name': 'Jane "JD" Doe', 'id': 'Jane'}],
+    'items': [
+        {'order': 1, 'content': 'He said \\"hi\\", then left}', 'tags': [{'a': [1, 2]}, {}]},
+        12345,
+        -0.25,
+        True,
+        None,
+        'a ] string, with delimiters',
+        [[1, [2]], {'nested': {'deeper': ['x']}}],
+    ],
+    'count': 1234567,
+    'done': False,
+}, ensure_ascii=False)
+
+def parse_in_chunks(document: str, chunk_size: int) -> tuple[IncrementalArrayParser, list]:
+    parser = IncrementalArrayParser('items')
+    elements = []
+    for start in range(0, len(document), chunk_size):
+        elements.extend(parser.feed(document[start:start + chunk_size]))
+    return parser, elements
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 16, 1000])
+def test_chunk_boundaries_do_not_change_the_result(chunk_size):
+    expected = json.loads(DOCUMENT)
+
+    parser, elements = parse_in_chunks(DOCUMENT, chunk_size)
+
+    assert parser.complete
+    assert elements == expected['items']
+    assert parser.fields == {key: value for key, value in expected.items() if key != 'items'}
+
+def test_elements_are_returned_as_soon_as_they_complete():
+    parser = IncrementalArrayParser('items')
+
+    assert parser.feed('{"title": "T", "items": [{"a": "}') == []
+    assert parser.feed('"}, 12') == [{'a': '}'}]
+    assert parser.feed('3, ') == [123]
+    assert parser.feed('"x\\"') == []
+    assert parser.feed('"]}') == ['x"']
+    assert parser.complete
+
+def test_consumed_text_is_dropped():
+    parser = IncrementalArrayParser('items')
+    parser.feed('{"title": "T", "items": [')
+    for _ in range(1000):
+        parser.feed('{"content": "Some words"}, ')
+        # Only the incomplete element, if any, is kept
+        assert len(parser._buffer) < 100
+
+    assert len(parser.feed('{"content": "Last"}]}')) == 1
+    assert parser.complete
@@ -0,0 +1,53 @@
+import types
+
+import pytest
+
+from podcaster import job_store as job_store_module
+from podcaster.job_store import JobStore, LeaseLostError
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(job_store_module, 'time', types.SimpleNamespace(time=clock.time))
+    return clock
+
+def test_a_job_is_handed_over_once_its_lease_expires(tmp_path, clock):
+    job_store = JobStore(str(tmp_path / 'jobs.sqlite3'), lease_seconds=10)
+    job = job_store.add_transcript_job('Episode')
+
+    assert job_store.claim_job('worker-a').id == job.id
+    clock.now += 9
+    assert job_store.claim_job('worker-b') is None
+
+    clock.now += 2
+    claimed = job_store.claim_job('worker-b')
+    assert claimed.id == job.id
+    assert claimed.status == 'running'
+
+    # The first worker can no longer update the job or renew its lease
+    with pytest.raises(LeaseLostError):
+        job_store.renew_lease(job.id, 'worker-a')
+    with pytest.raises(LeaseLostError):
+        job_store.advance_job(job.id, 'worker-a', 'done')
+    job_store.advance_job(job.id, 'worker-b', 'done')
+    assert job_store.get_job(job.id).status == 'done'
+
+def test_renewing_a_lease_keeps_the_job(tmp_path, clock):
+    job_store = JobStore(str(tmp_path / 'jobs.sqlite3'), lease_seconds=10)
+    job = job_store.add_transcript_job('Episode')
+    job_store.claim_job('worker-a')
+
+    for _ in range(3):
+        clock.now += 8
+        job_store.renew_lease(job.id, 'worker-a')
+        assert job_store.claim_job('worker-b') is None
+
+    clock.now += 11
+    assert job_store.claim_job('worker-b').id == job.id
@@ -0,0 +1,42 @@
+import asyncio
+
+from podcaster.job_store import JobStore
+from podcaster.job_worker import JobWorker
+
+def create_worker(job_store: JobStore, stages) -> JobWorker:
+    worker = JobWorker(job_store, None, None, None, None, worker_id='worker-a')
+    worker._run_stages_async = stages
+    return worker
+
+def take_over(job_store: JobStore, job_id: int) -> None:
+    # What happens when the lease expires and another worker claims the job
+    job_store._connection.execute("UPDATE jobs SET worker = 'worker-b' WHERE id = ?", (job_id,))
+
+def test_a_lost_lease_neither_fails_the_job_nor_stops_the_worker(tmp_path):
+    job_store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    lost = job_store.add_transcript_job('Lost')
+    kept = job_store.add_transcript_job('Kept')
+
+    async def stages(job):
+        if job.id == lost.id:
+            take_over(job_store, job.id)
+        job_store.advance_job(job.id, 'worker-a', 'done', podcast=f'{job.transcript}.wav')
+
+    jobs = asyncio.run(create_worker(job_store, stages).run_async())
+
+    assert [job.id for job in jobs] == [lost.id, kept.id]
+    lost_job = job_store.get_job(lost.id)
+    assert (lost_job.status, lost_job.attempts, lost_job.error) == ('running', 0, None)
+    assert job_store.get_job(kept.id).status == 'done'
+
+def test_a_failure_after_the_lease_was_lost_is_not_recorded(tmp_path):
+    job_store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    job = job_store.add_transcript_job('Lost')
+
+    async def stages(job):
+        take_over(job_store, job.id)
+        raise RuntimeError('synthesis failed')
+
+    [result] = asyncio.run(create_worker(job_store, stages).run_async())
+
+    assert (result.status, result.attempts) == ('running', 0)
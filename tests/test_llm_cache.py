@@ -0,0 +1,48 @@
+import asyncio
+
+from podcaster.fakes import FakeLLMClient
+from podcaster.llm_cache import CachingLLMClient
+from podcaster.models import TranscriptSection
+
+def create_cache(tmp_path, llm_client: FakeLLMClient) -> CachingLLMClient:
+    return CachingLLMClient(llm_client, model='fake-llm', database_path=str(tmp_path / 'llm.sqlite3'))
+
+def test_cancelling_the_first_request_does_not_cancel_identical_ones(tmp_path):
+    llm_client = FakeLLMClient(latency=0.1, item_count=2, words_per_item=3)
+    cache = create_cache(tmp_path, llm_client)
+
+    async def run_async():
+        first = asyncio.create_task(cache.generate_model_async('prompt', TranscriptSection))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(cache.generate_model_async('prompt', TranscriptSection))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    section = asyncio.run(run_async())
+
+    assert len(section.items) == 2
+    assert llm_client.requests == 1
+    assert cache.stats.coalesced == 1
+
+def test_identical_streams_share_one_request(tmp_path):
+    llm_client = FakeLLMClient(latency=0.05, item_count=2, words_per_item=3, chunk_size=8)
+    cache = create_cache(tmp_path, llm_client)
+
+    async def stream_async() -> str:
+        return ''.join([chunk async for chunk in cache.stream_model_json_async('prompt', TranscriptSection)])
+
+    async def run_async():
+        return await asyncio.gather(stream_async(), stream_async(), stream_async())
+
+    responses = asyncio.run(run_async())
+
+    assert llm_client.requests == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.coalesced == 2
+    sections = [TranscriptSection.model_validate_json(response) for response in responses]
+    assert sections[0] == sections[1] == sections[2]
+    # Later requests, streamed or not, are served from the cache
+    assert asyncio.run(stream_async()) == responses[1]
+    assert asyncio.run(cache.generate_model_async('prompt', TranscriptSection)) == sections[0]
+    assert llm_client.requests == 1
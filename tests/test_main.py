@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPOSITORY_ROOT = Path(__file__).resolve().parent.parent
+
+def get_imported_modules(statement: str, modules: list[str]) -> list[str]:
+    """Run statement in a fresh interpreter and return which of modules it imported."""
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join(filter(None, [str(REPOSITORY_ROOT), environment.get('PYTHONPATH')]))
+    result = subprocess.run(
+        [sys.executable, '-c', f"import sys; {statement}; print(' '.join(m for m in {modules!r} if m in sys.modules))"],
+        cwd=REPOSITORY_ROOT,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return result.stdout.split()
+
+@pytest.mark.parametrize('module', ['rich', 'inquirer', 'openai', 'librosa', 'pydub'])
+def test_backends_are_not_imported_before_a_command_runs(module):
+    assert get_imported_modules('import main', [module]) == []
+
+def test_choosing_a_stitcher_does_not_import_other_backends():
+    statement = 'from podcaster.audio_stitcher import ParallelAudioClipStitcher, StreamingAudioClipStitcher'
+    assert get_imported_modules(statement, ['librosa', 'pydub']) == []
@@ -0,0 +1,39 @@
+from podcaster.models import MappedTextFileSource, TextFileSource, Transcript
+
+def test_mapped_source_decodes_its_file_on_access(tmp_path):
+    filepath = tmp_path / 'source.txt'
+    filepath.write_text('Café society.', encoding='utf-8')
+    source = MappedTextFileSource(filepath=str(filepath))
+
+    assert source.text == 'Café society.'
+    assert source.get_content_hash() == TextFileSource(text=source.text, filepath=str(filepath)).get_content_hash()
+
+    filepath.write_text('Rewritten.', encoding='utf-8')
+    assert source.text == 'Rewritten.'
+    assert source.get_content_hash() == TextFileSource(text='Rewritten.', filepath=str(filepath)).get_content_hash()
+
+def test_mapped_source_round_trips_through_model_dump(tmp_path):
+    filepath = tmp_path / 'source.txt'
+    filepath.write_text('Some text.', encoding='utf-8')
+    source = MappedTextFileSource(filepath=str(filepath))
+
+    dumped = source.model_dump()
+    assert dumped == {'filepath': str(filepath)}
+    loaded = MappedTextFileSource.model_validate(dumped)
+    assert loaded == source
+    assert loaded.text == 'Some text.'
+    assert MappedTextFileSource.model_validate_json(source.model_dump_json()).text == 'Some text.'
+
+def test_mapped_source_of_an_empty_file(tmp_path):
+    filepath = tmp_path / 'empty.txt'
+    filepath.touch()
+
+    assert MappedTextFileSource(filepath=str(filepath)).text == ''
+
+def test_transcript_slugs_do_not_collide():
+    titles = ['A B', 'A_B', 'A/B', 'A\\B', 'A  B', '', '.', '..']
+    slugs = [Transcript(title=title, hosts=[], items=[]).get_slug() for title in titles]
+
+    assert slugs[0] == 'A_B'
+    assert len(set(slugs)) == len(titles)
+    assert all(slug.strip('.') and '/' not in slug and '\\' not in slug for slug in slugs)
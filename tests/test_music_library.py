@@ -0,0 +1,131 @@
+import asyncio
+import logging
+
+import numpy as np
+import soundfile
+
+from podcaster.clip_manifest import read_clip_manifest
+from podcaster.fakes import FakeTTSClient
+from podcaster.models import Host, MusicThemeTranscriptItem, SpeechTranscriptItem, Transcript, Voice
+from podcaster.music_library import (
+    MusicMix, MusicThemeLibrary, apply_gain_envelope, get_group_envelopes, get_music_clip_name, get_music_envelope, is_music_clip
+)
+from podcaster.speech_to_audio_converter import DefaultSpeechToAudioConverter
+from podcaster.transcript_to_audio_converter import DefaultTranscriptToAudioConverter
+from podcaster.wav_reader import WAVE_FORMAT_PCM, WavInfo
+
+def write_theme(theme_dir, theme: str, sample_rate: int = 48000, frames: int = 4800) -> None:
+    theme_dir.mkdir(exist_ok=True)
+    soundfile.write(str(theme_dir / f'{theme}.flac'), np.full((frames, 2), 0.5), sample_rate)
+
+def create_library(tmp_path) -> MusicThemeLibrary:
+    return MusicThemeLibrary(str(tmp_path / 'themes'), cache_directory=str(tmp_path / 'cache'))
+
+def create_transcript(theme: str) -> Transcript:
+    return Transcript(
+        title='Test Episode',
+        hosts=[Host(name='Jane Doe', voice=Voice.ALLOY, id='Jane')],
+        items=[
+            MusicThemeTranscriptItem(type='music_theme', order=0, theme=theme),
+            SpeechTranscriptItem(type='speech', order=1, speaker_id='Jane', content='Hello.')
+        ]
+    )
+
+def test_known_themes_are_decoded_to_the_target_format(tmp_path):
+    write_theme(tmp_path / 'themes', 'intro')
+    library = create_library(tmp_path)
+    item = MusicThemeTranscriptItem(type='music_theme', order=3, theme='intro')
+
+    clip = library.place_theme(item, tmp_path / 'clips')
+
+    assert clip.name == '3-music_intro.wav'
+    assert is_music_clip(clip.name)
+    info = soundfile.info(str(clip))
+    assert (info.samplerate, info.channels, info.subtype, info.frames) == (24000, 1, 'PCM_16', 2400)
+    assert library.read_theme_bytes('intro') == clip.read_bytes()
+
+def test_decoded_themes_are_reused(tmp_path, monkeypatch):
+    write_theme(tmp_path / 'themes', 'intro')
+    library = create_library(tmp_path)
+    decoded = []
+    decode = library._decode
+    monkeypatch.setattr(library, '_decode', lambda *args: (decoded.append(args), decode(*args)))
+
+    first = library.get_theme_path('intro')
+    assert library.get_theme_path('intro') == first
+    assert create_library(tmp_path).get_theme_path('intro') == first
+    assert len(decoded) == 1
+
+    # Replacing the asset decodes it again
+    write_theme(tmp_path / 'themes', 'intro', frames=9600)
+    assert library.get_theme_path('intro') != first
+    assert len(decoded) == 2
+
+def test_unknown_themes_are_skipped(tmp_path, caplog):
+    write_theme(tmp_path / 'themes', 'intro')
+    converter = DefaultTranscriptToAudioConverter(
+        DefaultSpeechToAudioConverter(FakeTTSClient()),
+        output_directory=str(tmp_path / 'clips'),
+        incremental=True,
+        music_library=create_library(tmp_path)
+    )
+    transcript = create_transcript('outro')
+
+    with caplog.at_level(logging.WARNING):
+        clip_dir = asyncio.run(converter.convert_transcript_to_audio_async(transcript))
+
+    assert 'outro' in caplog.text
+    assert sorted(path.name for path in clip_dir.glob('*.wav')) == ['1-Jane.wav']
+    assert [entry.filename for entry in read_clip_manifest(clip_dir).entries] == ['1-Jane.wav']
+    assert converter.get_clip_names(transcript) == ['1-Jane.wav']
+    assert list(asyncio.run(converter.convert_transcript_to_audio_buffers_async(transcript))) == ['1-Jane.wav']
+
+def test_theme_names_are_made_safe_for_file_names():
+    item = MusicThemeTranscriptItem(type='music_theme', order=0, theme='../../jingle')
+
+    name = get_music_clip_name(item)
+
+    assert '/' not in name
+    assert is_music_clip(name)
+    assert name != get_music_clip_name(MusicThemeTranscriptItem(type='music_theme', order=0, theme='.._.._jingle'))
+
+def test_is_music_clip():
+    assert is_music_clip('4-music_intro.wav')
+    assert not is_music_clip('4-Jane.wav')
+    assert not is_music_clip('music_4-Jane.wav')
+
+def test_envelope_fades_and_ducks_at_the_group_boundaries():
+    mix = MusicMix(gain=0.8, duck_gain=0.25, duck_seconds=0.3, fade_in_seconds=0.5, fade_out_seconds=1.0)
+    envelope = get_music_envelope(mix, sample_rate=100, clip_frames=1000, speech_frames=400)
+
+    gains = np.ones((1000, 1), dtype=np.float32)
+    apply_gain_envelope(gains, 0, envelope)
+    gains = gains[:, 0]
+
+    # The theme fades in from silence, but only up to the ducked gain while speech plays
+    assert gains[0] == 0.0
+    assert np.isclose(gains[50], 0.8 * 0.25)
+    assert np.isclose(gains[400], 0.8 * 0.25)
+    # It ramps back to its full gain once the speech ends and fades out at the end of its clip
+    assert np.isclose(gains[430], 0.8)
+    assert np.isclose(gains[899], 0.8)
+    assert gains[999] == 0.0
+
+    # Applying the envelope block by block gives the same gains
+    blocks = np.ones((1000, 1), dtype=np.float32)
+    for start in range(0, 1000, 128):
+        apply_gain_envelope(blocks[start:start + 128], start, envelope)
+    assert np.allclose(blocks[:, 0], gains)
+
+def test_only_music_clips_of_a_group_get_envelopes():
+    info = WavInfo(format_tag=WAVE_FORMAT_PCM, channels=1, sample_rate=100, bits_per_sample=16, data_offset=44, frame_count=1000)
+    speech = info.model_copy(update={'frame_count': 400})
+
+    envelopes = get_group_envelopes(['0-music_intro.wav', '0-Jane.wav'], [info, speech], MusicMix())
+
+    assert envelopes[1] is None
+    positions, gains = envelopes[0]
+    assert np.isclose(np.interp(400, positions, gains), MusicMix().duck_gain)
+    # Without speech in the group, the theme is only faded
+    positions, gains = get_group_envelopes(['0-music_intro.wav'], [info], MusicMix())[0]
+    assert np.isclose(np.interp(400, positions, gains), MusicMix().gain)
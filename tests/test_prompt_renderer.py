@@ -0,0 +1,36 @@
+import os
+from pathlib import Path
+
+from podcaster.models import MappedTextFileSource, TextFileSource
+from podcaster.prompt_renderer import JinjaPromptRenderer
+
+def create_renderer() -> JinjaPromptRenderer:
+    return JinjaPromptRenderer(str(Path(__file__).resolve().parent.parent / 'prompts'), cache_directory=None)
+
+def test_source_blocks_are_reused_for_the_same_content(tmp_path):
+    renderer = create_renderer()
+    first = [TextFileSource(text='Some text.', filepath=str(tmp_path / 'a.txt'))]
+    same = [TextFileSource(text='Some text.', filepath=str(tmp_path / 'a.txt'))]
+
+    block = renderer.render_sources(first)
+
+    assert 'Some text.' in block
+    assert renderer.render_sources(same) is block
+    assert 'Other text.' in renderer.render_sources([TextFileSource(text='Other text.', filepath=str(tmp_path / 'a.txt'))])
+
+def test_edited_mapped_sources_are_rendered_again(tmp_path):
+    filepath = tmp_path / 'source.txt'
+    filepath.write_text('Before the edit.', encoding='utf-8')
+    renderer = create_renderer()
+    sources = [MappedTextFileSource(filepath=str(filepath))]
+
+    assert 'Before the edit.' in renderer.render_sources(sources)
+
+    filepath.write_text('After the edit!', encoding='utf-8')
+    # Make sure the edit is visible even where the file system's clock is coarse
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    block = renderer.render_sources(sources)
+    assert 'After the edit!' in block
+    assert 'Before the edit.' not in block
@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+from podcaster.fakes import FakeOpenAIServer
+from podcaster.llm_client import OpenAILLMClient
+from podcaster.rate_limiter import RateLimiter
+
+def test_header_limits_never_raise_the_configured_rate():
+    rate_limiter = RateLimiter(requests_per_period=10, period_seconds=60)
+
+    rate_limiter.on_success({'x-ratelimit-limit-requests': '100'})
+    assert rate_limiter.get_requests_per_period() == 10
+
+    rate_limiter.on_success({'x-ratelimit-limit-requests': '5'})
+    assert rate_limiter.get_requests_per_period() == 5
+
+def test_rate_limited_requests_back_off_and_recover():
+    # The limiter starts out allowing four times what the server accepts
+    server = FakeOpenAIServer(requests_per_period=5, tokens_per_period=10 ** 6, period_seconds=0.5)
+    rate_limiter = RateLimiter(requests_per_period=20, period_seconds=0.5, min_rate_fraction=0.5, recovery_fraction=0.5)
+    llm_client = OpenAILLMClient(
+        api_key='test', rate_limiter=rate_limiter, max_rate_limit_retries=20, http_client=server.create_http_client()
+    )
+
+    async def run_async() -> list[str]:
+        return await asyncio.gather(*(llm_client.generate_text_async(f'Prompt {index}') for index in range(15)))
+
+    responses = asyncio.run(run_async())
+
+    assert len(responses) == 15
+    assert server.accepted == 15
+    assert server.rejected > 0
+    assert rate_limiter.stats.rate_limited == server.rejected
+    # Successes bring the rate back up to the server's limit, and no further
+    assert rate_limiter.get_requests_per_period() == 5
+
+def test_connection_errors_are_retried_behind_the_limiter():
+    server = FakeOpenAIServer()
+    failures = [httpx.ConnectError('connection refused')]
+
+    async def handle_async(request: httpx.Request) -> httpx.Response:
+        if failures:
+            raise failures.pop()
+        return await server.handle_async(request)
+
+    llm_client = OpenAILLMClient(
+        api_key='test',
+        rate_limiter=RateLimiter(requests_per_period=20, period_seconds=1.0),
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_async)),
+        retry_base_delay=0.001
+    )
+
+    response = asyncio.run(llm_client.generate_text_async('Prompt'))
+
+    assert response
+    assert not failures
+    assert server.accepted == 1
+
+def test_connection_errors_are_raised_once_retries_are_used_up():
+    attempts = []
+
+    async def handle_async(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        raise httpx.ConnectError('connection refused')
+
+    llm_client = OpenAILLMClient(
+        api_key='test',
+        rate_limiter=RateLimiter(requests_per_period=20, period_seconds=1.0),
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handle_async)),
+        max_retries=2,
+        retry_base_delay=0.001
+    )
+
+    with pytest.raises(APIConnectionError):
+        asyncio.run(llm_client.generate_text_async('Prompt'))
+    assert len(attempts) == 3
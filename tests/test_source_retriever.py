@@ -0,0 +1,30 @@
+import asyncio
+
+from podcaster.models import Source, TextFileSource
+from podcaster.source_retriever import BM25SourceIndex, SourceRetriever
+
+def create_sources(tmp_path, count: int) -> list[Source]:
+    sources = []
+    for index in range(count):
+        filepath = tmp_path / f'source-{index}.txt'
+        filepath.write_text(f'Topic {index} covers volcanoes and glaciers. ' * 50 + f'\n\nMore about topic {index}.', encoding='utf-8')
+        sources.append(TextFileSource(text=filepath.read_text(encoding='utf-8'), filepath=str(filepath)))
+    return sources
+
+def test_concurrent_selections_share_one_index(tmp_path):
+    index_path = tmp_path / 'index' / 'sources.json'
+    retriever = SourceRetriever(BM25SourceIndex(str(index_path), chunk_tokens=10), token_budget=1000)
+    sources = create_sources(tmp_path, 200)
+    outlines = [Source(text='Episode\n\nVolcanoes\n\nGlaciers') for _ in range(8)]
+
+    async def select_async():
+        return await asyncio.gather(*(retriever.select_sources_async(sources, outline) for outline in outlines))
+
+    selections = asyncio.run(select_async())
+
+    assert all(selection == selections[0] for selection in selections)
+    assert selections[0]
+    assert not index_path.with_suffix('.tmp').exists()
+    reloaded = BM25SourceIndex(str(index_path), chunk_tokens=10)
+    reloaded.update(sources)
+    assert [chunk for _, chunk in reloaded.search('volcanoes')] == [chunk for _, chunk in retriever._index.search('volcanoes')]
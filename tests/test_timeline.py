@@ -0,0 +1,42 @@
+import wave
+
+import numpy as np
+
+from podcaster.timeline import build_timeline, iter_timeline_samples
+from podcaster.wav_reader import WAVE_FORMAT_PCM, WavInfo
+
+def write_clip(path, samples: np.ndarray) -> str:
+    with wave.open(str(path), 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(1000)
+        file.writeframes(samples.astype('<i2').tobytes())
+    return str(path)
+
+def test_overlapping_clips_mix_like_a_direct_sum(tmp_path):
+    random = np.random.default_rng(0)
+    clips = []
+    expected = np.zeros(20000, dtype=np.int64)
+    cursor = 0
+    # Every clip cuts into the previous one, so the whole episode is one long mixed run
+    for order in range(40):
+        length = int(random.integers(200, 600))
+        samples = random.integers(-1000, 1000, length)
+        path = write_clip(tmp_path / f'{order}-Jane.wav', samples)
+        clips.append((order, -0.1, f'{order}-Jane.wav', path))
+        start = max(0, cursor - 100)
+        expected[start:start + length] += samples
+        cursor = max(cursor, start + length)
+    expected = expected[:cursor]
+
+    timeline = build_timeline(clips)
+    output_info = WavInfo(
+        format_tag=WAVE_FORMAT_PCM, channels=1, sample_rate=1000, bits_per_sample=16, data_offset=0,
+        frame_count=timeline.frame_count
+    )
+    mixed = np.concatenate([
+        np.asarray(block).reshape(-1) for block in iter_timeline_samples(timeline, output_info, block_frames=64)
+    ])
+
+    assert timeline.frame_count == cursor
+    np.testing.assert_array_equal(mixed, expected)
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from podcaster.fakes import FakeLLMClient
+from podcaster.llm_cache import CachingLLMClient
+from podcaster.models import SpeechTranscriptItem, Source
+from podcaster.prompt_renderer import JinjaPromptRenderer
+from podcaster.transcript_generator import SectionedLLMTranscriptGenerator
+
+class UnknownSpeakerLLMClient(FakeLLMClient):
+    """FakeLLMClient whose first `failures` sections are spoken by a host that does not exist."""
+
+    def __init__(self, failures: int):
+        super().__init__(latency=0, item_count=2, words_per_item=3)
+        self.failures = failures
+        self.prompts: list[str] = []
+
+    async def generate_model_async(self, prompt, model_type):
+        self.prompts.append(prompt)
+        section = await super().generate_model_async(prompt, model_type)
+        if self.failures:
+            self.failures -= 1
+            section.items[0] = section.items[0].model_copy(update={'speaker_id': 'Nobody'})
+        return section
+
+def create_generator(llm_client, **kwargs) -> SectionedLLMTranscriptGenerator:
+    return SectionedLLMTranscriptGenerator(llm_client, JinjaPromptRenderer('prompts', cache_directory=None), **kwargs)
+
+def test_host_ids_are_unique():
+    generator = create_generator(FakeLLMClient())
+
+    hosts = generator.create_hosts(['Jane Doe', 'John Smith', 'John Doe', 'John Doe', 'Ann'])
+
+    assert [host.id for host in hosts] == ['Jane', 'John_Smith', 'John_Doe', 'John_Doe2', 'Ann']
+
+def test_empty_outline_is_rejected():
+    generator = create_generator(FakeLLMClient(latency=0))
+
+    with pytest.raises(ValueError, match='empty'):
+        asyncio.run(generator.generate_transcript_async(['Jane Doe', 'John Smith'], [], Source(text='\n \n')))
+
+def test_invalid_section_is_retried_with_the_error(tmp_path):
+    llm_client = UnknownSpeakerLLMClient(failures=1)
+    caching_client = CachingLLMClient(llm_client, model='fake-llm', database_path=str(tmp_path / 'llm.sqlite3'))
+    generator = create_generator(caching_client, max_section_retries=1)
+
+    transcript = asyncio.run(generator.generate_transcript_async(
+        ['Jane Doe', 'John Smith'], [], Source(text='Episode\n\nIntroduction')
+    ))
+
+    assert len(llm_client.prompts) == 2
+    assert 'Unknown speaker id Nobody' in llm_client.prompts[1]
+    assert all(item.speaker_id in ('Jane', 'John') for item in transcript.items if isinstance(item, SpeechTranscriptItem))
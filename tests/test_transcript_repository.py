@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+
+from podcaster.models import Host, SpeechTranscriptItem, Transcript, Voice
+from podcaster.transcript_repository import SQLiteTranscriptRepository
+
+def create_transcript(title: str, item_count: int) -> Transcript:
+    return Transcript(
+        title=title,
+        hosts=[Host(name='Jane Doe', voice=Voice.ALLOY, id='Jane')],
+        items=[
+            SpeechTranscriptItem(type='speech', order=order, speaker_id='Jane', content=f'Item {order}.')
+            for order in range(item_count)
+        ]
+    )
+
+def test_transcripts_round_trip(tmp_path):
+    repository = SQLiteTranscriptRepository(str(tmp_path / 'transcripts.sqlite3'), batch_size=3)
+    transcript = create_transcript('First Episode', 10)
+
+    async def round_trip_async():
+        await repository.write_transcript_async(transcript)
+        items = [item async for item in repository.iter_transcript_items_async('First Episode')]
+        return await repository.read_transcript_async('First Episode'), items
+
+    read, items = asyncio.run(round_trip_async())
+
+    assert read == transcript
+    assert items == transcript.items
+    assert asyncio.run(repository.list_transcripts_async()) == ['First Episode']
+
+def test_missing_transcripts_are_not_found(tmp_path):
+    repository = SQLiteTranscriptRepository(str(tmp_path / 'transcripts.sqlite3'))
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(repository.read_transcript_async('Missing'))
+
+def test_queries_run_off_the_event_loop(tmp_path, monkeypatch):
+    repository = SQLiteTranscriptRepository(str(tmp_path / 'transcripts.sqlite3'))
+    threads = set()
+    fetch_all = repository._fetch_all
+    write = repository._write
+
+    def record(function):
+        def recorded(*args):
+            threads.add(threading.get_ident())
+            return function(*args)
+        return recorded
+
+    monkeypatch.setattr(repository, '_fetch_all', record(fetch_all))
+    monkeypatch.setattr(repository, '_write', record(write))
+
+    async def write_and_list_async():
+        await asyncio.gather(*(
+            repository.write_transcript_async(create_transcript(f'Episode {index}', 5)) for index in range(8)
+        ))
+        return await repository.list_transcript_summaries_async()
+
+    summaries = asyncio.run(write_and_list_async())
+
+    assert [summary.item_count for summary in summaries] == [5] * 8
+    assert threads and threading.get_ident() not in threads
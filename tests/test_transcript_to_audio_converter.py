@@ -0,0 +1,178 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from podcaster import transcript_to_audio_converter
+from podcaster.audio_stitcher import StreamingAudioClipStitcher
+from podcaster.fakes import FakeTTSClient
+from podcaster.models import Host, SpeechTranscriptItem, Transcript, Voice
+from podcaster.speech_to_audio_converter import DefaultSpeechToAudioConverter
+from podcaster.transcript_to_audio_converter import DefaultTranscriptToAudioConverter
+from podcaster.tts_client import TransientTTSError
+
+class RecordingTTSClient(FakeTTSClient):
+    """FakeTTSClient that records how many requests run at once and fails the first `failures` ones."""
+
+    def __init__(self, latency: float = 0.01, failures: int = 0, error: Exception | None = None):
+        super().__init__(latency=latency, seconds_per_char=0.001)
+        self.failures = failures
+        self.error = error or TransientTTSError('unavailable')
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.texts: list[str] = []
+
+    async def synthesize_speech_bytes_async(self, text: str, voice: Voice) -> bytes:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.texts.append(text)
+            if self.failures:
+                self.failures -= 1
+                await asyncio.sleep(0)
+                raise self.error
+            return await super().synthesize_speech_bytes_async(text, voice)
+        finally:
+            self.in_flight -= 1
+
+def create_transcript(item_count: int) -> Transcript:
+    return Transcript(
+        title='Test Episode',
+        hosts=[Host(name='Jane Doe', voice=Voice.ALLOY, id='Jane'), Host(name='John Smith', voice=Voice.ECHO, id='John')],
+        items=[
+            SpeechTranscriptItem(type='speech', order=order, speaker_id=('Jane', 'John')[order % 2], content=f'Item {order}.')
+            for order in range(item_count)
+        ]
+    )
+
+def create_converter(
+    tts_client: RecordingTTSClient, output_directory: Path, max_chunk_chars: int = 4096, **kwargs
+) -> DefaultTranscriptToAudioConverter:
+    return DefaultTranscriptToAudioConverter(
+        DefaultSpeechToAudioConverter(tts_client, max_chunk_chars=max_chunk_chars),
+        output_directory=str(output_directory),
+        retry_base_delay=0.001,
+        retry_max_delay=0.001,
+        **kwargs
+    )
+
+def test_concurrency_is_bounded(tmp_path):
+    tts_client = RecordingTTSClient()
+    converter = create_converter(tts_client, tmp_path, max_concurrency=3)
+
+    clip_dir = asyncio.run(converter.convert_transcript_to_audio_async(create_transcript(12)))
+
+    assert tts_client.max_in_flight == 3
+    assert sorted(path.name for path in clip_dir.glob('*.wav')) == sorted(converter.get_clip_names(create_transcript(12)))
+
+def test_transient_errors_are_retried(tmp_path):
+    tts_client = RecordingTTSClient(failures=2)
+    converter = create_converter(tts_client, tmp_path, max_retries=2)
+
+    clip_dir = asyncio.run(converter.convert_transcript_to_audio_async(create_transcript(1)))
+
+    assert tts_client.texts == ['Item 0.'] * 3
+    assert (clip_dir / '0-Jane.wav').exists()
+
+def test_gives_up_after_max_retries(tmp_path):
+    tts_client = RecordingTTSClient(failures=3)
+    converter = create_converter(tts_client, tmp_path, max_retries=2)
+
+    with pytest.raises(ExceptionGroup) as error:
+        asyncio.run(converter.convert_transcript_to_audio_async(create_transcript(1)))
+
+    assert error.group_contains(TransientTTSError)
+    assert len(tts_client.texts) == 3
+
+def test_other_errors_are_not_retried(tmp_path):
+    tts_client = RecordingTTSClient(failures=1, error=ValueError('bad request'))
+    converter = create_converter(tts_client, tmp_path, max_retries=2)
+
+    with pytest.raises(ExceptionGroup) as error:
+        asyncio.run(converter.convert_transcript_to_audio_async(create_transcript(1)))
+
+    assert error.group_contains(ValueError)
+    assert len(tts_client.texts) == 1
+
+def test_requests_time_out_and_are_retried(tmp_path):
+    tts_client = RecordingTTSClient(latency=1.0)
+    converter = create_converter(tts_client, tmp_path, request_timeout=0.05, max_retries=1)
+
+    with pytest.raises(ExceptionGroup) as error:
+        asyncio.run(converter.convert_transcript_to_audio_async(create_transcript(1)))
+
+    assert error.group_contains(TimeoutError)
+    assert len(tts_client.texts) == 2
+
+def test_backoff_does_not_hold_a_concurrency_slot(tmp_path, monkeypatch):
+    # Always back off for the longest delay, so the failed item sleeps well past the other's request
+    monkeypatch.setattr(transcript_to_audio_converter.random, 'uniform', lambda low, high: high)
+    tts_client = RecordingTTSClient(failures=1)
+    converter = DefaultTranscriptToAudioConverter(
+        DefaultSpeechToAudioConverter(tts_client),
+        output_directory=str(tmp_path),
+        max_concurrency=1,
+        max_retries=1,
+        retry_base_delay=0.5,
+        retry_max_delay=0.5
+    )
+
+    asyncio.run(converter.convert_transcript_to_audio_async(create_transcript(2)))
+
+    # The second item is synthesized while the first one backs off, before its retry
+    assert tts_client.texts == ['Item 0.', 'Item 1.', 'Item 0.']
+
+def create_long_transcript(sentence_count: int) -> Transcript:
+    content = ' '.join(f'Sentence number {index}.' for index in range(sentence_count))
+    return Transcript(
+        title='Long Episode',
+        hosts=[Host(name='Jane Doe', voice=Voice.ALLOY, id='Jane')],
+        items=[SpeechTranscriptItem(type='speech', order=0, speaker_id='Jane', content=content)]
+    )
+
+def test_pieces_of_a_long_item_share_the_concurrency_bound(tmp_path):
+    tts_client = RecordingTTSClient()
+    converter = create_converter(tts_client, tmp_path, max_chunk_chars=20, max_concurrency=2)
+
+    clip_dir = asyncio.run(converter.convert_transcript_to_audio_async(create_long_transcript(6)))
+
+    assert len(tts_client.texts) == 6
+    assert tts_client.max_in_flight == 2
+    assert sorted(path.name for path in clip_dir.iterdir()) == ['0-Jane.wav']
+
+def test_only_the_failed_piece_is_retried(tmp_path):
+    tts_client = RecordingTTSClient(failures=1)
+    converter = create_converter(tts_client, tmp_path, max_chunk_chars=20, max_concurrency=1, max_retries=1)
+
+    asyncio.run(converter.convert_transcript_to_audio_async(create_long_transcript(4)))
+
+    # The first piece failed once; the other pieces were requested once each
+    assert sorted(tts_client.texts) == ['Sentence number 0.'] * 2 + [f'Sentence number {index}.' for index in range(1, 4)]
+
+def test_in_memory_pieces_are_retried_on_their_own(tmp_path):
+    tts_client = RecordingTTSClient(failures=1)
+    converter = create_converter(tts_client, tmp_path, max_chunk_chars=20, max_concurrency=1, max_retries=1)
+
+    clips = asyncio.run(converter.convert_transcript_to_audio_buffers_async(create_long_transcript(3)))
+
+    assert list(clips) == ['0-Jane.wav']
+    assert len(tts_client.texts) == 4
+
+def test_in_memory_clips_match_the_clip_files(tmp_path):
+    transcript = create_transcript(4)
+    converter = create_converter(RecordingTTSClient(), tmp_path / 'clips')
+
+    async def convert_async():
+        return (
+            await converter.convert_transcript_to_audio_async(transcript),
+            await converter.convert_transcript_to_audio_buffers_async(transcript)
+        )
+
+    clip_dir, clips = asyncio.run(convert_async())
+
+    assert {name: (clip_dir / name).read_bytes() for name in converter.get_clip_names(transcript)} == clips
+
+    stitcher = StreamingAudioClipStitcher()
+    asyncio.run(stitcher.stitch_audio_clips_async(str(clip_dir), str(tmp_path), 'from_files.wav'))
+    asyncio.run(stitcher.stitch_audio_buffers_async(clips, str(tmp_path), 'from_buffers.wav'))
+    assert (tmp_path / 'from_files.wav').read_bytes() == (tmp_path / 'from_buffers.wav').read_bytes()
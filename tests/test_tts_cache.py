@@ -0,0 +1,25 @@
+import asyncio
+
+from podcaster.fakes import FakeTTSClient
+from podcaster.models import Voice
+from podcaster.tts_cache import CachingTTSClient
+
+def test_response_format_is_part_of_the_cache_key(tmp_path):
+    wav_client = CachingTTSClient(FakeTTSClient(), model='tts-1', response_format='wav', directory=str(tmp_path))
+    mp3_client = CachingTTSClient(FakeTTSClient(), model='tts-1', response_format='mp3', directory=str(tmp_path))
+
+    assert wav_client.get_cache_key('Hello.', Voice.ALLOY) != mp3_client.get_cache_key('Hello.', Voice.ALLOY)
+
+def test_concurrent_requests_share_one_synthesis_and_release_their_lock(tmp_path):
+    tts_client = FakeTTSClient(latency=0.01)
+    cache = CachingTTSClient(tts_client, model='tts-1', directory=str(tmp_path))
+
+    async def synthesize_async():
+        return await asyncio.gather(*(cache.synthesize_speech_bytes_async('Hello.', Voice.ALLOY) for _ in range(5)))
+
+    audio = asyncio.run(synthesize_async())
+
+    assert len(set(audio)) == 1
+    assert tts_client.requests == 1
+    assert cache.stats.hits == 4
+    assert cache._locks == {}
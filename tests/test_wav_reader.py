@@ -0,0 +1,40 @@
+import wave
+
+import pytest
+
+from podcaster import wav_reader
+from podcaster.wav_reader import join_wav_files, read_wav_info
+
+def write_wav(path, frames: bytes) -> None:
+    with wave.open(str(path), 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(24000)
+        file.writeframes(frames)
+
+def test_join_wav_files_concatenates_frames(tmp_path):
+    write_wav(tmp_path / 'a.wav', b'\x01\x00' * 10)
+    write_wav(tmp_path / 'b.wav', b'\x02\x00' * 5)
+
+    join_wav_files([tmp_path / 'a.wav', tmp_path / 'b.wav'], tmp_path / 'out.wav')
+
+    assert read_wav_info(tmp_path / 'out.wav').frame_count == 15
+    with wave.open(str(tmp_path / 'out.wav'), 'rb') as file:
+        assert file.readframes(15) == b'\x01\x00' * 10 + b'\x02\x00' * 5
+
+def test_join_wav_files_removes_its_temporary_file_on_error(tmp_path, monkeypatch):
+    write_wav(tmp_path / 'a.wav', b'\x01\x00' * 10)
+    write_wav(tmp_path / 'b.wav', b'\x02\x00' * 5)
+    open_wav_frames = wav_reader.open_wav_frames
+
+    def fail_on_second_file(path, info=None):
+        if str(path).endswith('b.wav'):
+            raise OSError('read failed')
+        return open_wav_frames(path, info)
+
+    monkeypatch.setattr(wav_reader, 'open_wav_frames', fail_on_second_file)
+
+    with pytest.raises(OSError):
+        join_wav_files([tmp_path / 'a.wav', tmp_path / 'b.wav'], tmp_path / 'out.wav')
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['a.wav', 'b.wav']